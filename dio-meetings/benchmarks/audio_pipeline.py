@@ -0,0 +1,94 @@
+"""Сравнение файлового и потокового конвейера подготовки аудио к распознаванию.
+
+Файловый конвейер: запись на диске -> pydub -> MP3 фрагменты на диске.
+Потоковый: байты записи -> stdin ffmpeg -> PCM фрагменты в памяти.
+Замеряются время до первого готового фрагмента (time-to-first-recognition без
+учёта самого распознавания), общее время и объём записанного на диск.
+Запись — синусоида заданной длительности в MP3, сгенерированная ffmpeg.
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.audio_pipeline --minutes 60 --segment-seconds 600
+"""
+
+import argparse
+import asyncio
+import subprocess  # noqa: S404
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import aiofiles
+
+from src.utils.media import split_audio_into_chunks, stream_pcm_segments
+
+BYTES_IN_MB = 1024 * 1024
+
+
+def generate_record(path: Path, minutes: int) -> None:
+    subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={minutes * 60}",
+            "-ac", "1", "-ar", "44100", "-b:a", "128k", str(path),
+        ],
+        check=True,
+    )
+
+
+async def read_chunks(path: Path, chunk_size: int = 8 * BYTES_IN_MB) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, mode="rb") as file:
+        while chunk := await file.read(chunk_size):
+            yield chunk
+
+
+def run_files(path: Path, chunks_dir: Path, segment_seconds: int) -> None:
+    start = time.perf_counter()
+    first = None
+    written = 0
+    for chunk in split_audio_into_chunks(
+            path,
+            chunk_duration_ms=segment_seconds * 1000,
+            output_format="mp3",
+            output_dir=chunks_dir,
+    ):
+        first = first or time.perf_counter() - start
+        written += chunk.file_path.stat().st_size
+        chunk.file_path.unlink()
+    total = time.perf_counter() - start
+    print(  # noqa: T201
+        f"files:     first segment {first:.2f} s, total {total:.2f} s, "
+        f"written to disk {written / BYTES_IN_MB:.1f} MB"
+    )
+
+
+async def run_stream(path: Path, segment_seconds: int) -> None:
+    start = time.perf_counter()
+    first = None
+    segments = 0
+    async for _ in stream_pcm_segments(read_chunks(path), segment_seconds):
+        first = first or time.perf_counter() - start
+        segments += 1
+    total = time.perf_counter() - start
+    print(  # noqa: T201
+        f"streaming: first segment {first:.2f} s, total {total:.2f} s, "
+        f"written to disk 0.0 MB ({segments} segments)"
+    )
+
+
+def main(minutes: int, segment_seconds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "meeting.mp3"
+        generate_record(path, minutes)
+        chunks_dir = Path(tmp_dir) / "chunks"
+        chunks_dir.mkdir()
+        run_files(path, chunks_dir, segment_seconds)
+        asyncio.run(run_stream(path, segment_seconds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--segment-seconds", type=int, default=600)
+    args = parser.parse_args()
+    main(args.minutes, args.segment_seconds)
@@ -0,0 +1,113 @@
+"""Прямая загрузка записи в S3 по presigned ссылкам на части.
+
+Проверяет весь путь без участия API в передаче байтов: составная загрузка,
+параллельные PUT частей по ссылкам `upload_part`, сверка частей через
+`list_parts`, завершение и определение длительности ffprobe по presigned ссылке.
+Запись — синтетический WAV (16 кГц, моно) заданного размера.
+
+Запуск из каталога `dio-meetings` против локального аналога S3, например moto:
+    moto_server -p 5000 &
+    STORAGE_ENDPOINT_URL=http://localhost:5000 STORAGE_FORCE_PATH_STYLE=true \\
+        python -m benchmarks.direct_upload --size-mb 256 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import math
+import tempfile
+import time
+import wave
+from pathlib import Path
+from uuid import uuid4
+
+import aiohttp
+from botocore.exceptions import ClientError
+
+from src import s3_utils
+from src.services.uploads import choose_part_size
+from src.utils.media import get_media_duration
+
+SAMPLE_RATE = 16_000
+BYTES_IN_MB = 1024 * 1024
+
+
+def write_wav(path: Path, size_mb: int) -> None:
+    frames = size_mb * BYTES_IN_MB // 2
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(SAMPLE_RATE)
+        block = b"\x00\x01" * SAMPLE_RATE
+        for _ in range(frames // SAMPLE_RATE):
+            file.writeframes(block)
+
+
+async def ensure_bucket() -> None:
+    async with s3_utils.get_client() as client:
+        try:
+            await client.head_bucket(Bucket=s3_utils.BUCKET_NAME)
+        except ClientError:
+            await client.create_bucket(Bucket=s3_utils.BUCKET_NAME)
+
+
+async def put_parts(
+        path: Path, urls: dict[int, str], part_size: int, concurrency: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def put_part(http: aiohttp.ClientSession, part_number: int, url: str) -> None:
+        async with semaphore:
+            with path.open("rb") as file:
+                file.seek((part_number - 1) * part_size)
+                content = file.read(part_size)
+            async with http.put(url, data=content) as response:
+                response.raise_for_status()
+
+    async with aiohttp.ClientSession() as http:
+        await asyncio.gather(*(
+            put_part(http, part_number, url) for part_number, url in urls.items()
+        ))
+
+
+async def main(size_mb: int, part_size_mb: int, concurrency: int) -> None:
+    await ensure_bucket()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "meeting.wav"
+        write_wav(path, size_mb)
+        size = path.stat().st_size
+        part_size = choose_part_size(size, part_size_mb * BYTES_IN_MB)
+        part_numbers = list(range(1, math.ceil(size / part_size) + 1))
+        key = f"benchmarks/{uuid4()}.wav"
+
+        start = time.perf_counter()
+        upload_id = await s3_utils.create_multipart_upload(key)
+        urls = await s3_utils.create_presigned_upload_part_urls(key, upload_id, part_numbers)
+        await put_parts(path, urls, part_size, concurrency)
+        parts = await s3_utils.list_parts(key, upload_id)
+        if [part["PartNumber"] for part in parts] != part_numbers:
+            raise RuntimeError(f"Storage accepted {len(parts)} of {len(part_numbers)} parts")
+        await s3_utils.complete_multipart_upload(
+            key, upload_id, [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in parts]
+        )
+        uploaded = time.perf_counter() - start
+
+        start = time.perf_counter()
+        url = await s3_utils.create_presigned_url(key, expires_in=15 * 60)
+        duration = await asyncio.to_thread(get_media_duration, url)
+        probed = time.perf_counter() - start
+        await s3_utils.delete(key)
+
+    print(  # noqa: T201
+        f"uploaded {size / BYTES_IN_MB:.0f} MB in {len(part_numbers)} parts: {uploaded:.2f} s "
+        f"({size / BYTES_IN_MB / uploaded:.0f} MB/s); "
+        f"ffprobe over presigned URL: {duration:.0f} s of audio in {probed * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--part-size-mb", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.size_mb, args.part_size_mb, args.concurrency))
@@ -0,0 +1,164 @@
+"""Локальные заменители внешних сервисов для сквозных бенчмарков.
+
+Один aiohttp сервер отвечает за OAuth SberDevices (`/api/v2/oauth`), Salute Speech
+(`/rest/v1/...`) и OpenAI-совместимый чат LLM (`/v1/chat/completions`). Задержки
+задаются `VendorLatency`, объёмы и число запросов доступны по `/_stats`.
+Длительность аудио оценивается по размеру: 32 000 байт в секунду, что верно и для
+PCM 16 кГц, и для MP3 фрагментов 256 кбит/с, которые отправляет конвейер.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass
+from uuid import uuid4
+
+from aiohttp import web
+
+AUDIO_BYTES_PER_SECOND = 32_000
+PHRASE_MS = 5_000
+WORDS = ("бюджет", "проект", "срок", "задача", "клиент", "релиз", "команда", "план")
+
+
+@dataclass(frozen=True, slots=True)
+class VendorLatency:
+    """Задержки заменителей в секундах"""
+
+    oauth: float = 0.05
+    upload_per_mb: float = 0.02
+    request: float = 0.05
+    # Время распознавания минуты аудио после создания задачи
+    recognition_per_minute: float = 1.0
+    llm: float = 1.0
+    llm_per_1k_tokens: float = 0.5
+
+
+class FakeVendors:
+    def __init__(self, latency: VendorLatency) -> None:
+        self.latency = latency
+        self.stats: Counter[str] = Counter()
+        self._files: dict[str, int] = {}
+        self._tasks: dict[str, dict] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_post("/api/v2/oauth", self.oauth)
+        app.router.add_post("/rest/v1/data:upload", self.upload)
+        app.router.add_post("/rest/v1/speech:async_recognize", self.create_task)
+        app.router.add_get("/rest/v1/task:get", self.get_task)
+        app.router.add_get("/rest/v1/data:download", self.download)
+        app.router.add_post("/v1/chat/completions", self.chat_completion)
+        app.router.add_get("/_stats", self.get_stats)
+        return app
+
+    async def oauth(self, _: web.Request) -> web.Response:
+        self.stats["oauth_requests"] += 1
+        await asyncio.sleep(self.latency.oauth)
+        return web.json_response({
+            "access_token": uuid4().hex, "expires_at": int(time.time() + 1800) * 1000
+        })
+
+    async def upload(self, request: web.Request) -> web.Response:
+        content = await request.read()
+        self.stats["salute_uploads"] += 1
+        self.stats["salute_bytes_received"] += len(content)
+        await asyncio.sleep(
+            self.latency.request + self.latency.upload_per_mb * len(content) / 2**20
+        )
+        file_id = str(uuid4())
+        self._files[file_id] = len(content) * 1000 // AUDIO_BYTES_PER_SECOND
+        return web.json_response({"status": 200, "result": {"request_file_id": file_id}})
+
+    async def create_task(self, request: web.Request) -> web.Response:
+        payload = json.loads(await request.read())
+        duration_ms = self._files[payload["request_file_id"]]
+        await asyncio.sleep(self.latency.request)
+        task_id = str(uuid4())
+        self._tasks[task_id] = {
+            "duration_ms": duration_ms,
+            "ready_at": time.monotonic()
+            + self.latency.recognition_per_minute * duration_ms / 60_000,
+        }
+        return web.json_response({"status": 200, "result": {"id": task_id, "status": "NEW"}})
+
+    async def get_task(self, request: web.Request) -> web.Response:
+        self.stats["salute_polls"] += 1
+        await asyncio.sleep(self.latency.request)
+        task_id = request.query["id"]
+        if time.monotonic() < self._tasks[task_id]["ready_at"]:
+            return web.json_response({"result": {"id": task_id, "status": "RUNNING"}})
+        return web.json_response({
+            "result": {"id": task_id, "status": "DONE", "response_file_id": task_id}
+        })
+
+    async def download(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency.request)
+        duration_ms = self._tasks.pop(request.query["response_file_id"])["duration_ms"]
+        results = [
+            {
+                "results": [{
+                    "normalized_text": " ".join(
+                        WORDS[(start_ms // PHRASE_MS + i) % len(WORDS)] for i in range(12)
+                    ),
+                    "start": f"{start_ms / 1000}s",
+                    "end": f"{min(start_ms + PHRASE_MS, duration_ms) / 1000}s",
+                }],
+                "speaker_info": {"speaker_id": start_ms // PHRASE_MS % 3},
+                "emotions_result": {"positive": 0.1, "neutral": 0.8, "negative": 0.1},
+            }
+            for start_ms in range(0, duration_ms, PHRASE_MS)
+        ]
+        body = json.dumps(results, ensure_ascii=False)
+        self.stats["salute_bytes_sent"] += len(body.encode())
+        return web.Response(text=body, content_type="application/octet-stream")
+
+    async def chat_completion(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        prompt_chars = sum(len(message["content"]) for message in payload["messages"])
+        # Грубая оценка токенизатора для русского текста
+        prompt_tokens = prompt_chars // 3
+        content = "## Протокол\n\n" + "\n".join(
+            f"- Решение {i}: {' '.join(WORDS)}" for i in range(1, 41)
+        )
+        completion_tokens = len(content) // 3
+        self.stats["llm_requests"] += 1
+        self.stats["llm_prompt_tokens"] += prompt_tokens
+        await asyncio.sleep(
+            self.latency.llm
+            + self.latency.llm_per_1k_tokens * (prompt_tokens + completion_tokens) / 1000
+        )
+        return web.json_response({
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    async def get_stats(self, _: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+
+async def start_fake_vendors(latency: VendorLatency) -> tuple[web.AppRunner, FakeVendors, str]:
+    """Запускает заменители на свободном порту localhost.
+
+    :returns: Раннер для остановки, сами заменители и базовый URL сервера.
+    """
+
+    vendors = FakeVendors(latency)
+    runner = web.AppRunner(vendors.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, vendors, f"http://{host}:{port}"
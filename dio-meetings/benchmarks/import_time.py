@@ -0,0 +1,130 @@
+"""Бенчмарк холодного старта: время импорта `src.app`.
+
+Каждый прогон — отдельный процесс `python -X importtime -c "import src.app"`.
+Первый прогон прогревает кэш байткода и в замеры не входит. Отчёт: медиана и
+максимум суммарного времени импорта, время процесса целиком и самые дорогие пакеты
+по собственному времени импорта их модулей.
+
+Бенчмарк завершается с ошибкой, если медиана превышает бюджет `--budget-ms` или
+при старте загружены тяжёлые зависимости, которые должны импортироваться лениво —
+при первой обработке записи или первом запросе к LLM, S3 или векторному индексу.
+Приложение импортируется с выключенной трассировкой (`TRACING_ENABLED=false`).
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.import_time --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess  # noqa: S404
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+# Пакеты, которых не должно быть в `sys.modules` после импорта приложения. API
+# `opentelemetry` нужен декоратору `traced`, а SDK, экспортёр и инструментирование
+# загружаются только при `TRACING_ENABLED=true`
+LAZY_PACKAGES = (
+    "aiobotocore",
+    "botocore",
+    "chromadb",
+    "ffmpeg",
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "openai",
+    "opentelemetry.exporter",
+    "opentelemetry.instrumentation",
+    "opentelemetry.sdk",
+    "pydub",
+    "sentence_transformers",
+)
+# Строка отчёта `-X importtime`: `import time: self [us] | cumulative | imported package`
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+CODE = "import sys, src.app; print('\\n'.join(sys.modules))"
+
+
+@dataclass(slots=True)
+class Run:
+    wall_ms: float
+    import_ms: float
+    package_ms: Counter[str]
+    modules: set[str]
+
+
+def measure() -> Run:
+    start = time.perf_counter()
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", CODE],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, "TRACING_ENABLED": "false"},
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if process.returncode:
+        raise RuntimeError(f"Import of `src.app` failed:\n{process.stderr[-2000:]}")
+
+    import_us = 0
+    package_us: Counter[str] = Counter()
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        package_us[module.split(".")[0]] += int(self_us)
+        # Модули верхнего уровня включают время всех вложенных импортов
+        if not indent:
+            import_us += int(cumulative_us)
+    return Run(
+        wall_ms=wall_ms,
+        import_ms=import_us / 1000,
+        package_ms=Counter({package: us / 1000 for package, us in package_us.items()}),
+        modules=set(process.stdout.split()),
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    measure()
+    runs = [measure() for _ in range(args.runs)]
+    import_ms = statistics.median(run.import_ms for run in runs)
+    print(  # noqa: T201
+        f"import src.app: median {import_ms:.0f} ms, "
+        f"max {max(run.import_ms for run in runs):.0f} ms, "
+        f"process median {statistics.median(run.wall_ms for run in runs):.0f} ms, "
+        f"{len(runs[-1].modules)} modules"
+    )
+    print(f"top {args.top} packages by own import time (last run):")  # noqa: T201
+    for package, ms in runs[-1].package_ms.most_common(args.top):
+        print(f"    {package:<32} {ms:>7.1f} ms")  # noqa: T201
+
+    errors = []
+    eager = sorted(
+        package for package in LAZY_PACKAGES
+        if any(
+            module == package or module.startswith(f"{package}.")
+            for module in runs[-1].modules
+        )
+    )
+    if eager:
+        errors.append(f"imported at startup, must be lazy: {', '.join(eager)}")
+    if import_ms > args.budget_ms:
+        errors.append(f"median import time {import_ms:.0f} ms exceeds {args.budget_ms:.0f} ms")
+    if errors:
+        raise SystemExit("FAIL: " + "; ".join(errors))
+    print(f"OK: within {args.budget_ms:.0f} ms budget")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=15)
+    main(parser.parse_args())
@@ -0,0 +1,176 @@
+"""Бенчмарк сериализации больших ответов API и разбора результатов распознавания.
+
+Метрика — процессорное время (`time.process_time`) на мегабайт JSON: на больших
+расшифровках и протоколах время ответа определяется CPU, а не вводом-выводом.
+
+Ответы (расшифровка и протокол заданного размера):
+    json      — прежний путь FastAPI: `model_dump(mode="json")` и `JSONResponse`;
+    orjson    — то же с `ORJSONResponse`, классом ответа приложения по умолчанию;
+    pydantic  — `model_response`, однократная сериализация pydantic-core;
+    cached    — `json_response` с готовым телом из кэша чтения;
+    stream    — `stream_json_object` для `/meetings/{meeting_id}/transcript`.
+
+Результат Salute Speech (массив фраз):
+    json+pydantic — прежний путь: `response.text()`, `json.loads` и схема pydantic
+                    на каждую фразу (поверх того же разбора полей ответа);
+    orjson+slots  — текущий: `orjson.loads` из байтов и dataclass со слотами.
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.json_serialization --mb 8 --repeat 10
+"""
+
+from typing import Any
+
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from uuid import uuid4
+
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.integrations.salute_speech import RecognizedResult
+from src.schemas import Minutes, Transcript, TranscriptInfo
+from src.services.asr import RecognizedPhrase
+from src.utils.responses import json_response, model_response, stream_json_object
+
+WORDS = ["протокол", "решение", "бюджет", "срок", "задача", "отдел", "отчёт", "план", '"итог"']
+EMOTIONS = ("positive", "neutral", "negative")
+
+
+def make_text(rng: random.Random, size: int) -> str:
+    """Текст из слов словаря и переводов строк размером около `size` байт в UTF-8"""
+
+    words = []
+    total = 0
+    while total < size:
+        word = rng.choice(WORDS)
+        words.append(word if rng.random() > 0.05 else word + "\n")  # noqa: PLR2004
+        total += len(word.encode()) + 1
+    return " ".join(words)
+
+
+def make_salute_result(rng: random.Random, size: int) -> bytes:
+    """Ответ `data:download` Salute Speech размером около `size` байт"""
+
+    results: list[dict[str, Any]] = []
+    total = 0
+    offset = 0.0
+    while total < size:
+        text = " ".join(rng.choices(WORDS, k=rng.randint(3, 30)))
+        duration = rng.uniform(0.5, 10.0)
+        emotions = [rng.random() for _ in EMOTIONS]
+        response = {
+            "results": [{
+                "text": text,
+                "normalized_text": text,
+                "start": f"{offset:.3f}s",
+                "end": f"{offset + duration:.3f}s",
+            }],
+            "eou": True,
+            "emotions_result": dict(zip(EMOTIONS, emotions, strict=True)),
+            "processed_audio_start": f"{offset:.3f}s",
+            "processed_audio_end": f"{offset + duration:.3f}s",
+            "speaker_info": {"speaker_id": rng.randint(0, 5), "main_speaker_confidence": 1.0},
+            "channel": 0,
+        }
+        results.append(response)
+        total += len(orjson.dumps(response))
+        offset += duration
+    return json.dumps(results, ensure_ascii=False).encode()
+
+
+def parse_legacy(raw: bytes) -> list[RecognizedPhrase]:
+    phrases = []
+    for response in json.loads(raw.decode()):
+        result = RecognizedResult.from_response(response)
+        phrases.append(RecognizedPhrase(
+            text=result.text,
+            speaker=result.speaker,
+            emotion=result.emotion,
+            start_ms=result.start_ms,
+            end_ms=result.end_ms,
+        ))
+    return phrases
+
+
+def parse_current(raw: bytes) -> list[RecognizedResult]:
+    return [RecognizedResult.from_response(response) for response in orjson.loads(raw)]
+
+
+def cpu_ms_per_mb(run: Callable[[], Any], size: int, repeat: int) -> float:
+    run()
+    start = time.process_time()
+    for _ in range(repeat):
+        run()
+    elapsed = time.process_time() - start
+    return elapsed * 1000 / repeat / (size / 1024 / 1024)
+
+
+def report(title: str, size: int, cases: dict[str, Callable[[], Any]], repeat: int) -> None:
+    print(f"{title} ({size / 1024 / 1024:.1f} MB):")  # noqa: T201
+    baseline = None
+    for name, run in cases.items():
+        ms = cpu_ms_per_mb(run, size, repeat)
+        baseline = baseline or ms
+        print(  # noqa: T201
+            f"    {name:<14} {ms:8.2f} ms CPU/MB, {1000 / ms:7.0f} MB/s, x{baseline / ms:.1f}"
+        )
+
+
+def response_cases(model: Transcript | Minutes) -> tuple[int, dict[str, Callable[[], Any]]]:
+    body = model_response(model).body
+    return len(body), {
+        "json": lambda: JSONResponse(model.model_dump(mode="json")).body,
+        "orjson": lambda: ORJSONResponse(model.model_dump(mode="json")).body,
+        "pydantic": lambda: model_response(model).body,
+        "cached": lambda: json_response(body).body,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)  # noqa: S311
+    size = int(args.mb * 1024 * 1024)
+
+    full_text = make_text(rng, size)
+    transcript = Transcript(
+        meeting_id=uuid4(), full_text=full_text, words_count=len(full_text.split())
+    )
+    body_size, cases = response_cases(transcript)
+    info = TranscriptInfo(meeting_id=transcript.meeting_id, words_count=transcript.words_count)
+    chunks = [full_text[i:i + 64 * 1024] for i in range(0, len(full_text), 64 * 1024)]
+    cases["stream"] = lambda: b"".join(stream_json_object(info, "full_text", chunks))
+    report("transcript response", body_size, cases, args.repeat)
+
+    minutes = Minutes(meeting_id=uuid4(), title="Встреча", md_text=make_text(rng, size // 8))
+    report("minutes response", *response_cases(minutes), args.repeat)
+
+    raw = make_salute_result(rng, size)
+    legacy = [
+        (phrase.text, phrase.speaker, phrase.emotion, phrase.start_ms, phrase.end_ms)
+        for phrase in parse_legacy(raw)
+    ]
+    current = [
+        (result.text, result.speaker, result.emotion, result.start_ms, result.end_ms)
+        for result in parse_current(raw)
+    ]
+    if legacy != current:
+        raise SystemExit("FAIL: salute result parsing differs from the legacy path")
+    report(
+        "salute result parsing",
+        len(raw),
+        {"json+pydantic": lambda: parse_legacy(raw), "orjson+slots": lambda: parse_current(raw)},
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mb", type=float, default=8, help="Размер расшифровки и результата")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
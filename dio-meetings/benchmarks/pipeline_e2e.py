@@ -0,0 +1,284 @@
+"""Сквозной бенчмарк обработки задачи `TaskProcessor.process`.
+
+Внешние сервисы заменены локальными: S3 — moto (`ThreadedMotoServer`), OAuth
+SberDevices, Salute Speech и LLM — aiohttp заменители из `benchmarks.fakes` с
+настраиваемыми задержками. База — SQLite во временной директории, векторный индекс —
+Chroma в памяти. Запись — синусоида (аудио MP3) или тестовая таблица со звуком
+(видео MP4), сгенерированная ffmpeg.
+
+Каждый сценарий выполняется в отдельном процессе, чтобы пиковое потребление памяти
+относилось только к нему. Отчёт: время обработки, пиковый RSS процесса и дочерних
+процессов ffmpeg, объёмы переданных данных, разбивка по этапам из метрик
+`dio_task_stage_seconds`. Задача передаётся в `process` напрямую: Redis в обработке
+не участвует, поэтому брокер не поднимается.
+
+Запуск из каталога `dio-meetings` (нужны `moto[server]` и ffmpeg):
+    python -m benchmarks.pipeline_e2e --minutes 10 60 240 --media audio video \\
+        --json results.json
+    PIPELINE_STREAMING=true python -m benchmarks.pipeline_e2e --minutes 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess  # noqa: S404
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import UTC, datetime
+from pathlib import Path
+from uuid import uuid4
+
+import chromadb
+from moto.server import ThreadedMotoServer
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src import s3_utils
+from src.database.base import Base
+from src.database.repositories import (
+    MeetingRepository,
+    MinutesRepository,
+    TaskRepository,
+    TranscriptRepository,
+    TranscriptSegmentRepository,
+)
+from src.database.unit_of_work import UnitOfWork
+from src.metrics import TASK_STAGE_SECONDS
+from src.schemas import Meeting, Task
+from src.services.asr import get_asr_engine
+from src.services.minutes_export import MinutesExporter
+from src.services.search import SqliteSearchIndex
+from src.services.task_processing import TaskProcessor
+from src.services.vector_index import VectorIndex, create_embedder
+from src.services.workspace import get_disk_quota
+from src.utils.media import get_media_duration
+
+from .audio_pipeline import read_chunks
+from .direct_upload import ensure_bucket
+from .fakes import VendorLatency, start_fake_vendors
+
+BYTES_IN_MB = 1024 * 1024
+KB_IN_MB = 1024
+
+
+def generate_media(path: Path, media_type: str, minutes: int) -> None:
+    seconds = minutes * 60
+    audio = ["-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}"]
+    if media_type == "audio":
+        args = [*audio, "-ac", "1", "-b:a", "64k"]
+    else:
+        args = [
+            "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=5:duration={seconds}",
+            *audio,
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-b:a", "64k",
+            "-shortest",
+        ]
+    subprocess.run(  # noqa: S603
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args, str(path)],  # noqa: S607
+        check=True,
+    )
+
+
+def s3_bytes(direction: str) -> float:
+    return REGISTRY.get_sample_value("dio_s3_bytes_total", {"direction": direction}) or 0.0
+
+
+def stage_breakdown() -> dict[str, dict[str, float]]:
+    stages: dict[str, dict[str, float]] = {}
+    for sample in TASK_STAGE_SECONDS.collect()[0].samples:
+        stage = stages.setdefault(sample.labels["stage"], {})
+        if sample.name.endswith("_sum"):
+            stage["seconds"] = round(sample.value, 3)
+        elif sample.name.endswith("_count"):
+            stage["count"] = int(sample.value)
+    return stages
+
+
+async def run_task(media_path: Path, media_type: str) -> dict:
+    """Обрабатывает одну запись в текущем процессе и возвращает замеры"""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp_dir) / "bench.sqlite3"}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await SqliteSearchIndex.create_schema(connection)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        collection = chromadb.EphemeralClient().get_or_create_collection(
+            name="benchmarks", metadata={"hnsw:space": "cosine"}
+        )
+
+        await ensure_bucket()
+        s3_key = f"benchmarks/{uuid4()}{media_path.suffix}"
+        await s3_utils.upload_multipart(read_chunks(media_path), key=s3_key)
+        media_size = media_path.stat().st_size  # noqa: ASYNC240
+        meeting = Meeting(
+            original_filename=media_path.name,
+            media_type=media_type,
+            s3_key=s3_key,
+            format=media_path.suffix[1:],
+            size_mb=round(media_size / BYTES_IN_MB, 2),
+            duration=get_media_duration(media_path),
+        )
+        task = Task(meeting_id=meeting.id)
+        async with session_maker() as session:
+            await MeetingRepository(session).create(meeting)
+            await TaskRepository(session).create(task)
+        uploaded_before = s3_bytes("upload")
+
+        vector_index = VectorIndex(collection, create_embedder())
+        async with session_maker() as session:
+            processor = TaskProcessor(
+                meeting_repo=MeetingRepository(session),
+                task_repo=TaskRepository(session),
+                transcript_repo=TranscriptRepository(session),
+                segment_repo=TranscriptSegmentRepository(session),
+                minutes_repo=MinutesRepository(session),
+                search_index=SqliteSearchIndex(session),
+                exporter=MinutesExporter(),
+                disk_quota=get_disk_quota(),
+                asr=get_asr_engine(),
+                uow=UnitOfWork(session),
+                vector_index_factory=lambda: vector_index,
+            )
+            start = time.perf_counter()
+            await processor.process(task.id)
+            wall_seconds = time.perf_counter() - start
+            processed = await TaskRepository(session).read(task.id)
+        await s3_utils.delete(s3_key)
+        await engine.dispose()
+
+    return {
+        "status": processed.status,
+        "error_message": processed.error_message,
+        "media_mb": meeting.size_mb,
+        "wall_seconds": round(wall_seconds, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / KB_IN_MB),
+        "peak_children_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / KB_IN_MB
+        ),
+        "s3_download_mb": round(s3_bytes("download") / BYTES_IN_MB, 1),
+        "s3_upload_mb": round((s3_bytes("upload") - uploaded_before) / BYTES_IN_MB, 1),
+        "stages": stage_breakdown(),
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def print_result(result: dict) -> None:
+    vendors = result["vendors"]
+    print(  # noqa: T201
+        f"{result["media_type"]} {result["minutes"]} min: {result["status"]}, "
+        f"{result["wall_seconds"]:.1f} s, peak RSS {result["peak_rss_mb"]} MB "
+        f"(ffmpeg {result["peak_children_rss_mb"]} MB), "
+        f"S3 down {result["s3_download_mb"]} MB / up {result["s3_upload_mb"]} MB, "
+        f"ASR up {vendors.get("salute_bytes_received", 0) / BYTES_IN_MB:.1f} MB "
+        f"in {vendors.get("salute_uploads", 0)} requests, "
+        f"LLM {vendors.get("llm_requests", 0)} requests / "
+        f"{vendors.get("llm_prompt_tokens", 0)} prompt tokens"
+    )
+    for stage, values in sorted(result["stages"].items()):
+        print(  # noqa: T201
+            f"    {stage:<18} {values.get("count", 0):>5} x  {values.get("seconds", 0):>9.2f} s"
+        )
+
+
+async def run_scenario(path: Path, media_type: str, env: dict[str, str]) -> dict:
+    """Обрабатывает запись в отдельном процессе, см. `run_task`"""
+
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.pipeline_e2e",
+        "--run", str(path), "--run-media-type", media_type,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode:
+        raise RuntimeError(f"Scenario `{path.name}` crashed with code {process.returncode}")
+    return json.loads(stdout.decode().strip().splitlines()[-1])
+
+
+async def main(args: argparse.Namespace) -> None:
+    latency = VendorLatency(
+        recognition_per_minute=args.asr_seconds_per_minute,
+        llm=args.llm_latency,
+        llm_per_1k_tokens=args.llm_seconds_per_1k_tokens,
+    )
+    moto_port = free_port()
+    moto = ThreadedMotoServer(ip_address="127.0.0.1", port=moto_port, verbose=False)
+    moto.start()
+    runner, vendors, vendors_url = await start_fake_vendors(latency)
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "s3",
+        "STORAGE_ENDPOINT_URL": f"http://127.0.0.1:{moto_port}",
+        "STORAGE_FORCE_PATH_STYLE": "true",
+        "STORAGE_REGION": "us-east-1",
+        "STORAGE_BUCKET": "benchmarks",
+        "YANDEX_CLOUD_ACCESS_KEY_ID": "testing",
+        "YANDEX_CLOUD_SECRET_ACCESS_KEY": "testing",
+        "YANDEX_CLOUD_LLM_BASE_URL": f"{vendors_url}/v1",
+        "SBER_DEVICES_OAUTH_URL": f"{vendors_url}/api/v2",
+        "SBER_DEVICES_SPEECH_URL": f"{vendors_url}/rest/v1/",
+        # Квоты запросов и кэш чтения хранятся в Redis, заменители их не требуют
+        "RESILIENCE_RATE_LIMITS": "{}",
+        "CACHE_ENABLED": "false",
+    }
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for media_type in args.media:
+                for minutes in args.minutes:
+                    suffix = ".mp3" if media_type == "audio" else ".mp4"
+                    path = Path(tmp_dir) / f"{media_type}-{minutes}{suffix}"
+                    await asyncio.to_thread(generate_media, path, media_type, minutes)
+                    stats_before = vendors.stats.copy()
+                    result = {
+                        "media_type": media_type,
+                        "minutes": minutes,
+                        "streaming": env.get("PIPELINE_STREAMING", "false"),
+                        **await run_scenario(path, media_type, env),
+                        "vendors": dict(vendors.stats - stats_before),
+                    }
+                    path.unlink()
+                    print_result(result)
+                    results.append(result)
+    finally:
+        await runner.cleanup()
+        moto.stop()
+    if args.json is not None:
+        report = {
+            "created_at": datetime.now(UTC).isoformat(),
+            "latency": asdict(latency),
+            "results": results,
+        }
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--minutes", type=int, nargs="+", default=[10, 60])
+    parser.add_argument("--media", choices=["audio", "video"], nargs="+", default=["audio"])
+    parser.add_argument("--asr-seconds-per-minute", type=float, default=1.0)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--llm-seconds-per-1k-tokens", type=float, default=0.5)
+    parser.add_argument("--json", type=Path, default=None, help="Файл для отчёта")
+    # Внутренний режим: один сценарий в дочернем процессе
+    parser.add_argument("--run", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--run-media-type", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run is not None:
+        result = asyncio.run(run_task(args.run, args.run_media_type))
+        print(json.dumps(result))  # noqa: T201
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,207 @@
+"""Бенчмарк кэша чтения встреч, расшифровок и протоколов.
+
+Приложение с роутерами API поверх SQLite во временной директории и Redis из
+настроек (`REDIS_URL`). Запросы `/meetings/{id}`, `/meetings/{id}/transcript` и
+`/minutes/{id}` идут параллельно к встречам с распределением Ципфа: часть встреч
+читается намного чаще остальных.
+
+Сравниваются режимы: без кэша (база), только Redis и Redis с кэшем в памяти
+процесса. Отчёт: p50/p95 длительности запроса и доли результатов чтения по метрике
+`dio_cache_requests_total`. Отдельно проверяется защита от лавины: после сброса
+записи одновременные запросы должны загрузить её из базы один раз.
+
+Запуск из каталога `dio-meetings` (нужен Redis):
+    python -m benchmarks.read_cache --meetings 200 --requests 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.cache import get_read_cache
+from src.database.base import Base
+from src.database.repositories import (
+    MeetingRepository,
+    MinutesRepository,
+    TranscriptRepository,
+)
+from src.dependencies import get_db
+from src.routers import router
+from src.schemas import Meeting, Minutes, Transcript
+from src.settings import settings
+
+NAMESPACES = ("meeting", "transcript", "minutes")
+RESULTS = ("local", "hit", "miss", "coalesced", "bypass")
+WORDS = ["протокол", "решение", "бюджет", "срок", "задача", "отдел", "отчёт", "план"]
+
+
+def build_app(session_maker: async_sessionmaker[AsyncSession]) -> FastAPI:
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+async def seed(
+        session_maker: async_sessionmaker[AsyncSession], meetings: int, words: int
+) -> list[UUID]:
+    rng = random.Random(0)  # noqa: S311
+    meeting_ids = []
+    async with session_maker() as session:
+        for i in range(meetings):
+            meeting = Meeting(
+                original_filename=f"meeting-{i}.mp3",
+                media_type="audio",
+                s3_key=f"benchmarks/{uuid4()}.mp3",
+                format="mp3",
+                size_mb=10.0,
+                duration=3600.0,
+            )
+            text = " ".join(rng.choices(WORDS, k=words))
+            await MeetingRepository(session).create(meeting)
+            await TranscriptRepository(session).create(
+                Transcript(meeting_id=meeting.id, full_text=text, words_count=words)
+            )
+            await MinutesRepository(session).create(
+                Minutes(meeting_id=meeting.id, title=f"Встреча {i}", md_text=text[:4000])
+            )
+            meeting_ids.append(meeting.id)
+    return meeting_ids
+
+
+def configure(mode: str) -> None:
+    """Переключает кэш: общие экземпляры пересоздаются с пустой памятью процесса"""
+
+    settings.cache.enabled = mode != "database"
+    get_read_cache.cache_clear()
+    for namespace in NAMESPACES:
+        cache = get_read_cache(namespace)
+        if cache is not None and mode == "redis":
+            cache.local = None
+
+
+def cache_results() -> dict[str, float]:
+    return {
+        result: sum(
+            REGISTRY.get_sample_value(
+                "dio_cache_requests_total", {"namespace": namespace, "result": result}
+            ) or 0.0
+            for namespace in NAMESPACES
+        )
+        for result in RESULTS
+    }
+
+
+def urls(meeting_id: UUID) -> list[str]:
+    return [
+        f"/api/v2/meetings/{meeting_id}",
+        f"/api/v2/meetings/{meeting_id}/transcript",
+        f"/api/v2/minutes/{meeting_id}",
+    ]
+
+
+async def run_workload(
+        client: httpx.AsyncClient, meeting_ids: list[UUID], args: argparse.Namespace
+) -> tuple[list[float], float]:
+    """Длительности запросов и общее время прогона"""
+
+    rng = random.Random(args.seed)  # noqa: S311
+    weights = [1 / rank ** args.zipf for rank in range(1, len(meeting_ids) + 1)]
+    requests = [
+        rng.choice(urls(meeting_id))
+        for meeting_id in rng.choices(meeting_ids, weights=weights, k=args.requests)
+    ]
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for url in requests:
+        queue.put_nowait(url)
+    timings = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            url = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(url)
+            response.raise_for_status()
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return timings, time.perf_counter() - start
+
+
+def report(mode: str, timings: list[float], elapsed: float, before: dict[str, float]) -> None:
+    after = cache_results()
+    counts = {result: after[result] - before[result] for result in RESULTS}
+    total = sum(counts.values())
+    shares = ", ".join(
+        f"{result} {count / total:.1%}" for result, count in counts.items() if count
+    ) if total else "cache is off"
+    quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+    print(  # noqa: T201
+        f"{mode:>8}: p50 {quantiles[49] * 1000:6.2f} ms, p95 {quantiles[94] * 1000:6.2f} ms, "
+        f"{len(timings) / elapsed:7.0f} req/s; {shares}"
+    )
+
+
+async def check_stampede(client: httpx.AsyncClient, meeting_id: UUID, concurrency: int) -> None:
+    configure("redis+local")
+    cache = get_read_cache("transcript")
+    await cache.invalidate(meeting_id)
+    before = cache_results()
+    url = f"/api/v2/meetings/{meeting_id}/transcript"
+    responses = await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+    for response in responses:
+        response.raise_for_status()
+    after = cache_results()
+    print(  # noqa: T201
+        f"stampede: {concurrency} concurrent reads after invalidation, "
+        f"{after['miss'] - before['miss']:.0f} database load(s), "
+        f"{after['coalesced'] - before['coalesced']:.0f} coalesced"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp_dir) / 'bench.sqlite3'}")
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        configure("database")
+        meeting_ids = await seed(session_maker, args.meetings, args.words)
+        transport = httpx.ASGITransport(app=build_app(session_maker))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode in ("database", "redis", "redis+local"):
+                configure(mode)
+                before = cache_results()
+                timings, elapsed = await run_workload(client, meeting_ids, args)
+                report(mode, timings, elapsed, before)
+            await check_stampede(client, meeting_ids[0], args.concurrency)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--meetings", type=int, default=200)
+    parser.add_argument("--words", type=int, default=20_000, help="Слов в расшифровке")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Показатель распределения")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args))
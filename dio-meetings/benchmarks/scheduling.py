@@ -0,0 +1,165 @@
+"""Моделирование очереди задач на генерацию протоколов при разных политиках.
+
+Дискретно-событийная модель `SchedulingPolicy` без Redis и вендоров: задачи
+поступают по расписанию смешанной нагрузки, воркеры обрабатывают их за время,
+пропорциональное длительности записи. Нагрузка: один пользователь (`bulk`) в начале
+выгружает пачку трёхчасовых записей, команды весь день присылают планёрки и
+совещания, часть задач команд — высокого приоритета.
+
+Сравниваются FIFO, только «кратчайшая первой» и полная политика с приоритетами,
+справедливыми долями и старением. Отчёт: p50/p95 времени от постановки задачи до
+готового протокола в целом, по классам задач и максимальное ожидание в очереди.
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.scheduling --workers 4 --hours 8 --seed 1
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+from dataclasses import dataclass
+from uuid import uuid4
+
+from src.services.scheduler import QueuedTask, SchedulingPolicy
+
+# Длительность записи в минутах и доля задач по видам встреч команд
+MEETING_KINDS = (
+    ("standup", 15, 0.6),
+    ("meeting", 60, 0.3),
+    ("workshop", 120, 0.1),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    task: QueuedTask
+    kind: str
+
+
+@dataclass(slots=True)
+class Outcome:
+    job: Job
+    started_at: float
+    finished_at: float
+
+    @property
+    def turnaround(self) -> float:
+        return self.finished_at - self.job.task.enqueued_at
+
+    @property
+    def wait(self) -> float:
+        return self.started_at - self.job.task.enqueued_at
+
+
+def make_workload(args: argparse.Namespace) -> list[Job]:
+    rng = random.Random(args.seed)  # noqa: S311
+    jobs = [
+        Job(QueuedTask(uuid4(), "bulk", "normal", 180 * 60, enqueued_at=i), "bulk")
+        for i in range(args.bulk_records)
+    ]
+    for team in range(args.teams):
+        now = 0.0
+        while True:
+            now += rng.expovariate(args.meetings_per_hour / 3600)
+            if now >= args.hours * 3600:
+                break
+            kind, minutes, _ = rng.choices(
+                MEETING_KINDS, weights=[weight for *_, weight in MEETING_KINDS]
+            )[0]
+            priority = "high" if rng.random() < args.high_share else "normal"
+            duration = minutes * 60 * rng.uniform(0.8, 1.2)
+            jobs.append(
+                Job(QueuedTask(uuid4(), f"team-{team}", priority, duration, now), kind)
+            )
+    return sorted(jobs, key=lambda job: job.task.enqueued_at)
+
+
+def simulate(
+        jobs: list[Job], policy: SchedulingPolicy, workers: int, speed: float, overhead: float
+) -> list[Outcome]:
+    """Прогоняет задачи через `workers` воркеров, выбирая задачи политикой"""
+
+    arrivals = iter(jobs)
+    pending = next(arrivals, None)
+    queue: dict[QueuedTask, Job] = {}
+    running: dict[QueuedTask, Outcome] = {}
+    # Кучи завершений: (время, порядковый номер, задача)
+    completions: list[tuple[float, int, QueuedTask]] = []
+    outcomes: list[Outcome] = []
+    now = 0.0
+    serial = 0
+    while pending is not None or queue or running:
+        next_arrival = pending.task.enqueued_at if pending is not None else float("inf")
+        next_completion = completions[0][0] if completions else float("inf")
+        now = min(next_arrival, next_completion)
+        if next_completion <= next_arrival:
+            _, _, task = heapq.heappop(completions)
+            outcomes.append(running.pop(task))
+        else:
+            queue[pending.task] = pending
+            pending = next(arrivals, None)
+        while queue and len(running) < workers:
+            task = policy.pick(queue, running, now)
+            job = queue.pop(task)
+            finished_at = now + overhead + task.duration * speed
+            running[task] = Outcome(job, now, finished_at)
+            heapq.heappush(completions, (finished_at, serial, task))
+            serial += 1
+    return outcomes
+
+
+def percentile(values: list[float], q: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def report(name: str, outcomes: list[Outcome]) -> None:
+    print(f"{name}:")  # noqa: T201
+    groups: dict[str, list[Outcome]] = {"all": outcomes}
+    for outcome in outcomes:
+        groups.setdefault(outcome.job.kind, []).append(outcome)
+        groups.setdefault(f"priority={outcome.job.task.priority}", []).append(outcome)
+    for group, items in groups.items():
+        minutes = [outcome.turnaround / 60 for outcome in items]
+        print(  # noqa: T201
+            f"    {group:<16} {len(items):>4} tasks  "
+            f"p50 {percentile(minutes, 50):>7.1f} min  p95 {percentile(minutes, 95):>7.1f} min  "
+            f"max wait {max(outcome.wait for outcome in items) / 60:>7.1f} min"
+        )
+
+
+def main(args: argparse.Namespace) -> None:
+    jobs = make_workload(args)
+    policies = {
+        "FIFO": SchedulingPolicy(
+            priority_offsets={}, sjf_weight=0, fair_share_weight=0, aging_rate=0
+        ),
+        "shortest first": SchedulingPolicy(
+            priority_offsets={}, fair_share_weight=0, aging_rate=0
+        ),
+        "priority + fair share + aging": SchedulingPolicy(),
+    }
+    print(  # noqa: T201
+        f"{len(jobs)} tasks, {args.workers} workers, "
+        f"processing {args.speed:.2f} s per second of audio + {args.overhead:.0f} s"
+    )
+    for name, policy in policies.items():
+        report(name, simulate(jobs, policy, args.workers, args.speed, args.overhead))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--teams", type=int, default=6)
+    parser.add_argument("--meetings-per-hour", type=float, default=2, help="На команду")
+    parser.add_argument("--bulk-records", type=int, default=20)
+    parser.add_argument("--high-share", type=float, default=0.1)
+    parser.add_argument("--speed", type=float, default=0.25, help="Секунд на секунду аудио")
+    parser.add_argument("--overhead", type=float, default=60, help="Секунд на задачу")
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
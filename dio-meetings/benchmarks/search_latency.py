@@ -0,0 +1,125 @@
+"""Бенчмарк задержки полнотекстового поиска на синтетическом корпусе встреч.
+
+Корпус: `--meetings` встреч по `--segments` фраз, слова выбираются из словаря с
+распределением Ципфа, как в живой речи. Индексирование идёт пачками через
+`SearchIndex.index_segments`, затем замеряются случайные запросы из 1-3 слов.
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.search_latency --meetings 100000 --segments 10
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.schemas import TranscriptSegment
+from src.services.search import SqliteSearchIndex
+
+STEMS = [
+    "бюджет", "проект", "решени", "задач", "срок", "отчёт", "клиент", "продаж", "договор",
+    "релиз", "команд", "план", "рынок", "поставщик", "качеств", "стратеги", "найм", "оплат",
+    "маркетинг", "разработк", "инфраструктур", "безопасност", "аналитик", "презентаци",
+]
+ENDINGS = ["", "а", "у", "ом", "е", "ы", "ов", "ам", "ами", "ах", "и", "ия", "ию"]
+BATCH_SIZE = 5_000
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list[str]:
+    words = {f"{rng.choice(STEMS)}{rng.choice(ENDINGS)}" for _ in range(size * 4)}
+    words.update(f"слово{i}" for i in range(size))
+    return list(words)[:size]
+
+
+def zipf_weights(size: int) -> list[float]:
+    return [1 / (rank + 1) for rank in range(size)]
+
+
+async def index_corpus(
+        session_maker: async_sessionmaker,
+        rng: random.Random,
+        vocabulary: list[str],
+        meetings: int,
+        segments: int,
+) -> None:
+    weights = zipf_weights(len(vocabulary))
+    start = time.perf_counter()
+    async with session_maker() as session:
+        index = SqliteSearchIndex(session)
+        batch: list[TranscriptSegment] = []
+        for _ in range(meetings):
+            meeting_id = uuid4()
+            for number in range(segments):
+                text = " ".join(rng.choices(vocabulary, weights, k=rng.randint(6, 30)))
+                batch.append(TranscriptSegment(
+                    meeting_id=meeting_id,
+                    chunk=0,
+                    start_ms=number * 5_000,
+                    end_ms=(number + 1) * 5_000,
+                    text=text,
+                ))
+            if len(batch) >= BATCH_SIZE:
+                await index.index_segments(batch)
+                await session.commit()
+                batch.clear()
+        await index.index_segments(batch)
+        await session.commit()
+    elapsed = time.perf_counter() - start
+    documents = meetings * segments
+    print(  # noqa: T201
+        f"indexed {documents} segments in {elapsed:.1f} s ({documents / elapsed:.0f} docs/s)"
+    )
+
+
+async def run_queries(
+        session_maker: async_sessionmaker,
+        rng: random.Random,
+        vocabulary: list[str],
+        queries: int,
+) -> None:
+    weights = zipf_weights(len(vocabulary))
+    timings = []
+    hits_total = 0
+    async with session_maker() as session:
+        index = SqliteSearchIndex(session)
+        for _ in range(queries):
+            query = " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 3)))
+            start = time.perf_counter()
+            hits = await index.search(query, limit=20)
+            timings.append(time.perf_counter() - start)
+            hits_total += len(hits)
+    quantiles = statistics.quantiles(timings, n=100)
+    print(  # noqa: T201
+        f"{queries} queries: p50 {quantiles[49] * 1000:.2f} ms, "
+        f"p95 {quantiles[94] * 1000:.2f} ms, p99 {quantiles[98] * 1000:.2f} ms, "
+        f"avg hits {hits_total / queries:.1f}"
+    )
+
+
+async def main(meetings: int, segments: int, queries: int, seed: int) -> None:
+    rng = random.Random(seed)  # noqa: S311
+    vocabulary = build_vocabulary(20_000, rng)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp_dir) / 'search.sqlite3'}")
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as connection:
+            await SqliteSearchIndex.create_schema(connection)
+        await index_corpus(session_maker, rng, vocabulary, meetings, segments)
+        await run_queries(session_maker, rng, vocabulary, queries)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meetings", type=int, default=100_000)
+    parser.add_argument("--segments", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.meetings, args.segments, args.queries, args.seed))
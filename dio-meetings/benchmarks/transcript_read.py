@@ -0,0 +1,105 @@
+"""Бенчмарк чтения расшифровки `/meetings/{meeting_id}/transcript`.
+
+Сравнивает прежний путь (ORM объект -> `model_validate` -> повторная валидация и
+сериализация `response_model`) с текущим (выборка колонок -> `model_construct` ->
+однократная сериализация pydantic-core).
+
+Кэш чтения выключается переменной окружения, чтобы сравнивались пути чтения из базы.
+
+Запуск из каталога `dio-meetings`:
+    CACHE_ENABLED=false python -m benchmarks.transcript_read --words 200000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import undefer
+
+from src.database import models
+from src.database.base import Base
+from src.database.repositories import TranscriptRepository
+from src.dependencies import get_db
+from src.routers import router
+from src.schemas import Transcript
+
+WORDS = ["протокол", "решение", "бюджет", "срок", "задача", "отдел", "отчёт", "план"]
+
+
+def build_app(session_maker: async_sessionmaker[AsyncSession]) -> FastAPI:
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/legacy/{meeting_id}/transcript", response_model=Transcript)
+    async def legacy_transcript(
+            meeting_id: UUID, session: AsyncSession = Depends(get_db)
+    ) -> Transcript:
+        stmt = (
+            select(models.Transcript)
+            .options(undefer(models.Transcript.full_text))
+            .where(models.Transcript.meeting_id == meeting_id)
+        )
+        model = (await session.execute(stmt)).scalar_one()
+        return Transcript.model_validate(model)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, url: str, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main(words: int, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp_dir) / 'bench.sqlite3'}")
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        meeting_id = uuid4()
+        full_text = " ".join(random.choices(WORDS, k=words))  # noqa: S311
+        async with session_maker() as session:
+            await TranscriptRepository(session).create(
+                Transcript(meeting_id=meeting_id, full_text=full_text, words_count=words)
+            )
+        transport = httpx.ASGITransport(app=build_app(session_maker))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            urls = {
+                "legacy": f"/legacy/{meeting_id}/transcript",
+                "lean": f"/api/v2/meetings/{meeting_id}/transcript",
+            }
+            for name, url in urls.items():
+                await measure(client, url, repeat=3)  # прогрев
+                timings = await measure(client, url, repeat)
+                print(  # noqa: T201
+                    f"{name:>6}: median {statistics.median(timings) * 1000:.2f} ms, "
+                    f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:.2f} ms"
+                )
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.words, args.repeat))
@@ -0,0 +1,83 @@
+"""Бенчмарк ANN индекса (Chroma HNSW) против полного перебора.
+
+На `--passages` кластеризованных векторах размерности `--dimension` сравнивает
+задержку запроса к индексу с точным перебором (матричное умножение numpy) и
+считает recall@k ответов индекса относительно точного результата.
+
+Запуск из каталога `dio-meetings`:
+    python -m benchmarks.vector_recall --passages 1000000 --queries 200 --k 10
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+
+def generate_vectors(
+        rng: np.random.Generator, count: int, dimension: int, clusters: int
+) -> np.ndarray:
+    """Нормированные векторы вокруг `clusters` центров, как у эмбеддингов тем встреч"""
+
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((count, dimension), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def build_index(path: str, vectors: np.ndarray) -> chromadb.Collection:
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection("benchmark", metadata={"hnsw:space": "cosine"})
+    batch_size = client.get_max_batch_size()
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), batch_size):
+        batch = vectors[offset:offset + batch_size]
+        collection.add(
+            ids=[str(i) for i in range(offset, offset + len(batch))],
+            embeddings=batch,
+        )
+    elapsed = time.perf_counter() - start
+    print(f"indexed {len(vectors)} passages in {elapsed:.1f} s")  # noqa: T201
+    return collection
+
+
+def percentiles(timings: list[float]) -> str:
+    quantiles = statistics.quantiles(timings, n=100)
+    return f"p50 {quantiles[49] * 1000:.2f} ms, p95 {quantiles[94] * 1000:.2f} ms"
+
+
+def main(passages: int, dimension: int, queries: int, k: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    vectors = generate_vectors(rng, passages, dimension, clusters=max(passages // 1000, 10))
+    query_vectors = generate_vectors(rng, queries, dimension, clusters=queries)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        collection = build_index(tmp_dir, vectors)
+        ann_timings, exact_timings, recalls = [], [], []
+        for query in query_vectors:
+            start = time.perf_counter()
+            exact = set(np.argpartition(-(vectors @ query), k)[:k].tolist())
+            exact_timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[query], n_results=k, include=[])
+            ann_timings.append(time.perf_counter() - start)
+            found = {int(i) for i in result["ids"][0]}
+            recalls.append(len(found & exact) / k)
+    print(f"brute force: {percentiles(exact_timings)}")  # noqa: T201
+    print(f"ANN (HNSW):  {percentiles(ann_timings)}")  # noqa: T201
+    print(f"recall@{k}: {statistics.mean(recalls):.3f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--passages", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    main(args.passages, args.dimension, args.queries, args.k, args.seed)
@@ -6,6 +6,9 @@ from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
+from src.database import models  # noqa: F401 - регистрирует таблицы в метаданных
+from src.database.base import Base
+from src.settings import SQLITE_URL
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -16,11 +19,19 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+config.set_main_option("sqlalchemy.url", SQLITE_URL)
+
+target_metadata = Base.metadata
+
+
+def include_object(object_, name, type_, reflected, compare_to) -> bool:
+    """Полнотекстовый индекс создаётся миграциями вручную, autogenerate его не трогает"""
+
+    return not (
+        type_ == "table" and reflected and compare_to is None
+        and (name == "search_documents" or name.startswith("search_index"))
+    )
+
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -46,6 +57,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
+        render_as_batch=url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -53,7 +66,13 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # SQLite не поддерживает большинство ALTER TABLE, batch режим пересоздаёт таблицы
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
 
     with context.begin_transaction():
         context.run_migrations()
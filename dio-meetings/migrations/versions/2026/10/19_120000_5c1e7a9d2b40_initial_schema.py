@@ -0,0 +1,84 @@
+"""initial schema
+
+Схема, которую создавал `create_all` до перехода на миграции. База, созданная
+таким образом, помечается этой ревизией (`alembic stamp 5c1e7a9d2b40`) и
+доводится до текущей схемы обычным `alembic upgrade head`.
+
+Revision ID: 5c1e7a9d2b40
+Revises:
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d2b40'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Uuid(), server_default=sa.func.gen_random_uuid(), nullable=False),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            'updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'meetings',
+        sa.Column('original_filename', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('participants', sa.String(), nullable=True),
+        sa.Column('media_type', sa.String(), nullable=False),
+        sa.Column('s3_key', sa.String(), nullable=False),
+        sa.Column('format', sa.String(), nullable=False),
+        sa.Column('size_mb', sa.Float(), nullable=False),
+        sa.Column('duration', sa.Float(), nullable=False),
+        *_base_columns(),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('s3_key'),
+    )
+    op.create_table(
+        'tasks',
+        sa.Column('meeting_id', sa.Uuid(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('error_message', sa.String(), nullable=True),
+        *_base_columns(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'transcripts',
+        sa.Column('meeting_id', sa.Uuid(), nullable=False),
+        sa.Column('full_text', sa.TEXT(), nullable=False),
+        sa.Column('words_count', sa.Integer(), nullable=False),
+        *_base_columns(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'minutes',
+        sa.Column('meeting_id', sa.Uuid(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('md_text', sa.TEXT(), nullable=False),
+        *_base_columns(),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('minutes')
+    op.drop_table('transcripts')
+    op.drop_table('tasks')
+    op.drop_table('meetings')
@@ -0,0 +1,210 @@
+"""pipeline schema
+
+Доводит базовую схему до текущей: прокси-запись встречи, приоритет и владелец
+задачи, хеш протокола, сжатые тексты, фразы расшифровок и полнотекстовый индекс.
+
+Базы, созданные прежней редакцией ревизии 5c1e7a9d2b40 (она сразу создавала всю
+схему), тоже обновляются: уже существующие колонки, таблицы и индексы пропускаются.
+
+Revision ID: 8f3b2c6d1a57
+Revises: 5c1e7a9d2b40
+Create Date: 2026-10-19 12:01:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2c6d1a57'
+down_revision: Union[str, Sequence[str], None] = '5c1e7a9d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Тексты, сжимаемые `CompressedText` (src/database/types.py)
+COMPRESSED_COLUMNS = (('transcripts', 'full_text'), ('minutes', 'md_text'))
+
+
+def _new_columns() -> dict[str, list[sa.Column]]:
+    return {
+        'meetings': [sa.Column('proxy_s3_key', sa.String(), nullable=True)],
+        'tasks': [
+            sa.Column('priority', sa.String(), server_default='normal', nullable=False),
+            sa.Column('tenant', sa.String(), nullable=True),
+        ],
+        'minutes': [sa.Column('content_hash', sa.String(), nullable=True)],
+    }
+
+
+def _base_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Uuid(), server_default=sa.func.gen_random_uuid(), nullable=False),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            'updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    ]
+
+
+def _upgrade_sqlite_search(inspector: sa.Inspector) -> None:
+    """Документы в `search_documents`, FTS5 индекс их текста как внешнего содержимого.
+
+    Прежняя редакция хранила документы прямо в FTS5 таблице `search_index`:
+    они переносятся в `search_documents` с теми же rowid, индекс перестраивается.
+    """
+
+    legacy = inspector.has_table('search_index') and not inspector.has_table('search_documents')
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS search_documents (
+            id INTEGER PRIMARY KEY,
+            meeting_id VARCHAR(36) NOT NULL,
+            kind VARCHAR(16) NOT NULL,
+            start_ms INTEGER,
+            content TEXT NOT NULL
+        )
+        """
+    )
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS ix_search_documents_meeting '
+        'ON search_documents (meeting_id, kind)'
+    )
+    if legacy:
+        op.execute(
+            'INSERT INTO search_documents (id, meeting_id, kind, start_ms, content) '
+            'SELECT rowid, meeting_id, kind, start_ms, content FROM search_index'
+        )
+        op.execute('DROP TABLE search_index')
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            content,
+            content = 'search_documents',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS search_documents_insert
+        AFTER INSERT ON search_documents BEGIN
+            INSERT INTO search_index (rowid, content) VALUES (new.id, new.content);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS search_documents_delete
+        AFTER DELETE ON search_documents BEGIN
+            INSERT INTO search_index (search_index, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """
+    )
+    if legacy:
+        op.execute("INSERT INTO search_index (search_index) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, columns in _new_columns().items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for column in columns:
+            if column.name not in existing:
+                op.add_column(table, column)
+    task_indexes = {index['name'] for index in inspector.get_indexes('tasks')}
+    if 'ix_tasks_meeting_id' not in task_indexes:
+        op.create_index('ix_tasks_meeting_id', 'tasks', ['meeting_id'], unique=False)
+
+    # Текст, записанный до сжатия, переводится в несжатый формат хранения:
+    # префикс `RAW_CODEC` (нулевой байт) и UTF-8 (src/utils/compression.py)
+    for table, column in COMPRESSED_COLUMNS:
+        types = {item['name']: item['type'] for item in inspector.get_columns(table)}
+        if bind.dialect.name == 'postgresql':
+            if not isinstance(types[column], sa.LargeBinary):
+                op.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA "
+                    f"USING decode('00', 'hex') || convert_to({column}, 'UTF8')"
+                )
+            continue
+        # SQLite хранит значения независимо от типа колонки, поэтому текст переводится
+        # до смены типа: пересоздание таблицы превратило бы его в BLOB без префикса
+        op.execute(
+            f"UPDATE {table} SET {column} = CAST(X'00' || CAST({column} AS BLOB) AS BLOB) "
+            f"WHERE typeof({column}) = 'text'"
+        )
+        if not isinstance(types[column], sa.LargeBinary):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, type_=sa.LargeBinary(), existing_nullable=False)
+
+    if not inspector.has_table('transcript_segments'):
+        op.create_table(
+            'transcript_segments',
+            sa.Column('meeting_id', sa.Uuid(), nullable=False),
+            sa.Column('chunk', sa.Integer(), nullable=False),
+            sa.Column('start_ms', sa.Integer(), nullable=False),
+            sa.Column('end_ms', sa.Integer(), nullable=False),
+            sa.Column('speaker', sa.Integer(), nullable=True),
+            sa.Column('emotion', sa.String(), nullable=True),
+            sa.Column('text', sa.TEXT(), nullable=False),
+            *_base_columns(),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(
+            'ix_transcript_segments_meeting_start',
+            'transcript_segments',
+            ['meeting_id', 'start_ms'],
+            unique=False,
+        )
+
+    # Полнотекстовый индекс (src/services/search.py) зависит от диалекта базы
+    if bind.dialect.name == 'sqlite':
+        _upgrade_sqlite_search(inspector)
+    elif bind.dialect.name == 'postgresql':
+        op.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_documents (
+                id BIGSERIAL PRIMARY KEY,
+                meeting_id UUID NOT NULL,
+                kind VARCHAR(16) NOT NULL,
+                start_ms INTEGER,
+                content TEXT NOT NULL,
+                tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('russian', content)) STORED
+            )
+            """
+        )
+        op.execute(
+            'CREATE INDEX IF NOT EXISTS ix_search_documents_tsv '
+            'ON search_documents USING GIN (tsv)'
+        )
+        op.execute(
+            'CREATE INDEX IF NOT EXISTS ix_search_documents_meeting '
+            'ON search_documents (meeting_id)'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Сжатые тексты остаются в формате хранения `CompressedText`: распаковать zstd
+    средствами SQL нельзя.
+    """
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_index')
+    op.execute('DROP TABLE IF EXISTS search_documents')
+    op.drop_index('ix_transcript_segments_meeting_start', table_name='transcript_segments')
+    op.drop_table('transcript_segments')
+    op.drop_index('ix_tasks_meeting_id', table_name='tasks')
+    for table, columns in _new_columns().items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.drop_column(column.name)
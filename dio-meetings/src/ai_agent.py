@@ -1,9 +1,50 @@
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Any
 
-from .prompts import MINUTES_PROMPT
+from .metrics import LLM_REQUEST_SECONDS, LLM_TOKENS
+from .prompts import CHUNK_SUMMARY_PROMPT, MERGE_MINUTES_PROMPT, MINUTES_PROMPT
+from .resilience import get_vendor_guard
 from .settings import settings
+from .tracing import tracer
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
+def _create_model() -> "ChatOpenAI":
+    # langchain импортируется при первом запросе к LLM, а не при старте API
+    from langchain_openai import ChatOpenAI  # noqa: PLC0415
+
+    return ChatOpenAI(
+        api_key=settings.yandexcloud.api_key,
+        model=settings.yandexcloud.qwen3_235b,
+        base_url=settings.yandexcloud.llm_base_url,
+        temperature=0.1,
+        # Повторы с учётом общей квоты выполняет `resilience`
+        max_retries=0,
+    )
+
+
+async def _invoke(template: str, operation: str, variables: dict[str, Any]) -> str:
+    """Выполняет запрос к LLM и учитывает его длительность и расход токенов"""
+
+    from langchain_core.prompts import ChatPromptTemplate  # noqa: PLC0415
+
+    chain = ChatPromptTemplate.from_template(template) | _create_model()
+    with (
+        tracer.start_as_current_span(f"llm.{operation}") as span,
+        LLM_REQUEST_SECONDS.labels(operation).time(),
+    ):
+        span.set_attribute("llm.model", settings.yandexcloud.qwen3_235b)
+        message = await get_vendor_guard("llm").call(chain.ainvoke, variables)
+        if message.usage_metadata is not None:
+            input_tokens = message.usage_metadata["input_tokens"]
+            output_tokens = message.usage_metadata["output_tokens"]
+            span.set_attributes(
+                {"llm.input_tokens": input_tokens, "llm.output_tokens": output_tokens}
+            )
+            LLM_TOKENS.labels(operation, "input").inc(input_tokens)
+            LLM_TOKENS.labels(operation, "output").inc(output_tokens)
+    return message.text
 
 
 async def generate_minutes(transcript: str) -> str:
@@ -13,13 +54,32 @@ async def generate_minutes(transcript: str) -> str:
     :returns: Составленный протокол в Markdown формате.
     """
 
-    model = ChatOpenAI(
-        api_key=settings.yandexcloud.api_key,
-        model=settings.yandexcloud.qwen3_235b,
-        base_url=settings.yandexcloud.llm_base_url,
-        temperature=0.1,
-        max_retries=3,
+    return await _invoke(MINUTES_PROMPT, "minutes", {"transcript": transcript})
+
+
+async def summarize_chunk(transcript: str, part_number: int) -> str:
+    """Составляет конспект части совещания для последующей сборки протокола.
+
+    :param transcript: Транскрибация части совещания.
+    :param part_number: Порядковый номер части, начиная с 1.
+    :returns: Конспект части в Markdown формате.
+    """
+
+    return await _invoke(
+        CHUNK_SUMMARY_PROMPT,
+        "chunk_summary",
+        {"transcript": transcript, "part_number": part_number},
+    )
+
+
+async def merge_minutes(summaries: list[str]) -> str:
+    """Собирает протокол совещания из конспектов его частей.
+
+    :param summaries: Конспекты частей совещания в хронологическом порядке.
+    :returns: Составленный протокол в Markdown формате.
+    """
+
+    summaries_text = "\n\n".join(
+        f"### Часть {number}\n\n{summary}" for number, summary in enumerate(summaries, 1)
     )
-    prompt = ChatPromptTemplate.from_template(MINUTES_PROMPT)
-    chain = prompt | model | StrOutputParser()
-    return await chain.ainvoke({"transcript": transcript})
+    return await _invoke(MERGE_MINUTES_PROMPT, "merge", {"summaries": summaries_text})
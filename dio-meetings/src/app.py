@@ -1,22 +1,57 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
-from .database.base import create_tables
+from .middlewares import UploadAdmissionMiddleware
 from .routers import router
+from .routers.health import router as health_router
+from .routers.metrics import router as metrics_router
+from .routers.tasks import notify_workers
+from .services.meeting_media import MEDIA_DIR
+from .services.minutes_export import EXPORTS_DIR
+from .services.scheduler import get_task_scheduler, run_requeue
+from .services.workspace import TASKS_DIR, run_janitor
+from .settings import settings
+from .tracing import instrument_app, setup_tracing
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    await create_tables()
-    yield
-
-
-app = FastAPI(lifespan=lifespan)
+    # Схема базы создаётся миграциями до запуска API: `alembic upgrade head`
+    tracer_provider = setup_tracing()
+    janitor = asyncio.create_task(run_janitor(
+        [TASKS_DIR, MEDIA_DIR, EXPORTS_DIR],
+        interval=settings.workspace.janitor_interval,
+        stale_after=settings.workspace.stale_after,
+    ))
+    requeue = asyncio.create_task(run_requeue(
+        get_task_scheduler(), notify_workers, interval=settings.scheduler.heartbeat_interval
+    ))
+    try:
+        yield
+    finally:
+        for background in (janitor, requeue):
+            background.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await background
+        if tracer_provider is not None:
+            tracer_provider.shutdown()
+
+
+# Ответы без собственного класса сериализуются orjson вместо стандартного `json`
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(router)
+app.include_router(metrics_router)
+app.include_router(health_router)
+
+instrument_app(app)
 
+app.add_middleware(UploadAdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
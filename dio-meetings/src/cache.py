@@ -0,0 +1,287 @@
+from typing import Any, Protocol
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from pydantic import BaseModel
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .metrics import CACHE_READ_SECONDS, CACHE_REQUESTS
+from .redis_utils import LockTimeoutError, get_binary_redis, redis_lock
+from .settings import settings
+
+# Версия формата записей: меняется вместе со схемами, чтобы не читать старые записи
+CACHE_VERSION = 1
+# После отказа Redis кэш не используется столько секунд, чтения идут в базу
+REDIS_BACKOFF = 5.0
+
+# Записывает вариант записи, только если её не сбросили после чтения из базы
+FILL_SCRIPT = """
+if (redis.call("GET", KEYS[1]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("HSET", KEYS[2], ARGV[2], ARGV[3])
+redis.call("EXPIRE", KEYS[2], ARGV[4])
+return 1
+"""
+
+MISSING: Any = object()
+
+logger = logging.getLogger(__name__)
+
+
+class Codec[T](Protocol):
+    def dumps(self, value: T) -> bytes: ...
+
+    def loads(self, data: bytes) -> T: ...
+
+
+@dataclass(frozen=True, slots=True)
+class ModelCodec[T: BaseModel]:
+    """Схема pydantic в JSON"""
+
+    schema: type[T]
+
+    @staticmethod
+    def dumps(value: T) -> bytes:
+        return value.model_dump_json().encode()
+
+    def loads(self, data: bytes) -> T:
+        return self.schema.model_validate_json(data)
+
+
+@dataclass(frozen=True, slots=True)
+class BytesCodec:
+    """Уже сериализованное значение, например готовое JSON тело ответа API"""
+
+    @staticmethod
+    def dumps(value: bytes) -> bytes:
+        return value
+
+    @staticmethod
+    def loads(data: bytes) -> bytes:
+        return data
+
+
+class LocalCache:
+    """LRU в памяти процесса с ограничением числа записей, объёма и времени жизни.
+
+    Ключ записи — пара `(id, вариант)`, сброс удаляет все варианты записи.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[tuple[str, str], tuple[float, int, Any]] = OrderedDict()
+        self.size = 0
+
+    def get(self, key: tuple[str, str]) -> Any:
+        """Значение записи или `MISSING`, если её нет или она устарела"""
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return MISSING
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._pop(key)
+            return MISSING
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: tuple[str, str], value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        self._pop(key)
+        self.entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size += size
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._pop(next(iter(self.entries)))
+
+    def invalidate(self, id: str) -> None:  # noqa: A002
+        for key in [key for key in self.entries if key[0] == id]:
+            self._pop(key)
+
+    def _pop(self, key: tuple[str, str]) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+class ReadThroughCache:
+    """Кэш чтения неизменяемых после записи данных: встреч, расшифровок, протоколов.
+
+    Записи ищутся в памяти процесса (`LocalCache`), затем в Redis, затем загружаются
+    из базы. В Redis запись — хеш `cache:v{CACHE_VERSION}:{namespace}:{id}` с
+    вариантами (например, разными схемами ответа) и счётчик поколений
+    `...:gen`. Сброс увеличивает поколение и удаляет хеш, а загрузка из базы
+    записывает вариант, только если поколение не изменилось с момента промаха: так
+    запрос, прочитавший базу до изменения, не вернёт в кэш прежние данные.
+
+    Защита от лавины запросов: параллельные промахи одного процесса ждут одну
+    загрузку, между процессами загрузку выполняет владелец блокировки в Redis, а
+    остальные читают его результат. Время жизни записей в Redis слегка случайно,
+    чтобы они не истекали одновременно. Если Redis недоступен, чтения идут в базу.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            namespace: str,
+            ttl: float = 60 * 60,
+            local: LocalCache | None = None,
+            lock_ttl: float = 10.0,
+            lock_timeout: float = 3.0,
+    ) -> None:
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = local
+        self.lock_ttl = lock_ttl
+        self.lock_timeout = lock_timeout
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self._invalidations = 0
+        self._redis_down_until = 0.0
+
+    def _key(self, id: str) -> str:  # noqa: A002
+        return f"cache:v{CACHE_VERSION}:{self.namespace}:{id}"
+
+    async def get[T](
+            self,
+            id: Hashable,  # noqa: A002
+            variant: str,
+            load: Callable[[], Awaitable[T | None]],
+            codec: Codec[T],
+    ) -> T | None:
+        """Читает запись через кэш.
+
+        :param id: Идентификатор записи, общий для всех её вариантов.
+        :param variant: Вариант записи, например имя схемы ответа.
+        :param load: Загрузка из базы, None — записи нет (не кэшируется).
+        :param codec: Сериализация значения для Redis.
+        """
+
+        start = time.perf_counter()
+        key = (str(id), variant)
+        value = self.local.get(key) if self.local is not None else MISSING
+        if value is not MISSING:
+            result = "local"
+        elif (task := self._inflight.get(key)) is not None:
+            value, _ = await asyncio.shield(task)
+            result = "coalesced"
+        else:
+            task = asyncio.create_task(self._load(key, load, codec))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            value, result = await asyncio.shield(task)
+        CACHE_REQUESTS.labels(self.namespace, result).inc()
+        CACHE_READ_SECONDS.labels(self.namespace, result).observe(time.perf_counter() - start)
+        return value
+
+    async def _read(self, key: str, variant: str) -> tuple[bytes | None, bytes]:
+        """Вариант записи и текущее поколение одним обращением к Redis"""
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hget(key, variant)
+            pipe.get(f"{key}:gen")
+            data, generation = await pipe.execute()
+        return data, generation or b"0"
+
+    async def _load[T](
+            self,
+            key: tuple[str, str],
+            load: Callable[[], Awaitable[T | None]],
+            codec: Codec[T],
+    ) -> tuple[T | None, str]:
+        invalidations = self._invalidations
+        if time.monotonic() < self._redis_down_until:
+            return await load(), "bypass"
+        id, variant = key  # noqa: A001
+        redis_key = self._key(id)
+        value, data, result = MISSING, None, "hit"
+        try:
+            data, _ = await self._read(redis_key, variant)
+            if data is None:
+                async with redis_lock(
+                    self.redis,
+                    f"{redis_key}:lock",
+                    ttl=self.lock_ttl,
+                    timeout=self.lock_timeout,
+                ):
+                    # Пока ждали блокировку, запись мог загрузить другой процесс
+                    data, generation = await self._read(redis_key, variant)
+                    if data is None:
+                        result = "miss"
+                        value = await load()
+                        if value is not None:
+                            data = codec.dumps(value)
+                            await self.redis.eval(
+                                FILL_SCRIPT, 2, f"{redis_key}:gen", redis_key,
+                                generation, variant, data,
+                                round(self.ttl * random.uniform(0.9, 1.1)),  # noqa: S311
+                            )
+        except LockTimeoutError:
+            logger.warning("Cache `%s` fill for `%s` takes too long", self.namespace, id)
+            result = "miss"
+        except RedisError:
+            logger.warning(
+                "Cache `%s` is unavailable, reading from the database",
+                self.namespace,
+                exc_info=True,
+            )
+            self._redis_down_until = time.monotonic() + REDIS_BACKOFF
+            result = "bypass"
+        if value is MISSING:
+            value = await load() if data is None else codec.loads(data)
+            if data is None and value is not None:
+                data = codec.dumps(value)
+        # Значение, прочитанное до сброса в этом процессе, в память не попадает
+        if (
+            data is not None and self.local is not None
+            and invalidations == self._invalidations
+        ):
+            self.local.set(key, value, len(data))
+        return value, result
+
+    async def invalidate(self, id: Hashable) -> None:  # noqa: A002
+        """Сбрасывает все варианты записи в памяти процесса и в Redis"""
+
+        self._invalidations += 1
+        if self.local is not None:
+            self.local.invalidate(str(id))
+        redis_key = self._key(str(id))
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(f"{redis_key}:gen")
+                pipe.expire(f"{redis_key}:gen", round(self.ttl * 2))
+                pipe.delete(redis_key)
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Failed to invalidate cache `%s` for `%s`", self.namespace, id)
+
+
+@lru_cache
+def get_read_cache(namespace: str) -> ReadThroughCache | None:
+    """Общий для процесса кэш пространства имён, None — кэш выключен"""
+
+    if not settings.cache.enabled:
+        return None
+    return ReadThroughCache(
+        get_binary_redis(),
+        namespace,
+        ttl=settings.cache.ttl,
+        local=LocalCache(
+            max_entries=settings.cache.local_max_entries,
+            max_bytes=settings.cache.local_max_mb * 1024 * 1024,
+            ttl=settings.cache.local_ttl,
+        ),
+        lock_ttl=settings.cache.lock_ttl,
+        lock_timeout=settings.cache.lock_timeout,
+    )
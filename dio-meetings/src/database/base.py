@@ -3,7 +3,7 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, event, func
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
     AsyncSession,
@@ -20,6 +20,16 @@ sessionmaker = async_sessionmaker(
 )
 
 
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, _) -> None:
+    """WAL журнал и `synchronous=NORMAL`: коммит не требует fsync основного файла БД"""
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
 class Base(AsyncAttrs, DeclarativeBase):
     __abstract__ = True
 
@@ -40,8 +50,3 @@ class Base(AsyncAttrs, DeclarativeBase):
 async def session_factory() -> AsyncIterator[AsyncSession]:
     async with sessionmaker() as session:
         yield session
-
-
-async def create_tables() -> None:
-    async with engine.begin() as connection:
-        await connection.run_sync(Base.metadata.create_all)
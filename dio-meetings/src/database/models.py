@@ -1,9 +1,10 @@
 from uuid import UUID
 
-from sqlalchemy import TEXT
+from sqlalchemy import TEXT, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
+from .types import CompressedText
 
 
 class Meeting(Base):
@@ -17,27 +18,44 @@ class Meeting(Base):
     format: Mapped[str]
     size_mb: Mapped[float]
     duration: Mapped[float]
+    proxy_s3_key: Mapped[str | None] = mapped_column(nullable=True)
 
 
 class Task(Base):
     __tablename__ = "tasks"
 
-    meeting_id: Mapped[UUID]
+    meeting_id: Mapped[UUID] = mapped_column(index=True)
     status: Mapped[str]
     error_message: Mapped[str | None] = mapped_column(nullable=True)
+    priority: Mapped[str] = mapped_column(server_default="normal")
+    tenant: Mapped[str | None] = mapped_column(nullable=True)
 
 
 class Transcript(Base):
     __tablename__ = "transcripts"
 
     meeting_id: Mapped[UUID]
-    full_text: Mapped[str] = mapped_column(TEXT)
+    full_text: Mapped[str] = mapped_column(CompressedText, deferred=True)
     words_count: Mapped[int]
 
 
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    __table_args__ = (Index("ix_transcript_segments_meeting_start", "meeting_id", "start_ms"),)
+
+    meeting_id: Mapped[UUID]
+    chunk: Mapped[int]
+    start_ms: Mapped[int]
+    end_ms: Mapped[int]
+    speaker: Mapped[int | None] = mapped_column(nullable=True)
+    emotion: Mapped[str | None] = mapped_column(nullable=True)
+    text: Mapped[str] = mapped_column(TEXT)
+
+
 class Minutes(Base):
     __tablename__ = "minutes"
 
     meeting_id: Mapped[UUID]
     title: Mapped[str]
-    md_text: Mapped[str] = mapped_column(TEXT)
+    md_text: Mapped[str] = mapped_column(CompressedText, deferred=True)
+    content_hash: Mapped[str | None] = mapped_column(nullable=True)
@@ -1,83 +1,401 @@
+from typing import Any, Self
+
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping
+from dataclasses import dataclass
+from functools import partial
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import (
+    LargeBinary,
+    Select,
+    delete,
+    func,
+    insert,
+    select,
+    type_coerce,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
 from .. import schemas
+from ..cache import BytesCodec, Codec, ModelCodec, get_read_cache
+from ..utils.commons import current_datetime
 from . import models
 from .base import Base
+from .unit_of_work import after_commit, in_unit_of_work, run_after_commit
 
 
 class SqlAlchemyRepository[SchemaT: BaseModel, ModelT: Base]:
     schema: type[SchemaT]
     model: type[ModelT]
+    # Пространство имён кэша чтения (`src.cache`), None — чтения не кэшируются
+    cache_namespace: str | None = None
 
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
+        self.cache = get_read_cache(self.cache_namespace) if self.cache_namespace else None
+
+    async def _commit(self) -> None:
+        """Фиксирует изменения, если репозиторий не участвует в единице работы"""
+
+        if not in_unit_of_work(self.session):
+            await self.session.commit()
+            await run_after_commit(self.session)
+
+    async def _cached[ResultT](
+            self,
+            id: Hashable,  # noqa: A002
+            variant: str,
+            load: Callable[[Self], Awaitable[ResultT | None]],
+            codec: Codec[ResultT],
+    ) -> ResultT | None:
+        """Читает через кэш, внутри единицы работы — напрямую из базы.
+
+        :param load: Загрузка из базы через переданный ей репозиторий.
+        """
+
+        if self.cache is None or in_unit_of_work(self.session):
+            return await load(self)
+
+        async def load_detached() -> ResultT | None:
+            # Загрузку промаха ждут и другие запросы, и она продолжается после отмены
+            # запроса, начавшего её, поэтому сессия запроса для неё не годится
+            async with AsyncSession(self.session.bind, expire_on_commit=False) as session:
+                return await load(type(self)(session))
+
+        return await self.cache.get(id, variant, load_detached, codec)
+
+    def _invalidate(self, id: Hashable) -> None:  # noqa: A002
+        """Сбрасывает запись кэша после фиксации транзакции"""
+
+        if self.cache is not None:
+            after_commit(self.session, partial(self.cache.invalidate, id))
 
     async def create(self, schema: SchemaT) -> None:
         stmt = insert(self.model).values(**schema.model_dump())
         await self.session.execute(stmt)
-        await self.session.flush()
-        await self.session.commit()
+        await self._commit()
+
+    async def bulk_create(self, schemas: Iterable[SchemaT]) -> None:
+        """Создаёт несколько записей одним `INSERT` в режиме executemany"""
+
+        values = [schema.model_dump() for schema in schemas]
+        if not values:
+            return
+        await self.session.execute(insert(self.model), values)
+        await self._commit()
+
+    async def bulk_update(self, values: Iterable[Mapping[str, Any]]) -> None:
+        """Обновляет несколько записей по первичному ключу одним запросом.
+
+        :param values: Словари с полями для обновления, каждый обязан содержать `id`.
+        """
+
+        rows = [dict(item) for item in values]
+        if not rows:
+            return
+        await self.session.execute(update(self.model), rows)
+        await self._commit()
+
+    def _columns(self, schema: type[BaseModel]) -> list[InstrumentedAttribute]:
+        """Колонки модели, соответствующие полям схемы"""
+
+        return [getattr(self.model, name) for name in schema.model_fields]
+
+    async def _fetch_one_as[ResultT: BaseModel](
+            self, schema: type[ResultT], stmt: Select
+    ) -> ResultT | None:
+        """Выполняет запрос по колонкам и строит схему без повторной валидации.
+
+        Данные уже провалидированы при записи, поэтому строка отображается на схему
+        через `model_construct`, минуя построение ORM объекта и `model_validate`.
+        """
+
+        result = await self.session.execute(stmt)
+        row = result.mappings().one_or_none()
+        return None if row is None else schema.model_construct(**row)
 
     async def read(self, id: UUID) -> SchemaT | None:  # noqa: A002
-        stmt = select(self.model).where(self.model.id == id)
+        return await self.read_as(id, self.schema)
+
+    async def read_as[ResultT: BaseModel](
+            self, id: UUID, schema: type[ResultT]  # noqa: A002
+    ) -> ResultT | None:
+        """Читает запись, выбирая только колонки, необходимые схеме ответа"""
+
+        stmt = select(*self._columns(schema)).where(self.model.id == id)
+        return await self._fetch_one_as(schema, stmt)
+
+    async def list_as[ResultT: BaseModel](
+            self, schema: type[ResultT], limit: int = 100, offset: int = 0
+    ) -> list[ResultT]:
+        """Список записей от новых к старым, только колонки схемы ответа"""
+
+        stmt = (
+            select(*self._columns(schema))
+            .order_by(self.model.created_at.desc())
+            .limit(limit)
+            .offset(offset)
+        )
         result = await self.session.execute(stmt)
-        model = result.scalar_one_or_none()
-        return None if model is None else self.schema.model_validate(model)
+        return [schema.model_construct(**row) for row in result.mappings()]
 
     async def update(self, id: UUID, **kwargs) -> SchemaT | None:  # noqa: A002
+        return await self.update_as(id, self.schema, **kwargs)
+
+    async def update_as[ResultT: BaseModel](
+            self, id: UUID, schema: type[ResultT], **kwargs  # noqa: A002
+    ) -> ResultT | None:
         stmt = (
             update(self.model)
             .where(self.model.id == id)
             .values(**kwargs)
-            .returning(self.model)
+            .returning(*self._columns(schema))
         )
         result = await self.session.execute(stmt)
-        await self.session.commit()
-        model = result.scalar_one_or_none()
-        return None if model is None else self.schema.model_validate(model)
+        row = result.mappings().one_or_none()
+        await self._commit()
+        return None if row is None else schema.model_construct(**row)
 
     async def delete(self, id: UUID) -> None:  # noqa: A002
         stmt = delete(self.model).where(self.model.id == id)
         await self.session.execute(stmt)
-        await self.session.commit()
+        await self._commit()
 
 
 class MeetingRepository(SqlAlchemyRepository[schemas.Meeting, models.Meeting]):
     schema = schemas.Meeting
     model = models.Meeting
+    cache_namespace = "meeting"
+
+    async def read_as[ResultT: BaseModel](
+            self, id: UUID, schema: type[ResultT]  # noqa: A002
+    ) -> ResultT | None:
+        return await self._cached(
+            id,
+            schema.__name__,
+            partial(SqlAlchemyRepository.read_as, id=id, schema=schema),
+            ModelCodec(schema),
+        )
+
+    async def update_as[ResultT: BaseModel](
+            self, id: UUID, schema: type[ResultT], **kwargs  # noqa: A002
+    ) -> ResultT | None:
+        self._invalidate(id)
+        return await super().update_as(id, schema, **kwargs)
+
+    async def delete(self, id: UUID) -> None:  # noqa: A002
+        self._invalidate(id)
+        await super().delete(id)
 
 
 class TaskRepository(SqlAlchemyRepository[schemas.Task, models.Task]):
     schema = schemas.Task
     model = models.Task
 
+    async def update_as[ResultT: BaseModel](
+            self, id: UUID, schema: type[ResultT], **kwargs  # noqa: A002
+    ) -> ResultT | None:
+        """Время изменения задаётся приложением, как и время создания.
+
+        По нему `TaskSubmissionService` находит брошенные задачи, а `func.now()` базы
+        SQLite записал бы время в UTC без часового пояса.
+        """
+
+        kwargs.setdefault("updated_at", current_datetime())
+        return await super().update_as(id, schema, **kwargs)
+
+    async def get_latest_by_meeting(self, meeting_id: UUID) -> schemas.Task | None:
+        """Последняя созданная задача встречи"""
+
+        stmt = (
+            select(*self._columns(self.schema))
+            .where(self.model.meeting_id == meeting_id)
+            .order_by(self.model.created_at.desc())
+            .limit(1)
+        )
+        return await self._fetch_one_as(self.schema, stmt)
+
+    async def count_by_status(self) -> dict[str, int]:
+        """Количество задач по статусам"""
+
+        stmt = select(self.model.status, func.count()).group_by(self.model.status)
+        result = await self.session.execute(stmt)
+        return dict(result.tuples().all())
+
+
+@dataclass(frozen=True, slots=True)
+class CompressedTranscriptCodec:
+    """Метаданные расшифровки в JSON и сжатый текст через перевод строки"""
+
+    @staticmethod
+    def dumps(value: tuple[schemas.TranscriptInfo, bytes]) -> bytes:
+        info, blob = value
+        return info.model_dump_json().encode() + b"\n" + blob
+
+    @staticmethod
+    def loads(data: bytes) -> tuple[schemas.TranscriptInfo, bytes]:
+        info, blob = data.split(b"\n", 1)
+        return schemas.TranscriptInfo.model_validate_json(info), blob
+
 
 class TranscriptRepository(SqlAlchemyRepository[schemas.Transcript, models.Transcript]):
+    """Кэш чтения расшифровок — по идентификатору встречи"""
+
     schema = schemas.Transcript
     model = models.Transcript
+    cache_namespace = "transcript"
+
+    async def create(self, schema: schemas.Transcript) -> None:
+        self._invalidate(schema.meeting_id)
+        await super().create(schema)
 
     async def get_by_meeting(self, meeting_id: UUID) -> schemas.Transcript | None:
-        stmt = select(self.model).where(self.model.meeting_id == meeting_id)
+        stmt = (
+            select(*self._columns(self.schema))
+            .where(self.model.meeting_id == meeting_id)
+            .limit(1)
+        )
+        return await self._fetch_one_as(self.schema, stmt)
+
+    async def delete_by_meeting(self, meeting_id: UUID) -> None:
+        """Удаляет расшифровку встречи"""
+
+        self._invalidate(meeting_id)
+        stmt = delete(self.model).where(self.model.meeting_id == meeting_id)
+        await self.session.execute(stmt)
+        await self._commit()
+
+    async def get_compressed_by_meeting(
+            self, meeting_id: UUID
+    ) -> tuple[schemas.TranscriptInfo, bytes] | None:
+        """Метаданные и сжатый текст расшифровки без распаковки на стороне БД-слоя"""
+
+        return await self._cached(
+            meeting_id,
+            "compressed",
+            partial(TranscriptRepository._get_compressed_by_meeting, meeting_id=meeting_id),
+            CompressedTranscriptCodec(),
+        )
+
+    async def _get_compressed_by_meeting(
+            self, meeting_id: UUID
+    ) -> tuple[schemas.TranscriptInfo, bytes] | None:
+        stmt = (
+            select(
+                *self._columns(schemas.TranscriptInfo),
+                type_coerce(self.model.full_text, LargeBinary).label("blob"),
+            )
+            .where(self.model.meeting_id == meeting_id)
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        row = result.mappings().one_or_none()
+        if row is None:
+            return None
+        info = schemas.TranscriptInfo.model_construct(
+            meeting_id=row["meeting_id"], words_count=row["words_count"]
+        )
+        return info, row["blob"]
+
+
+class TranscriptSegmentRepository(
+    SqlAlchemyRepository[schemas.TranscriptSegment, models.TranscriptSegment]
+):
+    schema = schemas.TranscriptSegment
+    model = models.TranscriptSegment
+
+    async def get_range(
+            self,
+            meeting_id: UUID,
+            start_ms: int | None = None,
+            end_ms: int | None = None,
+            speaker: int | None = None,
+            limit: int | None = None,
+    ) -> list[schemas.TranscriptSegment]:
+        """Фразы встречи, пересекающиеся с интервалом `[start_ms, end_ms)`"""
+
+        stmt = (
+            select(*self._columns(self.schema))
+            .where(self.model.meeting_id == meeting_id)
+            .order_by(self.model.start_ms)
+            .limit(limit)
+        )
+        if start_ms is not None:
+            stmt = stmt.where(self.model.end_ms > start_ms)
+        if end_ms is not None:
+            stmt = stmt.where(self.model.start_ms < end_ms)
+        if speaker is not None:
+            stmt = stmt.where(self.model.speaker == speaker)
         result = await self.session.execute(stmt)
-        model = result.scalar_one_or_none()
-        return None if model is None else self.schema.model_validate(model)
+        return [self.schema.model_construct(**row) for row in result.mappings()]
+
+    async def delete_by_meeting(self, meeting_id: UUID) -> None:
+        """Удаляет фразы расшифровки встречи"""
+
+        stmt = delete(self.model).where(self.model.meeting_id == meeting_id)
+        await self.session.execute(stmt)
+        await self._commit()
 
 
 class MinutesRepository(SqlAlchemyRepository[schemas.Minutes, models.Minutes]):
+    """Кэш чтения протоколов — по идентификатору встречи"""
+
     schema = schemas.Minutes
     model = models.Minutes
+    cache_namespace = "minutes"
+
+    async def create(self, schema: schemas.Minutes) -> None:
+        self._invalidate(schema.meeting_id)
+        await super().create(schema)
 
     async def get_by_meeting(self, meeting_id: UUID) -> schemas.Minutes | None:
+        return await self._cached(
+            meeting_id,
+            self.schema.__name__,
+            partial(MinutesRepository._get_by_meeting, meeting_id=meeting_id),
+            ModelCodec(self.schema),
+        )
+
+    async def get_json_by_meeting(self, meeting_id: UUID) -> bytes | None:
+        """Протокол встречи в JSON — готовое тело ответа API.
+
+        В кэше хранится сериализованный протокол, поэтому попадание в кэш отдаётся
+        клиенту без разбора и повторной сериализации.
+        """
+
+        async def load(repository: MinutesRepository) -> bytes | None:
+            minutes = await repository._get_by_meeting(meeting_id)
+            return None if minutes is None else minutes.__pydantic_serializer__.to_json(minutes)
+
+        return await self._cached(meeting_id, "json", load, BytesCodec())
+
+    async def _get_by_meeting(self, meeting_id: UUID) -> schemas.Minutes | None:
         stmt = (
-            select(self.model)
+            select(*self._columns(self.schema))
             .where(self.model.meeting_id == meeting_id)
-            .order_by(self.model.created_at)
+            .order_by(self.model.created_at.desc())
             .limit(1)
         )
-        result = await self.session.execute(stmt)
-        model = result.scalar_one_or_none()
-        return None if model is None else self.schema.model_validate(model)
+        return await self._fetch_one_as(self.schema, stmt)
+
+    async def get_export_info(self, meeting_id: UUID) -> schemas.MinutesExportInfo | None:
+        """Идентификатор и хеш протокола встречи без загрузки текста"""
+
+        stmt = (
+            select(*self._columns(schemas.MinutesExportInfo))
+            .where(self.model.meeting_id == meeting_id)
+            .order_by(self.model.created_at.desc())
+            .limit(1)
+        )
+        return await self._fetch_one_as(schemas.MinutesExportInfo, stmt)
+
+    async def delete_by_meeting(self, meeting_id: UUID) -> None:
+        """Удаляет протоколы встречи, например перед сохранением нового"""
+
+        self._invalidate(meeting_id)
+        stmt = delete(self.model).where(self.model.meeting_id == meeting_id)
+        await self.session.execute(stmt)
+        await self._commit()
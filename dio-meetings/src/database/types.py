@@ -0,0 +1,23 @@
+from typing import Any
+
+from sqlalchemy import Dialect, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from ..utils.compression import compress_text, decompress_text
+
+
+class CompressedText(TypeDecorator[str]):
+    """Текст, прозрачно сжимаемый zstd при записи и распаковываемый при чтении"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(  # noqa: PLR6301
+            self, value: str | None, dialect: Dialect  # noqa: ARG002
+    ) -> bytes | None:
+        return None if value is None else compress_text(value)
+
+    def process_result_value(  # noqa: PLR6301
+            self, value: Any, dialect: Dialect  # noqa: ARG002
+    ) -> str | None:
+        return None if value is None else decompress_text(value)
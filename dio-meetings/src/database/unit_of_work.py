@@ -0,0 +1,72 @@
+from typing import Self
+
+from collections.abc import Awaitable, Callable
+from types import TracebackType
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Ключ в `AsyncSession.info`, хранящий глубину вложенности единиц работы
+UOW_DEPTH_KEY = "unit_of_work_depth"
+# Ключ в `AsyncSession.info` со списком действий после фиксации транзакции
+AFTER_COMMIT_KEY = "after_commit_callbacks"
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    """Проверяет, выполняется ли сессия внутри единицы работы"""
+
+    return session.info.get(UOW_DEPTH_KEY, 0) > 0
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Откладывает действие до фиксации транзакции сессии, при откате оно отбрасывается.
+
+    Например, сброс кэша: до фиксации параллельный запрос прочитал бы из базы и
+    положил в кэш прежние данные.
+    """
+
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    """Выполняет действия, отложенные до фиксации транзакции"""
+
+    for callback in session.info.pop(AFTER_COMMIT_KEY, []):
+        await callback()
+
+
+class UnitOfWork:
+    """Единица работы, объединяющая операции репозиториев в одну транзакцию.
+
+    Пока единица работы активна, репозитории не фиксируют изменения самостоятельно,
+    фиксация (или откат при исключении) выполняется один раз при выходе из контекста.
+    Вложенные единицы работы присоединяются к внешней транзакции.
+
+    Пример:
+        async with UnitOfWork(session):
+            await transcript_repo.create(transcript)
+            await task_repo.update(task_id, status="generating")
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def __aenter__(self) -> Self:
+        self.session.info[UOW_DEPTH_KEY] = self.session.info.get(UOW_DEPTH_KEY, 0) + 1
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None,
+    ) -> None:
+        depth = self.session.info[UOW_DEPTH_KEY] - 1
+        self.session.info[UOW_DEPTH_KEY] = depth
+        if depth > 0:
+            return
+        if exc_type is None:
+            await self.session.commit()
+            await run_after_commit(self.session)
+        else:
+            await self.session.rollback()
+            self.session.info.pop(AFTER_COMMIT_KEY, None)
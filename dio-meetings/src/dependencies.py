@@ -3,8 +3,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from .database import repositories
 from .database.base import session_factory
+from .database.unit_of_work import UnitOfWork
+from .redis_utils import get_redis
+from .services.admission import get_admission_controller
+from .services.asr import get_asr_engine
+from .services.live import LiveMeetingService
 from .services.meeting_media import MeetingMediaService
+from .services.minutes_export import MinutesExporter
+from .services.scheduler import get_task_scheduler
+from .services.search import SearchIndex, create_search_index
 from .services.task_processing import TaskProcessor
+from .services.task_submission import TaskSubmissionService
+from .services.uploads import ResumableUploadService
+from .services.workspace import get_disk_quota
 
 
 async def get_db() -> AsyncSession:
@@ -26,16 +37,44 @@ def get_transcript_repo(
     return repositories.TranscriptRepository(session)
 
 
+def get_segment_repo(
+        session: AsyncSession = Depends(get_db)
+) -> repositories.TranscriptSegmentRepository:
+    return repositories.TranscriptSegmentRepository(session)
+
+
 def get_minutes_repo(
         session: AsyncSession = Depends(get_db)
 ) -> repositories.MinutesRepository:
     return repositories.MinutesRepository(session)
 
 
+def get_minutes_exporter() -> MinutesExporter:
+    return MinutesExporter()
+
+
+def get_search_index(session: AsyncSession = Depends(get_db)) -> SearchIndex:
+    return create_search_index(session)
+
+
 def get_meeting_media_service(
-        repository: repositories.MeetingRepository = Depends(get_meeting_repo)
+        session: AsyncSession = Depends(get_db),
+        repository: repositories.MeetingRepository = Depends(get_meeting_repo),
 ) -> MeetingMediaService:
-    return MeetingMediaService(repository)
+    return MeetingMediaService(
+        repository,
+        transcript_repo=repositories.TranscriptRepository(session),
+        segment_repo=repositories.TranscriptSegmentRepository(session),
+        minutes_repo=repositories.MinutesRepository(session),
+        search_index=create_search_index(session),
+        exporter=MinutesExporter(),
+    )
+
+
+def get_upload_service(
+        media_service: MeetingMediaService = Depends(get_meeting_media_service),
+) -> ResumableUploadService:
+    return ResumableUploadService(get_redis(), media_service, get_admission_controller())
 
 
 def get_task_processor(session: AsyncSession = Depends(get_db)) -> TaskProcessor:
@@ -43,5 +82,33 @@ def get_task_processor(session: AsyncSession = Depends(get_db)) -> TaskProcessor
         meeting_repo=repositories.MeetingRepository(session),
         task_repo=repositories.TaskRepository(session),
         transcript_repo=repositories.TranscriptRepository(session),
+        segment_repo=repositories.TranscriptSegmentRepository(session),
         minutes_repo=repositories.MinutesRepository(session),
+        search_index=create_search_index(session),
+        exporter=MinutesExporter(),
+        disk_quota=get_disk_quota(),
+        asr=get_asr_engine(),
+        uow=UnitOfWork(session),
+    )
+
+
+def get_task_submission_service(
+        repository: repositories.TaskRepository = Depends(get_task_repo),
+) -> TaskSubmissionService:
+    return TaskSubmissionService(
+        get_redis(),
+        repository,
+        scheduler=get_task_scheduler(),
+        admission=get_admission_controller(),
+    )
+
+
+def get_live_meeting_service(session: AsyncSession = Depends(get_db)) -> LiveMeetingService:
+    return LiveMeetingService(
+        meeting_repo=repositories.MeetingRepository(session),
+        task_repo=repositories.TaskRepository(session),
+        transcript_repo=repositories.TranscriptRepository(session),
+        segment_repo=repositories.TranscriptSegmentRepository(session),
+        search_index=create_search_index(session),
+        uow=UnitOfWork(session),
     )
@@ -5,17 +5,23 @@ import json
 import logging
 import operator
 from collections import UserList
+from dataclasses import dataclass
 from uuid import UUID
 
 import aiohttp
-from pydantic import BaseModel
+import orjson
 
+from ..metrics import VENDOR_POLLS, track_vendor_request
+from ..resilience import resilient
+from ..settings import settings
+from ..tracing import traced
+from ..utils.transcripts import segments_to_markdown
 from . import sberdevices
 
 logger = logging.getLogger(__name__)
 
 # Базовый URL сервиса Salute Speech
-BASE_URL = "https://smartspeech.sber.ru/rest/v1/"
+BASE_URL = settings.sberdevices.speech_url
 # Модель для распознавания речи
 MODEL = "general"
 # Язык для распознавания речи
@@ -85,6 +91,8 @@ class DownloadingFailedError(SaluteSpeechError):
     """Ошибка скачивания файла"""
 
 
+@resilient("salute")
+@traced("salute.upload")
 async def _upload_file(
         data: bytes,
         audio_encoding: str,
@@ -140,6 +148,8 @@ async def _upload_file(
         raise UploadingFailedError(error_message) from e
 
 
+@resilient("salute")
+@traced("salute.create_task")
 async def _create_task(
         request_file_id: UUID,
         audio_encoding: AudioEncoding,
@@ -223,6 +233,8 @@ async def _create_task(
         raise TaskFailedError(error_message) from e
 
 
+@resilient("salute")
+@traced("salute.poll")
 async def _get_task_status(task_id: str, use_ssl: bool = False) -> dict[str, Any]:
     access_token = await sberdevices.authenticate()
     headers = {"Authorization": f"Bearer {access_token}", "Accept": "application/json"}
@@ -250,39 +262,56 @@ async def _get_task_status(task_id: str, use_ssl: bool = False) -> dict[str, Any
         raise TaskFailedError(error_message) from e
 
 
-class RecognizedResult(BaseModel):
+@dataclass(slots=True)
+class RecognizedResult:
+    """Распознанная фраза из результата Salute Speech.
+
+    Результат длинной записи — десятки тысяч фраз, поэтому вместо схемы pydantic
+    используется dataclass со слотами: поля ответа сервиса разбираются в
+    `from_response`, повторная валидация каждой фразы не нужна.
+    """
+
     text: str
     speaker: int | None = None
     emotion: str | None = None
+    start_ms: int = 0
+    end_ms: int = 0
 
     @classmethod
     def from_response(cls, response: dict[str, Any]) -> Self:
+        result = response["results"][0]
         return cls(
-            text=response["results"][0]["normalized_text"],
+            text=result["normalized_text"],
             speaker=response["speaker_info"]["speaker_id"],
             emotion=cls._parse_emotion(response["emotions_result"]),
+            start_ms=cls._parse_duration_ms(
+                result.get("start", response.get("processed_audio_start"))
+            ),
+            end_ms=cls._parse_duration_ms(
+                result.get("end", response.get("processed_audio_end"))
+            ),
         )
 
     @staticmethod
     def _parse_emotion(emotions_result: dict[str, float]) -> str:
         return max(emotions_result.items(), key=operator.itemgetter(1))[0]
 
+    @staticmethod
+    def _parse_duration_ms(duration: str | None) -> int:
+        """Переводит длительность формата `1.240s` в миллисекунды"""
+
+        if not duration:
+            return 0
+        return round(float(duration.removesuffix("s")) * 1000)
+
 
 class RecognizedResults(UserList[RecognizedResult]):
     def to_markdown(self) -> str:
-        if not self.data:
-            return "No speech recognized"
-        lines: list[str] = []
-        for i, recognized_speech in enumerate(self.data):
-            parts = [f"{i}. {recognized_speech.text}"]
-            if recognized_speech.speaker is not None:
-                parts.append(f"({recognized_speech.speaker})")
-            if recognized_speech.emotion is not None:
-                parts.append(f"[{recognized_speech.emotion}]")
-            lines.append(" ".join(parts))
-        return "\n".join(lines)
+        return segments_to_markdown(self.data)
 
 
+@resilient("salute")
+@traced("salute.download")
 async def _download_file(response_file_id: str, use_ssl: bool = False) -> RecognizedResults:
     access_token = await sberdevices.authenticate()
     headers = {"Authorization": f"Bearer {access_token}", "Accept": "application/octet-stream"}
@@ -298,8 +327,8 @@ async def _download_file(response_file_id: str, use_ssl: bool = False) -> Recogn
                 ssl=use_ssl,
         ) as response:
             response.raise_for_status()
-            data = await response.text()
-        results = json.loads(data)
+            data = await response.read()
+        results = orjson.loads(data)
         return RecognizedResults([
             RecognizedResult.from_response(result) for result in results
         ])
@@ -313,6 +342,7 @@ async def _download_file(response_file_id: str, use_ssl: bool = False) -> Recogn
         raise DownloadingFailedError(error_message) from e
 
 
+@traced("salute.recognize")
 async def recognize_async(
         audio_file: bytes,
         audio_encoding: AudioEncoding,
@@ -320,23 +350,33 @@ async def recognize_async(
         max_speakers: int = 10,
         poll_interval: int = 1,
         use_ssl: bool = False,
-) -> str:
+) -> RecognizedResults:
     """Выполняет асинхронную транскрипцию + диаризацию аудио записи.
-    Возвращает результат в формате Markdown.
+    Возвращает распознанные фразы с таймкодами относительно начала записи.
     """
 
-    request_file_id = await _upload_file(
-        audio_file, audio_encoding=audio_encoding, use_ssl=use_ssl
-    )
-    task = await _create_task(
-        request_file_id,
-        audio_encoding=audio_encoding,
-        channels=channels,
-        max_speakers=max_speakers,
-        use_ssl=use_ssl,
-    )
+    with track_vendor_request("salute", "upload"):
+        request_file_id = await _upload_file(
+            audio_file, audio_encoding=audio_encoding, use_ssl=use_ssl
+        )
+    with track_vendor_request("salute", "create_task"):
+        task = await _create_task(
+            request_file_id,
+            audio_encoding=audio_encoding,
+            channels=channels,
+            max_speakers=max_speakers,
+            use_ssl=use_ssl,
+        )
+    polls = 0
     while task["status"] != "DONE":
+        if task["status"] in {"ERROR", "CANCELED"}:
+            raise TaskFailedError(
+                f"Recognition task `{task["id"]}` finished with status {task["status"]}"
+            )
         await asyncio.sleep(poll_interval)
-        task = await _get_task_status(task["id"], use_ssl=use_ssl)
-    results = await _download_file(task["response_file_id"])
-    return results.to_markdown()
+        with track_vendor_request("salute", "poll"):
+            task = await _get_task_status(task["id"], use_ssl=use_ssl)
+        polls += 1
+    VENDOR_POLLS.labels("salute").observe(polls)
+    with track_vendor_request("salute", "download"):
+        return await _download_file(task["response_file_id"])
@@ -3,11 +3,13 @@ from uuid import uuid4
 
 import aiohttp
 
+from ..resilience import resilient
 from ..settings import settings
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://ngw.devices.sberbank.ru:9443/api/v2"
+BASE_URL = settings.sberdevices.oauth_url
 
 
 class SberDevicesError(Exception):
@@ -18,6 +20,8 @@ class AuthenticationError(SberDevicesError):
     """Ошибка аутентификации"""
 
 
+@resilient("sberdevices")
+@traced("sberdevices.authenticate")
 async def authenticate(use_ssl: bool = False) -> str:
     """Производит аутентификацию клиента, выдавая access token"""
 
@@ -1,38 +1,65 @@
-from typing import Any, Literal
+from typing import Any, Literal, Self
 
 import asyncio
 import base64
+import json
 import logging
 import time
 
 import aiohttp
+from pydantic import BaseModel
 
+from ..metrics import VENDOR_POLLS, track_vendor_request
+from ..resilience import resilient
 from ..settings import settings
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://stt.api.cloud.yandex.net/"
 OPERATION_URL = "https://operation.api.cloud.yandex.net/"
+# Частоты дискретизации для PCM
+SampleRate = Literal[8000, 16000, 48000]
+# Допустимые кодировки аудио
+AudioEncoding = Literal["LINEAR16_PCM", "WAV", "OGG_OPUS", "MP3"]
 
 
+class SpeechKitError(Exception):
+    pass
+
+
+class RecognitionFailedError(SpeechKitError):
+    """Ошибка при выполнении операции распознавания"""
+
+
+def _audio_format(audio_encoding: AudioEncoding, sample_rate: SampleRate) -> dict[str, Any]:
+    if audio_encoding == "LINEAR16_PCM":
+        return {
+            "rawAudio": {
+                "audioEncoding": "LINEAR16_PCM",
+                "sampleRateHertz": f"{sample_rate}",
+                "audioChannelCount": "1",
+            }
+        }
+    return {"containerAudio": {"containerAudioType": audio_encoding}}
+
+
+@resilient("speechkit")
+@traced("speechkit.create_task")
 async def create_recognition_task(
-        wav_file: bytes, sample_rate: Literal[8000, 16000, 48000] = 16000
+        audio_file: bytes,
+        sample_rate: SampleRate = 16000,
+        audio_encoding: AudioEncoding = "LINEAR16_PCM",
 ) -> dict[str, Any]:
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Api-Key {settings.yandexcloud.api_key}"
     }
     payload = {
-        "content": base64.b64encode(wav_file).decode("utf-8"),
+        "content": base64.b64encode(audio_file).decode("utf-8"),
         "recognitionModel": {
             "model": "general",
-            "audioFormat": {
-                "rawAudio": {
-                    "audioEncoding": "LINEAR16_PCM",
-                    "sampleRateHertz": f"{sample_rate}",
-                    "audioChannelCount": "1",
-                }
-            },
+            "audioFormat": _audio_format(audio_encoding, sample_rate),
             "textNormalization": {
                 "textNormalization": "TEXT_NORMALIZATION_ENABLED",
                 "profanityFilter": False,
@@ -54,19 +81,25 @@ async def create_recognition_task(
         return await response.json()
 
 
+@resilient("speechkit")
+@traced("speechkit.poll")
 async def get_operation(operation_id: str) -> dict[str, Any]:
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Api-Key {settings.yandexcloud.api_key}",
     }
-    async with aiohttp.ClientSession(base_url=BASE_URL) as session, session.get(
+    async with aiohttp.ClientSession(base_url=OPERATION_URL) as session, session.get(
         url=f"/operations/{operation_id}", headers=headers
     ) as response:
         response.raise_for_status()
         return await response.json()
 
 
-async def get_recognition(operation_id: str) -> dict[str, Any]:
+@resilient("speechkit")
+@traced("speechkit.download")
+async def get_recognition(operation_id: str) -> list[dict[str, Any]]:
+    """Результаты распознавания. Ответ приходит потоком JSON объектов, по одному на строку"""
+
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Api-Key {settings.yandexcloud.api_key}"
@@ -75,21 +108,68 @@ async def get_recognition(operation_id: str) -> dict[str, Any]:
         url="/stt/v3/getRecognition", headers=headers, params={"operationId": operation_id}
     ) as response:
         response.raise_for_status()
-        return await response.json()
+        text = await response.text()
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class RecognizedResult(BaseModel):
+    text: str
+    channel: int | None = None
+    start_ms: int = 0
+    end_ms: int = 0
 
+    @classmethod
+    def from_response(cls, response: dict[str, Any]) -> Self | None:
+        """Разбирает нормализованный итоговый результат фразы (`finalRefinement`)"""
 
+        refinement = response.get("result", response).get("finalRefinement")
+        if refinement is None:
+            return None
+        alternatives = refinement.get("normalizedText", {}).get("alternatives", [])
+        if not alternatives or not alternatives[0].get("text"):
+            return None
+        alternative = alternatives[0]
+        channel_tag = response.get("result", response).get("channelTag")
+        return cls(
+            text=alternative["text"],
+            channel=int(channel_tag) if channel_tag is not None else None,
+            start_ms=int(alternative.get("startTimeMs", 0)),
+            end_ms=int(alternative.get("endTimeMs", 0)),
+        )
+
+
+@traced("speechkit.recognize")
 async def recognize_async(
-        wav_file: bytes,
-        sample_rate: Literal[8000, 16000, 48000] = 16000,
+        audio_file: bytes,
+        sample_rate: SampleRate = 16000,
+        audio_encoding: AudioEncoding = "LINEAR16_PCM",
         poll_interval: int = 5,
-        max_wait_time: int = 300
-):
-    operation = await create_recognition_task(wav_file, sample_rate)
-    start_time = time.time()
-    while time.time() - start_time <= max_wait_time or not operation["done"]:
+        max_wait_time: int = 300,
+) -> list[RecognizedResult]:
+    """Выполняет асинхронное распознавание аудио записи.
+    Возвращает распознанные фразы с таймкодами относительно начала записи.
+
+    :raises TimeoutError: Распознавание не завершилось за `max_wait_time` секунд.
+    :raises RecognitionFailedError: Операция распознавания завершилась ошибкой.
+    """
+
+    with track_vendor_request("speechkit", "create_task"):
+        operation = await create_recognition_task(audio_file, sample_rate, audio_encoding)
+    deadline = time.monotonic() + max_wait_time
+    polls = 0
+    while not operation.get("done"):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(
+                f"Recognition `{operation["id"]}` not finished in {max_wait_time} seconds"
+            )
         await asyncio.sleep(poll_interval)
-        operation = await get_operation(operation["id"])
-    if not operation["done"]:
-        return "..."
-    recognition = await get_recognition(operation["id"])
-    return recognition
+        with track_vendor_request("speechkit", "poll"):
+            operation = await get_operation(operation["id"])
+        polls += 1
+    VENDOR_POLLS.labels("speechkit").observe(polls)
+    if "error" in operation:
+        raise RecognitionFailedError(f"Recognition failed: {operation["error"]}")
+    with track_vendor_request("speechkit", "download"):
+        responses = await get_recognition(operation["id"])
+    results = (RecognizedResult.from_response(response) for response in responses)
+    return [result for result in results if result is not None]
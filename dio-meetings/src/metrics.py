@@ -0,0 +1,114 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Длительности меряются гистограммами в секундах, объёмы — счётчиками в байтах:
+# скорость передачи считается на стороне Prometheus, `rate(dio_s3_bytes_total[5m])`
+
+# Границы для этапов обработки: от долей секунды до часа
+STAGE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+# Границы для отдельных запросов к внешним сервисам
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+TASK_STAGE_SECONDS = Histogram(
+    "dio_task_stage_seconds",
+    "Длительность этапа обработки задачи",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+TASKS_IN_FLIGHT = Gauge("dio_tasks_in_flight", "Задачи, обрабатываемые процессом")
+TASKS_PROCESSED = Counter(
+    "dio_tasks_processed_total", "Завершённые задачи по итоговому статусу", ["status"]
+)
+TASKS_BY_STATUS = Gauge(
+    "dio_tasks", "Задачи в базе по статусу, `pending` — глубина очереди", ["status"]
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "dio_scheduler_wait_seconds",
+    "Ожидание задачи в очереди планировщика",
+    ["priority"],
+    buckets=STAGE_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "dio_admission_rejections_total", "Отклонённые из-за перегрузки запросы", ["reason"]
+)
+
+S3_BYTES = Counter(
+    "dio_s3_bytes_total", "Объём переданных в хранилище и из него данных", ["direction"]
+)
+S3_REQUEST_SECONDS = Histogram(
+    "dio_s3_request_seconds",
+    "Длительность запросов к хранилищу, для составных объектов — одной части",
+    ["operation"],
+    buckets=REQUEST_BUCKETS,
+)
+
+VENDOR_REQUEST_SECONDS = Histogram(
+    "dio_vendor_request_seconds",
+    "Длительность запросов к сервисам распознавания",
+    ["vendor", "operation"],
+    buckets=REQUEST_BUCKETS,
+)
+VENDOR_POLLS = Histogram(
+    "dio_vendor_polls",
+    "Число опросов статуса на одно распознавание",
+    ["vendor"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+VENDOR_ERRORS = Counter(
+    "dio_vendor_errors_total", "Ошибки запросов к сервисам распознавания", ["vendor", "operation"]
+)
+VENDOR_RETRIES = Counter(
+    "dio_vendor_retries_total", "Повторы запросов к внешним сервисам", ["vendor"]
+)
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "dio_rate_limit_wait_seconds",
+    "Ожидание очереди в квоте запросов к внешнему сервису",
+    ["vendor"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CIRCUIT_OPEN = Gauge(
+    "dio_circuit_open", "Автомат запросов к внешнему сервису разомкнут", ["vendor"]
+)
+
+CACHE_REQUESTS = Counter(
+    "dio_cache_requests_total",
+    "Чтения через кэш: `local`, `hit` (Redis), `miss` (база), `coalesced` (ожидание "
+    "параллельной загрузки), `bypass` (Redis недоступен)",
+    ["namespace", "result"],
+)
+CACHE_READ_SECONDS = Histogram(
+    "dio_cache_read_seconds",
+    "Длительность чтения через кэш",
+    ["namespace", "result"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "dio_llm_request_seconds",
+    "Длительность запросов к LLM",
+    ["operation"],
+    buckets=STAGE_BUCKETS,
+)
+LLM_TOKENS = Counter("dio_llm_tokens_total", "Токены запросов к LLM", ["operation", "kind"])
+
+DISK_BYTES = Gauge("dio_disk_bytes", "Место на диске временных файлов", ["kind"])
+DIRECTORY_BYTES = Gauge(
+    "dio_directory_bytes", "Размер директорий временных файлов", ["directory"]
+)
+
+
+@contextmanager
+def track_vendor_request(vendor: str, operation: str) -> Iterator[None]:
+    """Замеряет запрос к сервису распознавания и учитывает его ошибки"""
+
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        VENDOR_ERRORS.labels(vendor, operation).inc()
+        raise
+    finally:
+        VENDOR_REQUEST_SECONDS.labels(vendor, operation).observe(time.perf_counter() - start)
@@ -0,0 +1,57 @@
+from starlette import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .services.admission import AdmissionError, UploadTooLargeError, get_admission_controller
+
+UPLOAD_PATH = "/meetings/upload"
+
+
+class UploadAdmissionMiddleware:
+    """Допуск загрузок записей до чтения тела запроса.
+
+    Starlette сохраняет multipart тело во временный файл ещё до вызова обработчика,
+    поэтому проверка в зависимости маршрута опоздала бы: перегрузку диска и памяти
+    создаёт само чтение. Размер загрузки берётся из `Content-Length`: сервер не
+    читает тело сверх него, а запрос без длины (`Transfer-Encoding: chunked`)
+    отклоняется, иначе его размер нельзя было бы учесть до чтения.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].endswith(UPLOAD_PATH)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length", b"")
+        if not content_length.isdigit():
+            response = JSONResponse(
+                {"detail": "LENGTH_REQUIRED"}, status_code=status.HTTP_411_LENGTH_REQUIRED
+            )
+            await response(scope, receive, send)
+            return
+        controller = get_admission_controller()
+        try:
+            reserved = controller.reserve_upload(int(content_length))
+        except UploadTooLargeError:
+            response = JSONResponse(
+                {"detail": "UPLOAD_TOO_LARGE"}, status_code=status.HTTP_413_CONTENT_TOO_LARGE
+            )
+            await response(scope, receive, send)
+            return
+        except AdmissionError as e:
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers=e.headers
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release_upload(reserved)
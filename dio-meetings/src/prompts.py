@@ -105,3 +105,27 @@ MINUTES_PROMPT = """\
 
 Формат вывода: Предоставьте готовый, полностью заполненный протокол в формате Markdown, строго соблюдая указанную выше структуру. Используйте заголовки (##), подзаголовки (###), таблицы, списки для максимальной наглядности.
 """  # noqa: E501
+
+CHUNK_SUMMARY_PROMPT = """\
+Ваша роль: Вы — опытный секретарь. Совещание расшифровывается по частям, и протокол будет составлен позже по конспектам всех частей. Ниже расшифровка части №{part_number}. Перед каждой фразой указан таймкод от начала совещания, после фразы в скобках — номер спикера, если он известен.
+
+Составьте подробный конспект этой части в формате Markdown. Не пересказывайте диалог дословно, но сохраните всё, что понадобится для протокола:
+
+- Обсуждаемые вопросы с таймкодами начала обсуждения.
+- Участники: имена, должности и номера спикеров, если они прозвучали.
+- Тезисы выступающих, ключевые аргументы, цифры, названия документов и контрагентов.
+- Споры и альтернативные точки зрения, выявленные проблемы и риски.
+- Принятые решения и поручения: что сделать, ответственный, соисполнители, срок.
+
+Часть может начинаться или заканчиваться на середине обсуждения — не достраивайте недостающее и не делайте выводов о совещании в целом. Если в части нет содержательного обсуждения, так и напишите одной строкой.
+
+Расшифровка части №{part_number}:
+{transcript}
+"""  # noqa: E501
+
+MERGE_MINUTES_PROMPT = MINUTES_PROMPT.replace(
+    "Транскрибация совещания: {transcript}",
+    "Конспекты последовательных частей совещания (составлены по расшифровке, сохраняют "
+    "таймкоды, участников, цифры, решения и поручения; одно обсуждение может продолжаться "
+    "в нескольких частях — объедините его): {summaries}",
+)
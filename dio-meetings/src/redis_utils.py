@@ -0,0 +1,64 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from uuid import uuid4
+
+from redis.asyncio import Redis
+
+from .settings import settings
+
+# Снимает блокировку, только если она ещё принадлежит владельцу токена
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class LockTimeoutError(Exception):
+    """Не дождались освобождения блокировки"""
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Redis:
+    """Общий для процесса клиент Redis с пулом соединений"""
+
+    return Redis.from_url(settings.redis.url, decode_responses=True)
+
+
+@lru_cache(maxsize=1)
+def get_binary_redis() -> Redis:
+    """Клиент Redis без декодирования ответов: для бинарных значений"""
+
+    return Redis.from_url(settings.redis.url)
+
+
+@asynccontextmanager
+async def redis_lock(
+        redis: Redis, key: str, ttl: float, timeout: float, poll_interval: float = 0.05
+) -> AsyncIterator[None]:
+    """Распределённая блокировка на время контекста.
+
+    Блокировка снимается по истечении `ttl` секунд, даже если владелец упал,
+    поэтому `ttl` должен с запасом превышать время работы под блокировкой.
+
+    :param redis: Клиент Redis.
+    :param key: Ключ блокировки.
+    :param ttl: Время жизни блокировки в секундах.
+    :param timeout: Сколько секунд ждать освобождения занятой блокировки.
+    :raises LockTimeoutError: Блокировка не освободилась за `timeout` секунд.
+    """
+
+    token = uuid4().hex
+    deadline = time.monotonic() + timeout
+    while not await redis.set(key, token, nx=True, px=int(ttl * 1000)):
+        if time.monotonic() >= deadline:
+            raise LockTimeoutError(f"Lock `{key}` is held longer than {timeout} s")
+        await asyncio.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, key, token)
@@ -0,0 +1,363 @@
+from typing import Any
+
+import asyncio
+import email.utils
+import functools
+import logging
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from functools import lru_cache
+from http import HTTPStatus
+
+import aiohttp
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from .metrics import CIRCUIT_OPEN, RATE_LIMIT_WAIT_SECONDS, VENDOR_RETRIES
+from .redis_utils import get_redis
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Статусы ответа, после которых запрос имеет смысл повторить
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# После отказа Redis квота не проверяется столько секунд, запросы идут без ограничения
+REDIS_BACKOFF = 5.0
+
+# Корзина хранится в хеше `{tokens, ts}`. Время берётся у Redis, чтобы расхождение
+# часов процессов не влияло на квоту. Токены выдаются в долг: запрос сразу получает
+# место в очереди и время ожидания, а не опрашивает Redis до освобождения токена.
+# `pause_ms` уводит корзину в минус, останавливая выдачу всем процессам.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local pause_ms = tonumber(ARGV[4])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+if pause_ms > 0 then
+    tokens = math.min(tokens, -pause_ms * rate / 1000)
+end
+tokens = tokens - requested
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil((capacity - tokens) * 1000 / rate) + 1000)
+if tokens >= 0 then
+    return 0
+end
+return math.ceil(-tokens * 1000 / rate)
+"""
+
+# Повторы выполняет самый внешний защищённый вызов, вложенные делают одну попытку
+_retrying: ContextVar[bool] = ContextVar("retrying", default=False)
+
+
+class ResilienceError(Exception):
+    pass
+
+
+class CircuitOpenError(ResilienceError):
+    """Автомат разомкнут, запрос к сервису не отправляется"""
+
+    def __init__(self, vendor: str, retry_after: float) -> None:
+        super().__init__(f"Circuit for `{vendor}` is open, retry in {retry_after:.1f} s")
+        self.vendor = vendor
+        self.retry_after = retry_after
+
+
+def _causes(error: BaseException | None) -> Iterator[BaseException]:
+    """Ошибка и цепочка её причин: интеграции оборачивают ошибки HTTP клиентов"""
+
+    while error is not None:
+        yield error
+        error = error.__cause__
+
+
+def is_transient(error: BaseException) -> bool:
+    """Ошибка временная: перегрузка или сбой сервиса, обрыв соединения, таймаут"""
+
+    # Клиент OpenAI уже загружен langchain к моменту ошибки LLM, при старте API он не нужен
+    import openai  # noqa: PLC0415
+
+    for cause in _causes(error):
+        if isinstance(cause, CircuitOpenError):
+            return False
+        # `status` у ошибок aiohttp, `status_code` у ошибок OpenAI клиента
+        status = getattr(cause, "status", None) or getattr(cause, "status_code", None)
+        if isinstance(status, int):
+            return status in TRANSIENT_STATUSES
+        if isinstance(
+            cause, aiohttp.ClientConnectionError | openai.APIConnectionError | TimeoutError
+        ):
+            return True
+    return False
+
+
+def _status(error: BaseException) -> int | None:
+    for cause in _causes(error):
+        status = getattr(cause, "status", None) or getattr(cause, "status_code", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Пауза из заголовка Retry-After ответа: в секундах или датой HTTP"""
+
+    for cause in _causes(error):
+        headers = getattr(cause, "headers", None)
+        if headers is None:
+            headers = getattr(getattr(cause, "response", None), "headers", None)
+        value = headers.get("Retry-After") if headers is not None else None
+        if value is None:
+            continue
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max((date - datetime.now(UTC)).total_seconds(), 0.0)
+    return None
+
+
+class TokenBucket:
+    """Распределённая корзина токенов в Redis, общая для всех процессов.
+
+    Пока Redis недоступен, запросы не ограничиваются: квота защищает от
+    перегрузки сервиса, но не должна останавливать обработку.
+
+    :param redis: Клиент Redis.
+    :param key: Ключ корзины.
+    :param rate: Пополнение, токенов в секунду.
+    :param capacity: Максимум накопленных токенов.
+    """
+
+    def __init__(self, redis: Redis, key: str, rate: float, capacity: int) -> None:
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self._unavailable_until = 0.0
+
+    async def _take(self, tokens: float, pause: float = 0.0) -> float:
+        if time.monotonic() < self._unavailable_until:
+            return 0.0
+        try:
+            wait_ms = await self._script(
+                keys=[self.key], args=[self.rate, self.capacity, tokens, math.ceil(pause * 1000)]
+            )
+        except RedisError:
+            self._unavailable_until = time.monotonic() + REDIS_BACKOFF
+            logger.warning(
+                "Rate limiter `%s` is unavailable, requests are not throttled",
+                self.key, exc_info=True,
+            )
+            return 0.0
+        return int(wait_ms) / 1000
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """Забирает токены, дожидаясь своей очереди.
+
+        :returns: Время ожидания в секундах.
+        """
+
+        wait = await self._take(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def pause(self, seconds: float) -> None:
+        """Останавливает выдачу токенов всем процессам на `seconds` секунд"""
+
+        await self._take(0, pause=seconds)
+
+
+class CircuitBreaker:
+    """Автоматический выключатель запросов к сервису.
+
+    После `failure_threshold` временных ошибок подряд автомат размыкается, и
+    запросы сразу завершаются `CircuitOpenError`, не нагружая сервис. Через
+    `reset_timeout` секунд пропускается один пробный запрос: успех замыкает
+    автомат, ошибка снова размыкает. Состояние у каждого процесса своё.
+    """
+
+    def __init__(
+            self, vendor: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ) -> None:
+        self.vendor = vendor
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    def before_call(self) -> None:
+        """Пропускает запрос или отклоняет его, если автомат разомкнут"""
+
+        if self.opened_at is None:
+            return
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0 or self._probing:
+            raise CircuitOpenError(self.vendor, max(remaining, 0.0))
+        self._probing = True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Circuit for `%s` is closed", self.vendor)
+            CIRCUIT_OPEN.labels(self.vendor).set(0)
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    "Circuit for `%s` is open after %s failures", self.vendor, self.failures
+                )
+                CIRCUIT_OPEN.labels(self.vendor).set(1)
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Освобождает пробный запрос, завершившийся без признаков сбоя сервиса"""
+
+        self._probing = False
+
+
+class VendorGuard:
+    """Квота, повторы и автомат для запросов к одному внешнему сервису.
+
+    Временные ошибки повторяются с экспоненциальной паузой со случайным
+    разбросом, но не раньше, чем просит сервис в Retry-After. Ответ 429
+    останавливает общую корзину, чтобы паузу выдержали все процессы, а не
+    только получивший его.
+    """
+
+    def __init__(
+            self,
+            vendor: str,
+            bucket: TokenBucket | None,
+            breaker: CircuitBreaker,
+            max_attempts: int = 5,
+            base_delay: float = 0.5,
+            max_delay: float = 30.0,
+            max_retry_after: float = 120.0,
+    ) -> None:
+        self.vendor = vendor
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt: int, error: Exception) -> float | None:
+        """Пауза перед повтором или None, если сервис просит ждать слишком долго"""
+
+        delay = random.uniform(  # noqa: S311
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+        requested = retry_after(error)
+        if requested is None:
+            return delay
+        if requested > self.max_retry_after:
+            return None
+        return max(delay, requested)
+
+    async def _attempt[R](
+            self, func: Callable[..., Awaitable[R]], *args: Any, **kwargs: Any
+    ) -> R:
+        self.breaker.before_call()
+        try:
+            if self.bucket is not None:
+                RATE_LIMIT_WAIT_SECONDS.labels(self.vendor).observe(await self.bucket.acquire())
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            # Успехом считается только ответ, прочие ошибки не меняют счётчик отказов
+            if isinstance(e, Exception) and is_transient(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def call[R](self, func: Callable[..., Awaitable[R]], *args: Any, **kwargs: Any) -> R:
+        """Выполняет запрос `func(*args, **kwargs)` с квотой, повторами и автоматом"""
+
+        max_attempts = 1 if _retrying.get() else self.max_attempts
+        token = _retrying.set(True)
+        try:
+            attempt = 1
+            while True:
+                try:
+                    return await self._attempt(func, *args, **kwargs)
+                except Exception as e:
+                    delay = self.backoff(attempt, e) if is_transient(e) else None
+                    # Разомкнутый автомат отклонит повтор, поэтому не ждём его
+                    if delay is None or attempt >= max_attempts or self.breaker.opened_at:
+                        raise
+                    if self.bucket is not None and _status(e) == HTTPStatus.TOO_MANY_REQUESTS:
+                        await self.bucket.pause(delay)
+                    VENDOR_RETRIES.labels(self.vendor).inc()
+                    logger.warning(
+                        "Request to `%s` failed on attempt %s/%s, retry in %.1f s: %r",
+                        self.vendor, attempt, max_attempts, delay, e,
+                    )
+                    await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            _retrying.reset(token)
+
+
+@lru_cache
+def get_vendor_guard(vendor: str) -> VendorGuard:
+    """Общие для процесса квота, повторы и автомат запросов к сервису `vendor`"""
+
+    config = settings.resilience
+    rate = config.rate_limits.get(vendor, 0)
+    bucket = None
+    if rate > 0:
+        capacity = config.burst.get(vendor, math.ceil(rate))
+        bucket = TokenBucket(get_redis(), f"ratelimit:{vendor}", rate, capacity)
+    return VendorGuard(
+        vendor,
+        bucket,
+        CircuitBreaker(vendor, config.failure_threshold, config.reset_timeout),
+        max_attempts=config.max_attempts,
+        base_delay=config.base_delay,
+        max_delay=config.max_delay,
+        max_retry_after=config.max_retry_after,
+    )
+
+
+def resilient[**P, R](
+        vendor: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Оборачивает запрос к сервису `vendor` в квоту, повторы и автомат.
+
+    Повторяется весь вызов функции, поэтому она должна быть безопасной для
+    повтора. Вложенные защищённые вызовы расходуют свою квоту, но не повторяются
+    сами: повтор выполняет внешний вызов.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            return await get_vendor_guard(vendor).call(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
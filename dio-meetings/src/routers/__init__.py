@@ -2,12 +2,22 @@ __all__ = ["router"]
 
 from fastapi import APIRouter
 
+from .live import router as live_router
 from .meetings import router as meeting_router
 from .minutes import router as minutes_router
+from .search import router as search_router
+from .storage import router as storage_router
+from .system import router as system_router
 from .tasks import router as tasks_router
+from .uploads import router as uploads_router
 
 router = APIRouter(prefix="/api/v2")
 
 router.include_router(meeting_router)
+router.include_router(live_router)
+router.include_router(uploads_router)
 router.include_router(tasks_router)
 router.include_router(minutes_router)
+router.include_router(search_router)
+router.include_router(storage_router)
+router.include_router(system_router)
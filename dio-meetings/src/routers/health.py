@@ -0,0 +1,77 @@
+import asyncio
+import itertools
+import logging
+from collections.abc import Awaitable, Callable
+
+from fastapi import APIRouter, Response, status
+from sqlalchemy import text
+
+from ..database.base import engine
+from ..redis_utils import get_redis
+from ..schemas import HealthResponse
+
+# Проверка зависимости дольше этого времени считается неудачной
+CHECK_TIMEOUT = 2.0
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+async def check_database() -> str:
+    """База доступна и схема создана миграциями: `alembic upgrade head`"""
+
+    async with engine.connect() as connection:
+        result = await connection.execute(text("SELECT version_num FROM alembic_version"))
+        version = result.scalar_one_or_none()
+    if version is None:
+        raise RuntimeError("Database schema is not migrated")
+    return f"ok, revision {version}"
+
+
+async def check_redis() -> str:
+    await get_redis().ping()
+    return "ok"
+
+
+CHECKS: dict[str, Callable[[], Awaitable[str]]] = {
+    "database": check_database,
+    "redis": check_redis,
+}
+
+
+async def _run_check(name: str, check: Callable[[], Awaitable[str]]) -> tuple[str, str | None]:
+    try:
+        async with asyncio.timeout(CHECK_TIMEOUT):
+            return name, await check()
+    except Exception:
+        logger.warning("Readiness check `%s` failed", name, exc_info=True)
+        return name, None
+
+
+@router.get(
+    path="/live",
+    status_code=status.HTTP_200_OK,
+    response_model=HealthResponse,
+    summary="Проверка, что процесс API жив",
+)
+async def get_liveness() -> HealthResponse:
+    """Не обращается к базе и Redis: их сбой не лечится перезапуском процесса"""
+
+    return HealthResponse(status="ok")
+
+
+@router.get(
+    path="/ready",
+    status_code=status.HTTP_200_OK,
+    response_model=HealthResponse,
+    summary="Проверка готовности API принимать запросы",
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HealthResponse}},
+)
+async def get_readiness(response: Response) -> HealthResponse:
+    results = await asyncio.gather(*itertools.starmap(_run_check, CHECKS.items()))
+    checks = {name: "failed" if result is None else result for name, result in results}
+    if any(result is None for _, result in results):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthResponse(status="unavailable", checks=checks)
+    return HealthResponse(status="ok", checks=checks)
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from faststream.redis import RedisBroker
+from starlette.websockets import WebSocketState
+
+from ..dependencies import get_live_meeting_service
+from ..schemas import TranscriptSegment
+from ..services.asr import get_asr_engine
+from ..services.live import LiveMeetingService, LiveSession
+from ..services.scheduler import TaskScheduler, get_task_scheduler
+from .tasks import get_broker
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/meetings", tags=["Meetings"])
+
+
+async def receive_audio(websocket: WebSocket, session: LiveSession) -> None:
+    """Передаёт аудио клиента в сессию до сообщения об окончании или разрыва"""
+
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("bytes"):
+            await session.feed(message["bytes"])
+        elif message.get("text"):
+            try:
+                if json.loads(message["text"]).get("type") == "end":
+                    return
+            except (ValueError, AttributeError):
+                logger.warning("Live meeting `%s`: malformed message", session.meeting_id)
+
+
+@router.websocket("/live")
+async def live_meeting(
+        websocket: WebSocket,
+        title: str | None = Query(default=None),
+        service: LiveMeetingService = Depends(get_live_meeting_service),
+        broker: RedisBroker = Depends(get_broker),
+        scheduler: TaskScheduler = Depends(get_task_scheduler),
+) -> None:
+    """Живая встреча: распознавание по мере поступления аудио.
+
+    Клиент присылает бинарные сообщения с PCM s16le 16 кГц моно и текстовое
+    `{"type": "end"}` по окончании встречи. Сервер отвечает сообщениями
+    `started` с идентификатором встречи, `segments` с распознанными фразами по мере
+    готовности и `complete` с идентификатором задачи на генерацию протокола.
+    Если часть фраз распознать не удалось, `complete` содержит `"transcript":
+    "reprocessing"` и номера этих фраз в `failed_chunks`: расшифровка будет заново
+    получена задачей из записи встречи. Иначе `"transcript": "live"`.
+    Разрыв соединения тоже завершает встречу, записанное до разрыва сохраняется.
+    """
+
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def send(message: dict) -> None:
+        if websocket.client_state != WebSocketState.CONNECTED:
+            return
+        async with send_lock:
+            try:
+                await websocket.send_json(message)
+            except (WebSocketDisconnect, RuntimeError):
+                logger.info("Live meeting client disconnected")
+
+    async def send_segments(segments: list[TranscriptSegment]) -> None:
+        await send({
+            "type": "segments",
+            "segments": [segment.model_dump(mode="json") for segment in segments],
+        })
+
+    session = LiveSession(get_asr_engine(), on_segments=send_segments)
+    await send({"type": "started", "meeting_id": str(session.meeting_id)})
+    try:
+        await receive_audio(websocket, session)
+        segments = await session.finish()
+        if not session.archive.size:
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="NO_AUDIO")
+            return
+        task = await service.save(session, segments, title)
+        await scheduler.submit(task, session.duration_ms / 1000)
+        await broker.publish(str(task.id), channel="meeting:minutes:generate")
+    except Exception:
+        logger.exception("Live meeting `%s` failed", session.meeting_id)
+        await session.abort()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    logger.info("Live meeting `%s` saved, task `%s` queued", session.meeting_id, task.id)
+    await send({
+        "type": "complete",
+        "meeting_id": str(session.meeting_id),
+        "task_id": str(task.id),
+        "transcript": "live" if session.complete else "reprocessing",
+        "failed_chunks": sorted(segment.serial_number for segment in session.failed),
+    })
+    if websocket.client_state == WebSocketState.CONNECTED:
+        await websocket.close()
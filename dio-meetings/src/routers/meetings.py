@@ -1,12 +1,38 @@
 import logging
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import (
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 
-from ..database.repositories import MeetingRepository, TranscriptRepository
-from ..dependencies import get_meeting_media_service, get_meeting_repo, get_transcript_repo
-from ..schemas import Meeting, MeetingResponse, MeetingUpdate, Transcript
+from ..database.repositories import (
+    MeetingRepository,
+    TranscriptRepository,
+    TranscriptSegmentRepository,
+)
+from ..dependencies import (
+    get_meeting_media_service,
+    get_meeting_repo,
+    get_segment_repo,
+    get_transcript_repo,
+)
+from ..schemas import (
+    MediaLink,
+    MeetingMedia,
+    MeetingResponse,
+    MeetingUpdate,
+    Transcript,
+    TranscriptSegment,
+)
+from ..services.media_playback import PlaybackLinks, Rendition, get_playback_links
 from ..services.meeting_media import MeetingMediaService
+from ..utils.compression import iter_decompress_text
+from ..utils.responses import stream_json_object
+from ..utils.transcripts import segments_to_markdown
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +65,12 @@ async def update_meeting(
         update: MeetingUpdate,
         repository: MeetingRepository = Depends(get_meeting_repo)
 ) -> MeetingResponse:
-    meeting = await repository.update(meeting_id, **update.model_dump(exclude_none=True))
-    return MeetingResponse.model_validate(meeting)
+    meeting = await repository.update_as(
+        meeting_id, MeetingResponse, **update.model_dump(exclude_none=True)
+    )
+    if meeting is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MEETING_NOT_FOUND")
+    return meeting
 
 
 @router.get(
@@ -51,11 +81,11 @@ async def update_meeting(
 )
 async def get_meeting(
         meeting_id: UUID, repository: MeetingRepository = Depends(get_meeting_repo)
-) -> Meeting:
-    meeting = await repository.read(meeting_id)
-    if not meeting:
+) -> MeetingResponse:
+    meeting = await repository.read_as(meeting_id, MeetingResponse)
+    if meeting is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MEETING_NOT_FOUND")
-    return Meeting.model_validate(meeting)
+    return meeting
 
 
 @router.delete(
@@ -69,6 +99,32 @@ async def delete_meeting(
     return await service.delete(meeting_id)
 
 
+@router.get(
+    path="/{meeting_id}/media",
+    status_code=status.HTTP_200_OK,
+    response_model=MediaLink,
+    summary="Ссылка на воспроизведение записи встречи",
+)
+async def get_meeting_media(
+        meeting_id: UUID,
+        rendition: Rendition = Query("original", description="Исходный файл или аудио-версия"),
+        redirect: bool = Query(False, description="Перенаправить на ссылку (307)"),
+        repository: MeetingRepository = Depends(get_meeting_repo),
+        links: PlaybackLinks = Depends(get_playback_links),
+) -> MediaLink | RedirectResponse:
+    media = await repository.read_as(meeting_id, MeetingMedia)
+    if media is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MEETING_NOT_FOUND")
+    if rendition == "audio" and media.proxy_s3_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="AUDIO_PROXY_NOT_FOUND"
+        )
+    link = await links.get(media, rendition)
+    if redirect:
+        return RedirectResponse(link.url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return link
+
+
 @router.get(
     path="/{meeting_id}/transcript",
     status_code=status.HTTP_200_OK,
@@ -77,17 +133,64 @@ async def delete_meeting(
 )
 async def get_meeting_transcript(
         meeting_id: UUID, repository: TranscriptRepository = Depends(get_transcript_repo)
-) -> Transcript:
-    transcript = await repository.get_by_meeting(meeting_id)
+) -> Response:
+    transcript = await repository.get_compressed_by_meeting(meeting_id)
     if transcript is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="TRANSCRIPT_NOT_FOUND")
-    return transcript
+    info, blob = transcript
+    # Синхронный генератор выполняется в пуле потоков, распаковка не блокирует event loop
+    return StreamingResponse(
+        stream_json_object(info, "full_text", iter_decompress_text(blob)),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    path="/{meeting_id}/transcript/segments",
+    status_code=status.HTTP_200_OK,
+    response_model=list[TranscriptSegment],
+    summary="Фразы расшифровки за интервал времени",
+)
+async def get_transcript_segments(
+        meeting_id: UUID,
+        start_ms: int | None = Query(None, ge=0, description="Начало интервала, мс"),
+        end_ms: int | None = Query(None, ge=0, description="Конец интервала, мс"),
+        speaker: int | None = Query(None, description="Идентификатор спикера"),
+        limit: int = Query(1000, ge=1, le=10_000),
+        repository: TranscriptSegmentRepository = Depends(get_segment_repo),
+) -> list[TranscriptSegment]:
+    return await repository.get_range(
+        meeting_id, start_ms=start_ms, end_ms=end_ms, speaker=speaker, limit=limit
+    )
+
+
+@router.get(
+    path="/{meeting_id}/transcript/markdown",
+    status_code=status.HTTP_200_OK,
+    response_class=PlainTextResponse,
+    summary="Расшифровка за интервал времени в формате Markdown",
+)
+async def get_transcript_markdown(
+        meeting_id: UUID,
+        start_ms: int | None = Query(None, ge=0, description="Начало интервала, мс"),
+        end_ms: int | None = Query(None, ge=0, description="Конец интервала, мс"),
+        repository: TranscriptSegmentRepository = Depends(get_segment_repo),
+) -> PlainTextResponse:
+    segments = await repository.get_range(meeting_id, start_ms=start_ms, end_ms=end_ms)
+    if not segments:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SEGMENTS_NOT_FOUND")
+    return PlainTextResponse(segments_to_markdown(segments), media_type="text/markdown")
 
 
 @router.get(
     path="",
     status_code=status.HTTP_200_OK,
     response_model=list[MeetingResponse],
+    summary="Список встреч",
 )
-async def get_meetings(repo: MeetingRepository = Depends(get_meeting_repo)) -> list[MeetingResponse]:
-    ...
+async def get_meetings(
+        limit: int = Query(100, ge=1, le=1000),
+        offset: int = Query(0, ge=0),
+        repository: MeetingRepository = Depends(get_meeting_repo),
+) -> list[MeetingResponse]:
+    return await repository.list_as(MeetingResponse, limit=limit, offset=offset)
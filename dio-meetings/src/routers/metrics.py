@@ -0,0 +1,39 @@
+from typing import get_args
+
+import anyio
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from ..database.repositories import TaskRepository
+from ..dependencies import get_task_repo
+from ..metrics import DIRECTORY_BYTES, DISK_BYTES, TASKS_BY_STATUS
+from ..schemas import Task
+from ..services.meeting_media import MEDIA_DIR
+from ..services.minutes_export import EXPORTS_DIR
+from ..services.workspace import TASKS_DIR, DiskQuota, directories_usage, get_disk_quota
+
+TASK_STATUSES = get_args(Task.model_fields["status"].annotation)
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/metrics")
+async def get_metrics(
+        repository: TaskRepository = Depends(get_task_repo),
+        disk_quota: DiskQuota = Depends(get_disk_quota),
+) -> Response:
+    """Метрики в формате Prometheus, состояние очереди и диска снимается при запросе"""
+
+    counts = await repository.count_by_status()
+    for task_status in TASK_STATUSES:
+        TASKS_BY_STATUS.labels(task_status).set(counts.get(task_status, 0))
+    usage = disk_quota.usage()
+    DISK_BYTES.labels("total").set(usage.total_bytes)
+    DISK_BYTES.labels("free").set(usage.free_bytes)
+    DISK_BYTES.labels("reserved").set(usage.reserved_bytes)
+    directories = await anyio.to_thread.run_sync(
+        directories_usage, [TASKS_DIR, MEDIA_DIR, EXPORTS_DIR]
+    )
+    for directory in directories:
+        DIRECTORY_BYTES.labels(directory.name).set(directory.size_bytes)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,15 +1,13 @@
-from typing import Literal
-
-from urllib.parse import quote
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response
 
 from ..database.repositories import MinutesRepository
-from ..dependencies import get_minutes_repo
-from ..schemas import Minutes
-from ..utils.docs import md_text_to_pdf
+from ..dependencies import get_minutes_exporter, get_minutes_repo
+from ..schemas import Minutes, MinutesText
+from ..services.minutes_export import ExportFormat, MinutesExporter, content_hash, make_etag
+from ..utils.responses import etag_matches, json_response
 
 router = APIRouter(prefix="/minutes", tags=["Minutes"])
 
@@ -22,11 +20,11 @@ router = APIRouter(prefix="/minutes", tags=["Minutes"])
 )
 async def get_minutes(
         meeting_id: UUID, repository: MinutesRepository = Depends(get_minutes_repo)
-) -> Minutes:
-    minutes = await repository.get_by_meeting(meeting_id)
-    if minutes is None:
+) -> Response:
+    body = await repository.get_json_by_meeting(meeting_id)
+    if body is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MINUTES_NOT_FOUND")
-    return minutes
+    return json_response(body)
 
 
 @router.get(
@@ -37,21 +35,32 @@ async def get_minutes(
 )
 async def download_minutes(
         meeting_id: UUID,
-        extension: Literal["pdf", "docx", "md"] = Query(..., description="Формат файла"),
+        extension: ExportFormat = Query(..., description="Формат файла"),
+        if_none_match: str | None = Header(None),
         repository: MinutesRepository = Depends(get_minutes_repo),
+        exporter: MinutesExporter = Depends(get_minutes_exporter),
 ) -> Response:
-    minutes = await repository.get_by_meeting(meeting_id)
-    if minutes is None:
+    info = await repository.get_export_info(meeting_id)
+    if info is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MINUTES_NOT_FOUND")
-    md_text = minutes.md_text.replace("```", "").replace("markdown", "")
-    match extension:
-        case "pdf":
-            content = md_text_to_pdf(md_text)
-            filename = quote("Протокол_совещания.pdf")
-            return Response(
-                content=content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"attachment; filename*=UTF-8''{filename}"
-                },
+
+    async def load_md_text() -> str:
+        minutes = await repository.read_as(info.id, MinutesText)
+        if minutes is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="MINUTES_NOT_FOUND"
             )
+        return minutes.md_text
+
+    hash_ = info.content_hash or content_hash(await load_md_text())
+    etag = make_etag(hash_, extension)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    exported = await exporter.export(info.id, hash_, extension, load_md_text)
+    return FileResponse(
+        exported.path,
+        media_type=exported.media_type,
+        filename=exported.filename,
+        headers=headers,
+    )
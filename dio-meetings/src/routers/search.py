@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from ..dependencies import get_search_index
+from ..schemas import SearchResponse, SemanticSearchResponse
+from ..services.search import SearchIndex
+from ..services.vector_index import VectorIndex, get_vector_index
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get(
+    path="",
+    status_code=status.HTTP_200_OK,
+    response_model=SearchResponse,
+    summary="Полнотекстовый поиск по расшифровкам и протоколам",
+)
+async def search(
+        q: str = Query(..., min_length=2, max_length=256, description="Поисковый запрос"),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0),
+        index: SearchIndex = Depends(get_search_index),
+) -> SearchResponse:
+    hits = await index.search(q, limit=limit, offset=offset)
+    return SearchResponse(query=q, hits=hits)
+
+
+@router.get(
+    path="/semantic",
+    status_code=status.HTTP_200_OK,
+    response_model=SemanticSearchResponse,
+    summary="Смысловой поиск по истории встреч",
+)
+async def semantic_search(
+        q: str = Query(..., min_length=2, max_length=1024, description="Поисковый запрос"),
+        k: int = Query(10, ge=1, le=100, description="Количество фрагментов"),
+        index: VectorIndex = Depends(get_vector_index),
+) -> SemanticSearchResponse:
+    passages = await index.query(q, k=k)
+    return SemanticSearchResponse(query=q, passages=passages)
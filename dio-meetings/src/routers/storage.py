@@ -0,0 +1,72 @@
+import aiofiles
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse
+
+from .. import s3_utils
+from ..services.media_playback import guess_content_type
+
+router = APIRouter(prefix="/storage", tags=["Storage"], include_in_schema=False)
+
+
+@router.get(
+    path="/{key:path}",
+    status_code=status.HTTP_200_OK,
+    response_class=FileResponse,
+    summary="Объект локального хранилища по подписанной ссылке",
+)
+async def get_storage_object(
+        key: str,
+        expires: int = Query(...),
+        signature: str = Query(...),
+) -> FileResponse:
+    """Раздача объектов при `STORAGE_BACKEND=local`, поддерживает HTTP Range"""
+
+    if not s3_utils.is_local():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NOT_FOUND")
+    if not s3_utils.verify_local_signature(key, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="INVALID_SIGNATURE")
+    try:
+        path = s3_utils.local_path(key)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="OBJECT_NOT_FOUND"
+        ) from None
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="OBJECT_NOT_FOUND")
+    return FileResponse(
+        path,
+        media_type=guess_content_type(path.suffix.lstrip(".")),
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
+
+
+@router.put(
+    path="/{key:path}",
+    status_code=status.HTTP_200_OK,
+    summary="Загрузка части объекта по подписанной ссылке",
+)
+async def put_storage_part(
+        key: str,
+        request: Request,
+        expires: int = Query(...),
+        signature: str = Query(...),
+) -> Response:
+    """Локальный аналог presigned `upload_part`: принимает только части загрузок"""
+
+    if not s3_utils.is_local() or not key.startswith(".uploads/"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NOT_FOUND")
+    if not s3_utils.verify_local_signature(key, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="INVALID_SIGNATURE")
+    try:
+        path = s3_utils.local_path(key)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="OBJECT_NOT_FOUND"
+        ) from None
+    if not path.parent.is_dir():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UPLOAD_NOT_FOUND")
+    async with aiofiles.open(path, mode="wb") as file:
+        async for chunk in request.stream():
+            await file.write(chunk)
+    stat = path.stat()
+    return Response(headers={"ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'})
@@ -0,0 +1,24 @@
+import anyio
+from fastapi import APIRouter, Depends, status
+
+from ..schemas import SystemDiskResponse
+from ..services.meeting_media import MEDIA_DIR
+from ..services.minutes_export import EXPORTS_DIR
+from ..services.workspace import TASKS_DIR, DiskQuota, directories_usage, get_disk_quota
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get(
+    path="/disk",
+    status_code=status.HTTP_200_OK,
+    response_model=SystemDiskResponse,
+    summary="Использование диска временными файлами",
+)
+async def get_disk_usage(
+        disk_quota: DiskQuota = Depends(get_disk_quota),
+) -> SystemDiskResponse:
+    directories = await anyio.to_thread.run_sync(
+        directories_usage, [TASKS_DIR, MEDIA_DIR, EXPORTS_DIR]
+    )
+    return SystemDiskResponse(disk=disk_quota.usage(), directories=directories)
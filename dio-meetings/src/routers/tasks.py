@@ -1,21 +1,51 @@
+from typing import Literal
+
+import logging
 from uuid import UUID
 
-from fastapi import Body, Depends, HTTPException, status
+from fastapi import Body, Depends, Header, HTTPException, Response, status
 from faststream.redis import RedisBroker, fastapi
+from faststream.redis.opentelemetry import RedisTelemetryMiddleware
 
-from ..database.repositories import TaskRepository
-from ..dependencies import get_task_processor, get_task_repo
+from ..database.repositories import MeetingRepository, TaskRepository
+from ..dependencies import (
+    get_meeting_repo,
+    get_task_processor,
+    get_task_repo,
+    get_task_submission_service,
+)
+from ..redis_utils import LockTimeoutError
 from ..schemas import Task
+from ..services.admission import AdmissionError
+from ..services.scheduler import TaskScheduler, get_task_scheduler
 from ..services.task_processing import TaskProcessor
+from ..services.task_submission import IdempotencyKeyReusedError, TaskSubmissionService
 from ..settings import settings
 
-router = fastapi.RedisRouter(url=settings.redis.url, prefix="/tasks", tags=["Tasks"])
+GENERATE_CHANNEL = "meeting:minutes:generate"
+
+logger = logging.getLogger(__name__)
+
+# Контекст трассы передаётся в заголовках сообщения: обработка задачи воркером
+# продолжает трассу запроса, создавшего задачу
+router = fastapi.RedisRouter(
+    url=settings.redis.url,
+    prefix="/tasks",
+    tags=["Tasks"],
+    middlewares=[RedisTelemetryMiddleware()],
+)
 
 
 def get_broker() -> RedisBroker:
     return router.broker
 
 
+async def notify_workers(task_id: UUID) -> None:
+    """Сигнал воркерам, что в очереди планировщика появилась задача"""
+
+    await router.broker.publish(str(task_id), channel=GENERATE_CHANNEL)
+
+
 @router.post(
     path="",
     status_code=status.HTTP_202_ACCEPTED,
@@ -23,14 +53,56 @@ def get_broker() -> RedisBroker:
     summary="Создание задачи на генерацию протокола",
 )
 async def create_task(
+        response: Response,
         meeting_id: UUID = Body(..., embed=True),
-        repository: TaskRepository = Depends(get_task_repo),
+        priority: Literal["high", "normal", "low"] = Body("normal", embed=True),
+        tenant: str | None = Body(
+            None, embed=True, description="Пользователь или команда для разделения очереди"
+        ),
+        regenerate: bool = Body(
+            False, embed=True, description="Создать задачу, даже если протокол уже готов"
+        ),
+        idempotency_key: str | None = Header(None, max_length=255),
+        meeting_repo: MeetingRepository = Depends(get_meeting_repo),
+        service: TaskSubmissionService = Depends(get_task_submission_service),
         broker: RedisBroker = Depends(get_broker),
 ) -> Task:
-    task = Task(meeting_id=meeting_id)
-    await repository.create(task)
-    await broker.publish(str(task.id), channel="meeting:minutes:generate")
-    return task
+    """Задача создаётся, только если у встречи нет задачи в работе или готового
+    протокола, иначе возвращается существующая задача со статусом 200.
+    """
+
+    meeting = await meeting_repo.read(meeting_id)
+    if meeting is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="MEETING_NOT_FOUND")
+    try:
+        submission = await service.submit(
+            meeting,
+            priority=priority,
+            tenant=tenant,
+            idempotency_key=idempotency_key,
+            regenerate=regenerate,
+        )
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers) from e
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="IDEMPOTENCY_KEY_REUSED"
+        ) from e
+    except LockTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="TASK_CREATION_IN_PROGRESS",
+            headers={"Retry-After": "1"},
+        ) from e
+    if not submission.created:
+        response.status_code = status.HTTP_200_OK
+        return submission.task
+    await broker.publish(str(submission.task.id), channel=GENERATE_CHANNEL)
+    if submission.estimated_start is not None:
+        response.headers["X-Estimated-Start"] = submission.estimated_start.isoformat(
+            timespec="seconds"
+        )
+    return submission.task
 
 
 @router.get(
@@ -46,8 +118,26 @@ async def get_task(task_id: UUID, repository: TaskRepository = Depends(get_task_
     return task
 
 
-@router.subscriber("meeting:minutes:generate")
+@router.subscriber(GENERATE_CHANNEL)
 async def process_task(
-        task_id: str, processor: TaskProcessor = Depends(get_task_processor)
+        task_id: str,
+        processor: TaskProcessor = Depends(get_task_processor),
+        repository: TaskRepository = Depends(get_task_repo),
+        scheduler: TaskScheduler = Depends(get_task_scheduler),
 ) -> None:
-    await processor.process(UUID(task_id))
+    # Сообщение только сигнализирует о работе, очерёдность определяет планировщик
+    queued = await scheduler.claim()
+    if queued is None:
+        logger.debug("Queue is empty on task `%s` signal, already taken", task_id)
+        return
+    async with scheduler.running(queued):
+        if queued.attempts >= settings.scheduler.max_attempts:
+            logger.error(
+                "Task `%s` lost its worker %s times, marking it failed",
+                queued.task_id, queued.attempts,
+            )
+            await repository.update(
+                queued.task_id, status="failed", error_message="TASK_WORKER_LOST"
+            )
+            return
+        await processor.process(queued.task_id)
@@ -0,0 +1,152 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
+
+from ..dependencies import get_upload_service
+from ..schemas import (
+    MeetingResponse,
+    PresignedPart,
+    PresignPartsRequest,
+    UploadInit,
+    UploadSession,
+)
+from ..services.admission import (
+    AdmissionController,
+    AdmissionError,
+    UploadTooLargeError,
+    get_admission_controller,
+)
+from ..services.uploads import ResumableUploadService, UploadStateError, expected_part_size
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+async def get_upload(
+        upload_id: UUID, service: ResumableUploadService = Depends(get_upload_service)
+) -> UploadSession:
+    upload = await service.get(upload_id)
+    if upload is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="UPLOAD_NOT_FOUND")
+    return upload
+
+
+@router.post(
+    path="",
+    status_code=status.HTTP_201_CREATED,
+    response_model=UploadSession,
+    summary="Начало возобновляемой загрузки записи встречи",
+)
+async def init_upload(
+        upload_init: UploadInit,
+        service: ResumableUploadService = Depends(get_upload_service),
+) -> UploadSession:
+    try:
+        return await service.init(
+            upload_init.filename,
+            upload_init.size,
+            part_size=upload_init.part_size,
+            direct=upload_init.direct,
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="UPLOAD_TOO_LARGE"
+        ) from e
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers) from e
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e)
+        ) from e
+
+
+@router.get(
+    path="/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=UploadSession,
+    summary="Состояние загрузки и список загруженных частей",
+)
+async def get_upload_session(
+        upload: UploadSession = Depends(get_upload),
+        service: ResumableUploadService = Depends(get_upload_service),
+) -> UploadSession:
+    return await service.refresh(upload)
+
+
+@router.post(
+    path="/{upload_id}/parts/presign",
+    status_code=status.HTTP_200_OK,
+    response_model=list[PresignedPart],
+    summary="Ссылки для загрузки частей напрямую в хранилище",
+)
+async def presign_parts(
+        request: PresignPartsRequest,
+        upload: UploadSession = Depends(get_upload),
+        service: ResumableUploadService = Depends(get_upload_service),
+) -> list[PresignedPart]:
+    try:
+        return await service.presign_parts(upload, request.part_numbers)
+    except UploadStateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+@router.put(
+    path="/{upload_id}/parts/{part_number}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Загрузка части записи",
+)
+async def upload_part(
+        request: Request,
+        part_number: int = Path(..., ge=1),
+        upload: UploadSession = Depends(get_upload),
+        service: ResumableUploadService = Depends(get_upload_service),
+        admission: AdmissionController = Depends(get_admission_controller),
+) -> None:
+    max_size = expected_part_size(upload, part_number)
+    # Части в обработке учитываются вместе с загрузками одним запросом
+    try:
+        reserved = admission.reserve_upload(max_size)
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=e.headers) from e
+    try:
+        # Тело читается потоком с ограничением размера части, без спулинга на диск
+        content = bytearray()
+        async for chunk in request.stream():
+            content.extend(chunk)
+            if len(content) > max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="PART_TOO_LARGE"
+                )
+        await service.upload_part(upload, part_number, bytes(content))
+    except UploadStateError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    finally:
+        admission.release_upload(reserved)
+
+
+@router.post(
+    path="/{upload_id}/complete",
+    status_code=status.HTTP_201_CREATED,
+    response_model=MeetingResponse,
+    summary="Завершение загрузки и создание встречи",
+)
+async def complete_upload(
+        upload: UploadSession = Depends(get_upload),
+        service: ResumableUploadService = Depends(get_upload_service),
+) -> MeetingResponse:
+    try:
+        meeting = await service.complete(upload)
+    except UploadStateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    return MeetingResponse.model_validate(meeting)
+
+
+@router.delete(
+    path="/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Отмена загрузки",
+)
+async def abort_upload(
+        upload: UploadSession = Depends(get_upload),
+        service: ResumableUploadService = Depends(get_upload_service),
+) -> None:
+    await service.abort(upload)
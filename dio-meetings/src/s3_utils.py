@@ -1,74 +1,335 @@
+import hashlib
+import hmac
 import logging
 import math
+import shutil
+import time
 from collections.abc import AsyncIterable
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from urllib.parse import quote
+from uuid import uuid4
 
-from aiobotocore.session import get_session
+import aiofiles
+import anyio
 
+from .metrics import S3_BYTES, S3_REQUEST_SECONDS
 from .settings import settings
+from .tracing import traced
 
-BASE_URL = "https://storage.yandexcloud.net/"
-BUCKET_NAME = "dev-uploads-data"
+BASE_URL = settings.storage.endpoint_url
+BUCKET_NAME = settings.storage.bucket
 
 logger = logging.getLogger(__name__)
 
-session = get_session()
-config = {
-    "service_name": "s3",
-    "endpoint_url": BASE_URL,
-    "aws_access_key_id": settings.yandexcloud.access_key_id,
-    "aws_secret_access_key": settings.yandexcloud.secret_access_key,
-}
+
+@lru_cache(maxsize=1)
+def _get_session():
+    """Сессия botocore и параметры клиента S3.
+
+    Создаются при первом обращении к S3, а не при импорте модуля: aiobotocore
+    загружает описания сервисов, что занимает заметную часть старта API.
+    """
+
+    from aiobotocore.config import AioConfig  # noqa: PLC0415
+    from aiobotocore.session import get_session  # noqa: PLC0415
+
+    config = {
+        "service_name": "s3",
+        "endpoint_url": BASE_URL,
+        "region_name": settings.storage.region,
+        "config": AioConfig(
+            signature_version="s3v4",
+            s3={"addressing_style": "path" if settings.storage.force_path_style else "auto"},
+        ),
+        "aws_access_key_id": settings.yandexcloud.access_key_id,
+        "aws_secret_access_key": settings.yandexcloud.secret_access_key,
+    }
+    return get_session(), config
 
 
 @asynccontextmanager
-async def _get_client():
+async def get_client():
+    """Клиент S3 с настройками хранилища"""
+
+    session, config = _get_session()
     async with session.create_client(**config) as client:
         yield client
 
 
+def is_local() -> bool:
+    """Объекты хранятся на локальном диске вместо S3 (режим разработки)"""
+
+    return settings.storage.backend == "local"
+
+
+def local_path(key: str) -> Path:
+    """Путь к объекту в локальном хранилище"""
+
+    root = settings.storage.local_dir.resolve()
+    path = (root / key).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"Invalid object key: {key}")
+    return path
+
+
+def _sign(key: str, expires: int) -> str:
+    message = f"{key}:{expires}".encode()
+    return hmac.new(settings.storage.signing_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _local_signed_url(key: str, expires_in: int) -> str:
+    expires = int(time.time()) + expires_in
+    return (
+        f"{settings.storage.local_url_prefix}/{quote(key)}"
+        f"?expires={expires}&signature={_sign(key, expires)}"
+    )
+
+
+def verify_local_signature(key: str, expires: int, signature: str) -> bool:
+    """Проверяет подпись и срок действия ссылки на объект локального хранилища"""
+
+    return expires >= time.time() and hmac.compare_digest(_sign(key, expires), signature)
+
+
+@traced("s3.upload")
 async def upload(content: bytes, key: str) -> None:
-    async with _get_client() as client:
-        await client.put_object(Bucket=BUCKET_NAME, Key=key, Body=content)
+    if is_local():
+        path = anyio.Path(local_path(key))
+        await path.parent.mkdir(parents=True, exist_ok=True)
+        await path.write_bytes(content)
+        return
+    async with get_client() as client:
+        with S3_REQUEST_SECONDS.labels("put_object").time():
+            await client.put_object(Bucket=BUCKET_NAME, Key=key, Body=content)
+    S3_BYTES.labels("upload").inc(len(content))
 
 
+@traced("s3.upload_multipart")
 async def upload_multipart(chunks: AsyncIterable[bytes], key: str) -> None:
+    if is_local():
+        path = local_path(key)
+        await anyio.Path(path.parent).mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(path, mode="wb") as file:
+            async for chunk in chunks:
+                await file.write(chunk)
+        return
     upload_id = None
     parts = []
-    async with _get_client() as client:
+    async with get_client() as client:
         part_number = 1
         async for chunk in chunks:
             if upload_id is None:
                 response = await client.create_multipart_upload(Bucket=BUCKET_NAME, Key=key)
                 upload_id = response["UploadId"]
                 logger.info("Initiate multipart uploading, key - `%s`", key)
+            with S3_REQUEST_SECONDS.labels("upload_part").time():
+                response = await client.upload_part(
+                    Bucket=BUCKET_NAME,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=chunk,
+                )
+            S3_BYTES.labels("upload").inc(len(chunk))
+            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            logger.info("Successful upload %s part for key `%s`", part_number, key)
+            part_number += 1
+        await client.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        logger.info("Multipart upload completed %s parts for key `%s`", len(parts), key)
+
+
+def _local_parts_dir(upload_id: str) -> Path:
+    return local_path(f".uploads/{upload_id}")
+
+
+def _concat_parts(parts_dir: Path, part_numbers: list[int], output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as output:
+        for part_number in part_numbers:
+            with (parts_dir / str(part_number)).open("rb") as part:
+                shutil.copyfileobj(part, output, length=1024 * 1024)
+    shutil.rmtree(parts_dir)
+
+
+@traced("s3.create_multipart_upload")
+async def create_multipart_upload(key: str) -> str:
+    """Начинает составную загрузку объекта.
+
+    :returns: Идентификатор загрузки.
+    """
+
+    if is_local():
+        upload_id = uuid4().hex
+        await anyio.Path(_local_parts_dir(upload_id)).mkdir(parents=True)
+        return upload_id
+    async with get_client() as client:
+        response = await client.create_multipart_upload(Bucket=BUCKET_NAME, Key=key)
+        logger.info("Initiate multipart uploading, key - `%s`", key)
+        return response["UploadId"]
+
+
+@traced("s3.upload_part")
+async def upload_part(key: str, upload_id: str, part_number: int, content: bytes) -> str:
+    """Загружает часть составного объекта.
+
+    :returns: ETag загруженной части.
+    """
+
+    if is_local():
+        path = anyio.Path(_local_parts_dir(upload_id) / str(part_number))
+        await path.write_bytes(content)
+        return f'"{hashlib.md5(content, usedforsecurity=False).hexdigest()}"'
+    async with get_client() as client:
+        with S3_REQUEST_SECONDS.labels("upload_part").time():
             response = await client.upload_part(
                 Bucket=BUCKET_NAME,
                 Key=key,
                 UploadId=upload_id,
                 PartNumber=part_number,
-                Body=chunk,
+                Body=content,
             )
-            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
-            logger.info("Successful upload %s part for key `%s`", part_number, key)
-            part_number += 1
+    S3_BYTES.labels("upload").inc(len(content))
+    return response["ETag"]
+
+
+async def create_presigned_upload_part_urls(
+        key: str, upload_id: str, part_numbers: list[int], expires_in: int = 60 * 60
+) -> dict[int, str]:
+    """Временные ссылки для загрузки частей составного объекта напрямую клиентом (PUT).
+
+    :returns: Ссылки по номерам частей.
+    """
+
+    if is_local():
+        return {
+            part_number: _local_signed_url(f".uploads/{upload_id}/{part_number}", expires_in)
+            for part_number in part_numbers
+        }
+    async with get_client() as client:
+        return {
+            part_number: await client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": BUCKET_NAME,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=expires_in,
+            )
+            for part_number in part_numbers
+        }
+
+
+@traced("s3.list_parts")
+async def list_parts(key: str, upload_id: str) -> list[dict]:
+    """Части составной загрузки, уже принятые хранилищем.
+
+    :returns: Части в формате `{"PartNumber": ..., "ETag": ..., "Size": ...}`.
+    """
+
+    if is_local():
+        parts_dir = anyio.Path(_local_parts_dir(upload_id))
+        parts = []
+        async for path in parts_dir.iterdir():
+            if not path.name.isdigit():
+                continue
+            stat = await path.stat()
+            parts.append({
+                "PartNumber": int(path.name),
+                "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+                "Size": stat.st_size,
+            })
+        return sorted(parts, key=itemgetter("PartNumber"))
+    parts = []
+    async with get_client() as client:
+        paginator = client.get_paginator("list_parts")
+        async for page in paginator.paginate(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id):
+            parts.extend(
+                {"PartNumber": part["PartNumber"], "ETag": part["ETag"], "Size": part["Size"]}
+                for part in page.get("Parts", [])
+            )
+    return parts
+
+
+@traced("s3.complete_multipart_upload")
+async def complete_multipart_upload(key: str, upload_id: str, parts: list[dict]) -> None:
+    """Завершает составную загрузку.
+
+    :param parts: Части в формате `{"PartNumber": ..., "ETag": ...}` по возрастанию номера.
+    """
+
+    if is_local():
+        part_numbers = [part["PartNumber"] for part in parts]
+        await anyio.to_thread.run_sync(
+            _concat_parts, _local_parts_dir(upload_id), part_numbers, local_path(key)
+        )
+        return
+    async with get_client() as client:
         await client.complete_multipart_upload(
             Bucket=BUCKET_NAME,
             Key=key,
             UploadId=upload_id,
             MultipartUpload={"Parts": parts},
         )
-        logger.info("Multipart upload completed %s parts for key `%s`", len(parts), key)
+    logger.info("Multipart upload completed %s parts for key `%s`", len(parts), key)
 
 
+@traced("s3.abort_multipart_upload")
+async def abort_multipart_upload(key: str, upload_id: str) -> None:
+    if is_local():
+        await anyio.to_thread.run_sync(
+            lambda: shutil.rmtree(_local_parts_dir(upload_id), ignore_errors=True)
+        )
+        return
+    async with get_client() as client:
+        await client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=key, UploadId=upload_id)
+    logger.info("Multipart upload aborted for key `%s`", key)
+
+
+@traced("s3.download")
 async def download(key: str) -> bytes:
-    async with _get_client() as client:
-        response = await client.get_object(Bucket=BUCKET_NAME, Key=key)
-        return await response["Body"].read()
+    if is_local():
+        return await anyio.Path(local_path(key)).read_bytes()
+    async with get_client() as client:
+        with S3_REQUEST_SECONDS.labels("get_object").time():
+            response = await client.get_object(Bucket=BUCKET_NAME, Key=key)
+            content = await response["Body"].read()
+    S3_BYTES.labels("download").inc(len(content))
+    return content
 
 
+async def download_if_exists(key: str) -> bytes | None:
+    """Скачивает объект или возвращает None, если его нет в бакете"""
+
+    from botocore.exceptions import ClientError  # noqa: PLC0415
+
+    try:
+        return await download(key)
+    except FileNotFoundError:
+        return None
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+            return None
+        raise
+
+
+@traced("s3.download_multipart")
 async def download_multipart(key: str, chunk_size: int = 1024 * 1024) -> AsyncIterable[bytes]:
-    async with _get_client() as client:
+    if is_local():
+        async with aiofiles.open(local_path(key), mode="rb") as file:
+            while chunk := await file.read(chunk_size):
+                yield chunk
+        return
+    async with get_client() as client:
         head = await client.head_object(Bucket=BUCKET_NAME, Key=key)
         size = head["ContentLength"]
         part_numbers = math.ceil(size / chunk_size)
@@ -80,22 +341,42 @@ async def download_multipart(key: str, chunk_size: int = 1024 * 1024) -> AsyncIt
             start = part_number * chunk_size
             end = min((part_number + 1) * chunk_size - 1, size - 1)
             logger.info("Downloading `%s` part %s : bytes %s-%s", key, part_number, start, end)
-            response = await client.get_object(
-                Bucket=BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}"
-            )
-            content = await response["Body"].read()
+            with S3_REQUEST_SECONDS.labels("get_range").time():
+                response = await client.get_object(
+                    Bucket=BUCKET_NAME, Key=key, Range=f"bytes={start}-{end}"
+                )
+                content = await response["Body"].read()
+            S3_BYTES.labels("download").inc(len(content))
             yield content
 
 
+@traced("s3.delete")
 async def delete(key: str) -> None:
-    async with _get_client() as client:
+    if is_local():
+        await anyio.Path(local_path(key)).unlink(missing_ok=True)
+        return
+    async with get_client() as client:
         await client.delete_object(Bucket=BUCKET_NAME, Key=key)
 
 
-async def create_presigned_url(key: str, expires_in: int = 60 * 60) -> str:
-    async with _get_client() as client:
+async def create_presigned_url(
+        key: str, expires_in: int = 60 * 60, content_type: str | None = None
+) -> str:
+    """Временная ссылка на скачивание объекта.
+
+    Для локального хранилища ссылка ведёт на эндпоинт API, подписанный HMAC.
+
+    :param key: Ключ объекта.
+    :param expires_in: Время жизни ссылки в секундах.
+    :param content_type: Переопределение `Content-Type` ответа хранилища.
+    """
+
+    if is_local():
+        return _local_signed_url(key, expires_in)
+    async with get_client() as client:
+        params = {"Bucket": BUCKET_NAME, "Key": key}
+        if content_type is not None:
+            params["ResponseContentType"] = content_type
         return await client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": BUCKET_NAME, "Key": key},
-            ExpiresIn=expires_in
+            "get_object", Params=params, ExpiresIn=expires_in
         )
@@ -7,6 +7,7 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    NonNegativeInt,
     PositiveFloat,
     PositiveInt,
 )
@@ -27,6 +28,7 @@ class Meeting(BaseModel):
     format: str
     size_mb: PositiveFloat
     duration: PositiveFloat
+    proxy_s3_key: str | None = None
 
 
 class MeetingUpdate(BaseModel):
@@ -52,11 +54,69 @@ class MeetingResponse(BaseModel):
     duration: PositiveFloat
 
 
+class MeetingMedia(BaseModel):
+    """Данные встречи, необходимые для выдачи ссылки на воспроизведение"""
+
+    s3_key: str
+    proxy_s3_key: str | None = None
+    media_type: Literal["audio", "video"]
+    format: str
+
+
+class MediaLink(BaseModel):
+    """Схема API ответа `/meetings/{meeting_id}/media`"""
+
+    url: str
+    expires_at: datetime
+    content_type: str
+    rendition: Literal["original", "audio"]
+
+
+class UploadInit(BaseModel):
+    """Начало возобновляемой загрузки записи встречи"""
+
+    filename: str
+    size: PositiveInt = Field(..., description="Размер файла в байтах")
+    part_size: PositiveInt | None = Field(
+        None, le=64 * 1024 * 1024, description="Желаемый размер части в байтах, до 64 МиБ"
+    )
+    direct: bool = Field(False, description="Части загружаются напрямую в хранилище")
+
+
+class UploadSession(BaseModel):
+    """Состояние возобновляемой загрузки"""
+
+    id: UUID = Field(default_factory=uuid4)
+    filename: str
+    size: PositiveInt
+    part_size: PositiveInt
+    parts_count: PositiveInt
+    direct: bool = False
+    uploaded_parts: list[int] = Field(default_factory=list)
+    expires_at: datetime
+    s3_key: str = Field(..., exclude=True)
+    s3_upload_id: str = Field(..., exclude=True)
+
+
+class PresignPartsRequest(BaseModel):
+    part_numbers: list[PositiveInt] = Field(..., min_length=1, max_length=1000)
+
+
+class PresignedPart(BaseModel):
+    """Временная ссылка для загрузки части записи напрямую в хранилище (PUT)"""
+
+    part_number: PositiveInt
+    size: PositiveInt
+    url: str
+    expires_at: datetime
+
+
 class Task(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: UUID = Field(default_factory=uuid4)
     created_at: datetime = Field(default_factory=current_datetime)
+    updated_at: datetime = Field(default_factory=current_datetime)
     meeting_id: UUID
     status: Literal[
         "pending",
@@ -68,6 +128,10 @@ class Task(BaseModel):
         "failed"
     ] = Field(default="pending")
     error_message: str | None = None
+    priority: Literal["high", "normal", "low"] = "normal"
+    tenant: str | None = Field(
+        default=None, description="Пользователь или команда для справедливого распределения"
+    )
 
 
 class Transcript(BaseModel):
@@ -75,7 +139,30 @@ class Transcript(BaseModel):
 
     meeting_id: UUID
     full_text: str
-    words_count: PositiveInt
+    words_count: NonNegativeInt
+
+
+class TranscriptInfo(BaseModel):
+    """Метаданные расшифровки без текста"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    meeting_id: UUID
+    words_count: NonNegativeInt
+
+
+class TranscriptSegment(BaseModel):
+    """Фраза расшифровки с таймкодами относительно начала встречи"""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    meeting_id: UUID
+    chunk: NonNegativeInt
+    start_ms: NonNegativeInt
+    end_ms: NonNegativeInt
+    speaker: int | None = None
+    emotion: str | None = None
+    text: str
 
 
 class Minutes(BaseModel):
@@ -86,3 +173,83 @@ class Minutes(BaseModel):
     meeting_id: UUID
     title: str
     md_text: str
+    content_hash: str | None = None
+
+
+class MinutesExportInfo(BaseModel):
+    """Данные протокола, необходимые для выдачи выгрузки из кеша"""
+
+    id: UUID
+    content_hash: str | None = None
+
+
+class MinutesText(BaseModel):
+    md_text: str
+
+
+class SearchHit(BaseModel):
+    """Найденный фрагмент расшифровки или протокола"""
+
+    meeting_id: UUID
+    kind: Literal["segment", "minutes"]
+    start_ms: int | None = None
+    snippet: str = Field(
+        ..., description="Фрагмент текста, экранированный для HTML, совпадения выделены `<b>`"
+    )
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Схема API ответа `/search`"""
+
+    query: str
+    hits: list[SearchHit]
+
+
+class Passage(BaseModel):
+    """Фрагмент расшифровки или протокола, найденный по смыслу"""
+
+    meeting_id: UUID
+    kind: Literal["segment", "minutes"]
+    start_ms: int | None = None
+    text: str
+    score: float
+
+
+class SemanticSearchResponse(BaseModel):
+    """Схема API ответа `/search/semantic`"""
+
+    query: str
+    passages: list[Passage]
+
+
+class DiskUsage(BaseModel):
+    """Использование диска временными файлами"""
+
+    total_bytes: int
+    used_bytes: int
+    free_bytes: int
+    reserved_bytes: int = Field(..., description="Зарезервировано выполняющимися задачами")
+    min_free_bytes: int
+
+
+class DirectoryUsage(BaseModel):
+    name: str
+    entries: int
+    size_bytes: int
+
+
+class SystemDiskResponse(BaseModel):
+    """Схема API ответа `/system/disk`"""
+
+    disk: DiskUsage
+    directories: list[DirectoryUsage]
+
+
+class HealthResponse(BaseModel):
+    """Схема API ответа `/health/live` и `/health/ready`"""
+
+    status: Literal["ok", "unavailable"]
+    checks: dict[str, str] = Field(
+        default_factory=dict, description="Результат проверки каждой зависимости"
+    )
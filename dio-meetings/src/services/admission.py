@@ -0,0 +1,209 @@
+import math
+import time
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from fastapi import status
+
+from ..metrics import ADMISSION_REJECTIONS
+from ..settings import settings
+from .scheduler import DEFAULT_TENANT, QueuedTask, TaskScheduler, get_task_scheduler
+from .workspace import BYTES_IN_MB, DiskQuota, get_disk_quota
+
+SECONDS_IN_HOUR = 60 * 60
+
+
+class AdmissionError(Exception):
+    """Запрос отклонён из-за перегрузки, его стоит повторить позже.
+
+    :param status_code: 429, если превышена доля пользователя, 503 — если система
+        перегружена целиком.
+    :param detail: Код причины для ответа API.
+    :param retry_after: Через сколько секунд повторить запрос.
+    :param estimated_start: Оценка начала обработки по текущей очереди.
+    """
+
+    def __init__(
+            self,
+            status_code: int,
+            detail: str,
+            retry_after: float,
+            estimated_start: datetime | None = None,
+    ) -> None:
+        super().__init__(f"{detail}, retry after {retry_after:.0f} s")
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+        self.estimated_start = estimated_start
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"Retry-After": str(max(math.ceil(self.retry_after), 1))}
+        if self.estimated_start is not None:
+            headers["X-Estimated-Start"] = self.estimated_start.isoformat(timespec="seconds")
+        return headers
+
+
+class UploadTooLargeError(Exception):
+    """Загрузка больше `max_upload_mb` и не будет допущена и при повторе"""
+
+
+class AdmissionController:
+    """Допуск новой работы с учётом загрузок в процессе, очереди и мощности воркеров.
+
+    Загрузка записи допускается, если она не больше `max_upload_bytes`, не превышено
+    число и суммарный объём одновременных загрузок процесса и на диске хватает
+    места с учётом резервов задач. Задача допускается, если очередь не превышает
+    предел в часах записей на всю систему и на пользователя. Одна задача в пустой
+    системе допускается всегда, даже если превышает предел сама по себе.
+
+    Время начала оценивается по числу воркеров и времени обработки секунды записи:
+    вся очередь и остаток задач в обработке делятся между воркерами поровну.
+    """
+
+    def __init__(
+            self,
+            disk_quota: DiskQuota,
+            scheduler: TaskScheduler,
+            max_uploads: int = 4,
+            max_upload_bytes: int = 8192 * BYTES_IN_MB,
+            upload_retry_after: float = 30,
+            max_queued_seconds: float = 48 * SECONDS_IN_HOUR,
+            max_tenant_queued_seconds: float = 12 * SECONDS_IN_HOUR,
+            workers: int = 2,
+            seconds_per_audio_second: float = 0.25,
+    ) -> None:
+        self.disk_quota = disk_quota
+        self.scheduler = scheduler
+        self.max_uploads = max_uploads
+        self.max_upload_bytes = max_upload_bytes
+        self.upload_retry_after = upload_retry_after
+        self.max_queued_seconds = max_queued_seconds
+        self.max_tenant_queued_seconds = max_tenant_queued_seconds
+        self.workers = workers
+        self.speed = seconds_per_audio_second
+        self.uploads = 0
+        self.upload_bytes = 0
+
+    @staticmethod
+    def _rejection(
+            status_code: int, detail: str, retry_after: float, **kwargs
+    ) -> AdmissionError:
+        ADMISSION_REJECTIONS.labels(detail).inc()
+        return AdmissionError(status_code, detail, retry_after, **kwargs)
+
+    def _check_size(self, size: int) -> None:
+        if size > self.max_upload_bytes:
+            ADMISSION_REJECTIONS.labels("UPLOAD_TOO_LARGE").inc()
+            raise UploadTooLargeError(
+                f"Upload of {size} bytes exceeds {self.max_upload_bytes} bytes"
+            )
+
+    def _check_disk(self, size: int) -> None:
+        usage = self.disk_quota.usage()
+        available = (
+            usage.free_bytes - usage.reserved_bytes - usage.min_free_bytes - self.upload_bytes
+        )
+        if size > available:
+            raise self._rejection(
+                status.HTTP_503_SERVICE_UNAVAILABLE, "DISK_FULL", self.upload_retry_after
+            )
+
+    def check_upload(self, size: int) -> None:
+        """Проверяет размер загрузки и свободное место без резервирования.
+
+        :param size: Размер загрузки в байтах.
+        :raises UploadTooLargeError: Загрузка больше `max_upload_bytes`.
+        :raises AdmissionError: Не хватает места на диске.
+        """
+
+        self._check_size(size)
+        self._check_disk(size)
+
+    def reserve_upload(self, size: int) -> int:
+        """Занимает место загрузки или отклоняет её.
+
+        :param size: Размер тела запроса в байтах.
+        :returns: Зарезервированный объём для `release_upload`.
+        :raises UploadTooLargeError: Загрузка больше `max_upload_bytes`.
+        :raises AdmissionError: Загрузок слишком много или не хватает места на диске.
+        """
+
+        self._check_size(size)
+        if (
+            self.uploads >= self.max_uploads
+            or self.upload_bytes + size > self.max_upload_bytes
+        ):
+            raise self._rejection(
+                status.HTTP_503_SERVICE_UNAVAILABLE, "UPLOADS_OVERLOADED", self.upload_retry_after
+            )
+        self._check_disk(size)
+        self.uploads += 1
+        self.upload_bytes += size
+        return size
+
+    def release_upload(self, size: int) -> None:
+        self.uploads -= 1
+        self.upload_bytes -= size
+
+    def backlog_seconds(self, queue: list[QueuedTask], running: list[QueuedTask]) -> float:
+        """Оценка времени, за которое воркеры разберут очередь и текущие задачи"""
+
+        now = time.time()
+        remaining = sum(
+            max(task.duration * self.speed - (now - (task.started_at or now)), 0.0)
+            for task in running
+        )
+        queued = sum(task.duration * self.speed for task in queue)
+        return (remaining + queued) / self.workers
+
+    async def admit_task(self, tenant: str | None, duration: float) -> datetime:
+        """Проверяет, можно ли поставить задачу в очередь.
+
+        :param tenant: Пользователь или команда задачи.
+        :param duration: Длительность записи в секундах.
+        :returns: Оценка времени начала обработки.
+        :raises AdmissionError: Очередь системы или пользователя переполнена.
+        """
+
+        queue, running = await self.scheduler.snapshot()
+        estimated_start = datetime.fromtimestamp(
+            time.time() + self.backlog_seconds(queue, running), UTC
+        )
+        queued = sum(task.duration for task in queue)
+        if queued and queued + duration > self.max_queued_seconds:
+            excess = queued + duration - self.max_queued_seconds
+            raise self._rejection(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "QUEUE_FULL",
+                excess * self.speed / self.workers,
+                estimated_start=estimated_start,
+            )
+        tenant = tenant or DEFAULT_TENANT
+        tenant_queued = sum(task.duration for task in queue if task.tenant == tenant)
+        if tenant_queued and tenant_queued + duration > self.max_tenant_queued_seconds:
+            excess = tenant_queued + duration - self.max_tenant_queued_seconds
+            raise self._rejection(
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                "TENANT_QUEUE_FULL",
+                excess * self.speed / self.workers,
+                estimated_start=estimated_start,
+            )
+        return estimated_start
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    """Общий для процесса контроллер: учитывает все загрузки процесса"""
+
+    return AdmissionController(
+        get_disk_quota(),
+        get_task_scheduler(),
+        max_uploads=settings.admission.max_uploads,
+        max_upload_bytes=settings.admission.max_upload_mb * BYTES_IN_MB,
+        upload_retry_after=settings.admission.upload_retry_after,
+        max_queued_seconds=settings.admission.max_queued_hours * SECONDS_IN_HOUR,
+        max_tenant_queued_seconds=settings.admission.max_tenant_queued_hours * SECONDS_IN_HOUR,
+        workers=settings.admission.workers,
+        seconds_per_audio_second=settings.admission.seconds_per_audio_second,
+    )
@@ -0,0 +1,354 @@
+from typing import Literal, Protocol
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+from pydantic import BaseModel
+
+from ..integrations import salute_speech, yandex_speechkit
+from ..settings import settings
+from ..tracing import tracer
+from ..utils.media import PCM_BYTES_PER_SECOND, PCM_SAMPLE_RATE
+
+# Кодировки аудио, которые выдают конвейеры подготовки записи
+AudioEncoding = Literal["PCM_S16LE", "MP3"]
+# Средний битрейт MP3 фрагментов для оценки длительности по размеру
+MP3_BYTES_PER_SECOND = 256_000 // 8
+BYTES_IN_GB = 1024 * 1024 * 1024
+# Предел роста паузы для движка после нескольких отказов подряд
+MAX_COOLDOWN_STEPS = 10
+
+logger = logging.getLogger(__name__)
+
+
+class ASRError(Exception):
+    pass
+
+
+class NoEngineAvailableError(ASRError):
+    """Ни один движок не может распознать запись"""
+
+
+class RecognizedPhrase(BaseModel):
+    """Распознанная фраза, общая для всех движков"""
+
+    text: str
+    speaker: int | None = None
+    emotion: str | None = None
+    start_ms: int = 0
+    end_ms: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class ASRCapabilities:
+    """Возможности движка распознавания.
+
+    Attributes:
+        max_payload_bytes: Максимальный размер аудио в одном запросе.
+        encodings: Поддерживаемые кодировки аудио.
+        diarization: Движок размечает спикеров.
+        cost_per_minute: Условная стоимость минуты аудио для маршрутизации.
+    """
+
+    max_payload_bytes: int
+    encodings: frozenset[AudioEncoding]
+    diarization: bool
+    cost_per_minute: float = 1.0
+
+
+class ASREngine(Protocol):
+    """Движок распознавания речи"""
+
+    name: str
+
+    @property
+    def capabilities(self) -> ASRCapabilities:
+        """Возможности движка: маршрутизатор вычисляет их по своим движкам"""
+
+    async def recognize(
+            self, audio: bytes, encoding: AudioEncoding, duration_ms: int | None = None
+    ) -> list[RecognizedPhrase]:
+        """Распознаёт аудио, таймкоды фраз отсчитываются от начала аудио"""
+
+
+def estimate_duration_ms(audio: bytes, encoding: AudioEncoding) -> int:
+    bytes_per_second = PCM_BYTES_PER_SECOND if encoding == "PCM_S16LE" else MP3_BYTES_PER_SECOND
+    return len(audio) * 1000 // bytes_per_second
+
+
+class SaluteSpeechEngine:
+    name = "salute"
+    capabilities = ASRCapabilities(
+        max_payload_bytes=BYTES_IN_GB,
+        encodings=frozenset({"PCM_S16LE", "MP3"}),
+        diarization=True,
+        cost_per_minute=settings.asr.salute_cost,
+    )
+
+    async def recognize(  # noqa: PLR6301
+            self, audio: bytes, encoding: AudioEncoding, duration_ms: int | None = None  # noqa: ARG002
+    ) -> list[RecognizedPhrase]:
+        results = await salute_speech.recognize_async(audio, audio_encoding=encoding)
+        return [
+            RecognizedPhrase.model_construct(
+                text=result.text,
+                speaker=result.speaker,
+                emotion=result.emotion,
+                start_ms=result.start_ms,
+                end_ms=result.end_ms,
+            )
+            for result in results
+        ]
+
+
+class SpeechKitEngine:
+    name = "speechkit"
+    capabilities = ASRCapabilities(
+        max_payload_bytes=BYTES_IN_GB // 2,
+        encodings=frozenset({"PCM_S16LE", "MP3"}),
+        # Метки спикеров SpeechKit v3 не разбираются, фразы приходят без спикера
+        diarization=False,
+        cost_per_minute=settings.asr.speechkit_cost,
+    )
+
+    async def recognize(  # noqa: PLR6301
+            self, audio: bytes, encoding: AudioEncoding, duration_ms: int | None = None
+    ) -> list[RecognizedPhrase]:
+        duration_ms = duration_ms or estimate_duration_ms(audio, encoding)
+        results = await yandex_speechkit.recognize_async(
+            audio,
+            sample_rate=PCM_SAMPLE_RATE,
+            audio_encoding="LINEAR16_PCM" if encoding == "PCM_S16LE" else "MP3",
+            max_wait_time=max(300, duration_ms // 1000),
+        )
+        return [
+            RecognizedPhrase(text=result.text, start_ms=result.start_ms, end_ms=result.end_ms)
+            for result in results
+        ]
+
+
+class FakeASREngine:
+    """Детерминированный движок для нагрузочных тестов без обращения к вендорам.
+
+    Выдаёт фразу на каждые `phrase_ms` аудио, текст зависит только от содержимого
+    аудио. Задержка ответа — `latency` секунд плюс `latency_per_minute` на минуту аудио.
+    """
+
+    WORDS = (
+        "бюджет", "проект", "срок", "задача", "клиент", "релиз", "команда", "план",
+        "договор", "отчёт", "решение", "качество", "риск", "оплата", "запуск", "встреча",
+    )
+
+    def __init__(
+            self,
+            name: str = "fake",
+            latency: float = 0.0,
+            latency_per_minute: float = 0.0,
+            phrase_ms: int = 5_000,
+            capabilities: ASRCapabilities | None = None,
+    ) -> None:
+        self.name = name
+        self.latency = latency
+        self.latency_per_minute = latency_per_minute
+        self.phrase_ms = phrase_ms
+        self.capabilities = capabilities or ASRCapabilities(
+            max_payload_bytes=BYTES_IN_GB,
+            encodings=frozenset({"PCM_S16LE", "MP3"}),
+            diarization=True,
+            cost_per_minute=0.0,
+        )
+
+    def _phrase(self, seed: bytes, number: int) -> str:
+        digest = hashlib.blake2b(seed + number.to_bytes(4, "little"), digest_size=8).digest()
+        return " ".join(self.WORDS[byte % len(self.WORDS)] for byte in digest[:6])
+
+    async def recognize(
+            self, audio: bytes, encoding: AudioEncoding, duration_ms: int | None = None
+    ) -> list[RecognizedPhrase]:
+        duration_ms = duration_ms or estimate_duration_ms(audio, encoding)
+        await asyncio.sleep(self.latency + self.latency_per_minute * duration_ms / 60_000)
+        seed = hashlib.blake2b(audio, digest_size=16).digest()
+        return [
+            RecognizedPhrase(
+                text=self._phrase(seed, number),
+                speaker=number % 2,
+                start_ms=start_ms,
+                end_ms=min(start_ms + self.phrase_ms, duration_ms),
+            )
+            for number, start_ms in enumerate(range(0, duration_ms, self.phrase_ms))
+        ]
+
+
+@dataclass(slots=True)
+class EngineState:
+    """Состояние движка в маршрутизаторе"""
+
+    engine: ASREngine
+    max_concurrency: int
+    in_flight: int = 0
+    # Скользящее среднее времени распознавания минуты аудио, в секундах
+    seconds_per_minute: float = 10.0
+    unavailable_until: float = 0.0
+    failures: int = 0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    def expected_wait(self, duration_minutes: float) -> float:
+        """Оценка времени ответа с учётом очереди к движку"""
+
+        queue = self.in_flight / self.max_concurrency
+        return (queue + 1) * self.seconds_per_minute * max(duration_minutes, 1 / 60)
+
+
+class ASRRouter:
+    """Маршрутизатор распознавания по нескольким движкам.
+
+    Движок выбирается среди подходящих по кодировке и размеру аудио: по стратегии
+    `load` — с минимальным ожидаемым временем ответа с учётом числа запросов в
+    работе, по стратегии `cost` — самый дешёвый, при равной стоимости менее
+    загруженный. Если движок не ответил за отведённое время или вернул ошибку,
+    запрос переходит к следующему, а отказавший движок исключается на `cooldown`
+    секунд. Маршрутизатор сам реализует протокол `ASREngine`.
+    """
+
+    name = "router"
+
+    def __init__(
+            self,
+            engines: Sequence[tuple[ASREngine, int]],
+            strategy: Literal["load", "cost"] = "load",
+            timeout_per_minute: float = 60.0,
+            min_timeout: float = 120.0,
+            cooldown: float = 60.0,
+    ) -> None:
+        self.states = list(itertools.starmap(EngineState, engines))
+        self.strategy = strategy
+        self.timeout_per_minute = timeout_per_minute
+        self.min_timeout = min_timeout
+        self.cooldown = cooldown
+
+    @property
+    def capabilities(self) -> ASRCapabilities:
+        return ASRCapabilities(
+            max_payload_bytes=max(s.engine.capabilities.max_payload_bytes for s in self.states),
+            encodings=frozenset().union(*(s.engine.capabilities.encodings for s in self.states)),
+            diarization=any(s.engine.capabilities.diarization for s in self.states),
+            cost_per_minute=min(s.engine.capabilities.cost_per_minute for s in self.states),
+        )
+
+    def candidates(
+            self, size: int, encoding: AudioEncoding, duration_minutes: float
+    ) -> list[EngineState]:
+        """Подходящие движки в порядке предпочтения"""
+
+        suitable = [
+            state for state in self.states
+            if encoding in state.engine.capabilities.encodings
+            and size <= state.engine.capabilities.max_payload_bytes
+        ]
+        if self.strategy == "cost":
+            def key(state: EngineState) -> tuple:
+                return (
+                    not state.available,
+                    state.engine.capabilities.cost_per_minute,
+                    state.expected_wait(duration_minutes),
+                )
+        else:
+            def key(state: EngineState) -> tuple:
+                return (not state.available, state.expected_wait(duration_minutes))
+        return sorted(suitable, key=key)
+
+    async def _call(
+            self,
+            state: EngineState,
+            audio: bytes,
+            encoding: AudioEncoding,
+            duration_ms: int,
+    ) -> list[RecognizedPhrase]:
+        duration_minutes = duration_ms / 60_000
+        timeout = max(self.min_timeout, self.timeout_per_minute * duration_minutes)
+        state.in_flight += 1
+        start = time.monotonic()
+        try:
+            with tracer.start_as_current_span(
+                "asr.recognize",
+                attributes={
+                    "asr.engine": state.engine.name,
+                    "asr.encoding": encoding,
+                    "asr.duration_ms": duration_ms,
+                    "asr.bytes": len(audio),
+                },
+            ):
+                async with asyncio.timeout(timeout):
+                    phrases = await state.engine.recognize(audio, encoding, duration_ms)
+        finally:
+            state.in_flight -= 1
+        elapsed = time.monotonic() - start
+        if duration_minutes > 0:
+            state.seconds_per_minute = (
+                0.8 * state.seconds_per_minute + 0.2 * elapsed / duration_minutes
+            )
+        state.failures = 0
+        return phrases
+
+    async def recognize(
+            self, audio: bytes, encoding: AudioEncoding, duration_ms: int | None = None
+    ) -> list[RecognizedPhrase]:
+        duration_ms = duration_ms or estimate_duration_ms(audio, encoding)
+        candidates = self.candidates(len(audio), encoding, duration_ms / 60_000)
+        if not candidates:
+            raise NoEngineAvailableError(
+                f"No ASR engine accepts {encoding} audio of {len(audio)} bytes"
+            )
+        errors = []
+        for state in candidates:
+            try:
+                return await self._call(state, audio, encoding, duration_ms)
+            except Exception as e:
+                state.failures += 1
+                state.unavailable_until = (
+                    time.monotonic() + self.cooldown * min(state.failures, MAX_COOLDOWN_STEPS)
+                )
+                errors.append(e)
+                logger.exception("ASR engine `%s` failed, failing over", state.engine.name)
+        raise NoEngineAvailableError(
+            f"All ASR engines failed: {', '.join(repr(e) for e in errors)}"
+        ) from errors[-1]
+
+
+ENGINES: dict[str, Callable[[], ASREngine]] = {
+    "salute": SaluteSpeechEngine,
+    "speechkit": SpeechKitEngine,
+}
+
+
+@lru_cache(maxsize=1)
+def get_asr_engine() -> ASRRouter:
+    """Общий для процесса маршрутизатор: учитывает запросы всех задач процесса"""
+
+    engines: list[tuple[ASREngine, int]] = []
+    for name in settings.asr.engines:
+        engine: ASREngine
+        if name == "fake":
+            engine = FakeASREngine(
+                latency=settings.asr.fake_latency,
+                latency_per_minute=settings.asr.fake_latency_per_minute,
+            )
+        else:
+            engine = ENGINES[name]()
+        engines.append((engine, settings.asr.max_concurrency))
+    return ASRRouter(
+        engines,
+        strategy=settings.asr.strategy,
+        timeout_per_minute=settings.asr.timeout_per_minute,
+        min_timeout=settings.asr.min_timeout,
+        cooldown=settings.asr.cooldown,
+    )
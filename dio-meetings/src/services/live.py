@@ -0,0 +1,338 @@
+import asyncio
+import logging
+import struct
+from collections.abc import Awaitable, Callable
+from uuid import uuid4
+
+import audioop
+
+from .. import s3_utils
+from ..database import repositories
+from ..database.unit_of_work import UnitOfWork
+from ..schemas import Meeting, Task, Transcript, TranscriptSegment
+from ..settings import settings
+from ..utils.media import PCM_BYTES_PER_SECOND, PCM_SAMPLE_RATE, PcmSegment
+from ..utils.transcripts import count_words, segments_to_markdown
+from .asr import ASREngine
+from .search import SearchIndex
+from .vector_index import VectorIndex, get_vector_index
+
+# Длительность кадра VAD
+FRAME_MS = 30
+FRAME_BYTES = PCM_BYTES_PER_SECOND * FRAME_MS // 1000
+# Минимальный размер части составной загрузки S3, кроме последней
+ARCHIVE_PART_SIZE = 8 * 1024 * 1024
+# Значение размеров в заголовке WAV, когда итоговая длина записи неизвестна
+UNKNOWN_WAV_SIZE = 0xFFFFFFFF
+
+logger = logging.getLogger(__name__)
+
+SegmentsCallback = Callable[[list[TranscriptSegment]], Awaitable[None]]
+
+
+def wav_header(data_size: int = UNKNOWN_WAV_SIZE) -> bytes:
+    """Заголовок WAV для PCM s16le 16 кГц моно"""
+
+    riff_size = UNKNOWN_WAV_SIZE if data_size == UNKNOWN_WAV_SIZE else data_size + 36
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, 1, PCM_SAMPLE_RATE, PCM_BYTES_PER_SECOND, 2, 16,
+        b"data", data_size,
+    )
+
+
+class EnergyVAD:
+    """Нарезка живого PCM потока на фразы по энергии сигнала.
+
+    Поток делится на кадры по `FRAME_MS` мс, кадр с RMS выше `threshold` считается
+    речью. Фрагмент закрывается после `silence_ms` тишины либо принудительно по
+    достижении `max_segment_ms`. Фрагменты, в которых речи меньше `min_speech_ms`
+    (щелчки, шум), отбрасываются. Тишина между фразами не отправляется на
+    распознавание, но учитывается в смещениях.
+    """
+
+    def __init__(
+            self,
+            threshold: int = settings.live.vad_threshold,
+            silence_ms: int = settings.live.silence_ms,
+            min_speech_ms: int = settings.live.min_speech_ms,
+            max_segment_ms: int = settings.live.max_segment_ms,
+    ) -> None:
+        self.threshold = threshold
+        self.silence_frames = silence_ms // FRAME_MS
+        self.min_speech_frames = max(min_speech_ms // FRAME_MS, 1)
+        self.max_segment_bytes = max_segment_ms * PCM_BYTES_PER_SECOND // 1000
+        self._pending = b""
+        self._segment = bytearray()
+        self._segment_offset_ms = 0
+        self._silent_frames = 0
+        self._speech_frames = 0
+        self._position_ms = 0
+        self._serial_number = 0
+
+    def _close(self) -> PcmSegment:
+        segment = PcmSegment(self._serial_number, self._segment_offset_ms, bytes(self._segment))
+        self._serial_number += 1
+        self._reset()
+        return segment
+
+    def _reset(self) -> None:
+        self._segment.clear()
+        self._silent_frames = 0
+        self._speech_frames = 0
+
+    def feed(self, pcm: bytes) -> list[PcmSegment]:
+        """Принимает очередную порцию PCM и возвращает закрытые фрагменты"""
+
+        data = self._pending + pcm
+        usable = len(data) - len(data) % FRAME_BYTES
+        self._pending = data[usable:]
+        segments = []
+        for start in range(0, usable, FRAME_BYTES):
+            frame = data[start:start + FRAME_BYTES]
+            is_speech = audioop.rms(frame, 2) >= self.threshold
+            if self._segment or is_speech:
+                if not self._segment:
+                    self._segment_offset_ms = self._position_ms
+                self._segment.extend(frame)
+                self._speech_frames += is_speech
+                self._silent_frames = 0 if is_speech else self._silent_frames + 1
+                pause = self._silent_frames >= self.silence_frames
+                if pause and self._speech_frames < self.min_speech_frames:
+                    self._reset()
+                elif pause or len(self._segment) >= self.max_segment_bytes:
+                    segments.append(self._close())
+            self._position_ms += FRAME_MS
+        return segments
+
+    def flush(self) -> PcmSegment | None:
+        """Закрывает последний фрагмент по окончании потока"""
+
+        if self._pending and self._segment:
+            self._segment.extend(self._pending)
+        self._pending = b""
+        if self._speech_frames < self.min_speech_frames:
+            self._reset()
+            return None
+        return self._close()
+
+
+class StreamingArchive:
+    """Запись живого потока в хранилище как WAV через составную загрузку.
+
+    Данные копятся до `ARCHIVE_PART_SIZE` и отправляются частями, поэтому память
+    не растёт с длительностью встречи. Длина записи заранее неизвестна, поэтому
+    для записей длиннее одной части размеры в заголовке WAV заполняются значением
+    «неизвестно», которое понимают ffmpeg и браузеры.
+    """
+
+    def __init__(self, s3_key: str) -> None:
+        self.s3_key = s3_key
+        self.size = 0
+        self._upload_id: str | None = None
+        self._buffer = bytearray()
+        self._parts: list[dict] = []
+
+    async def _upload_part(self, content: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = await s3_utils.create_multipart_upload(self.s3_key)
+        part_number = len(self._parts) + 1
+        etag = await s3_utils.upload_part(self.s3_key, self._upload_id, part_number, content)
+        self._parts.append({"PartNumber": part_number, "ETag": etag})
+
+    async def write(self, pcm: bytes) -> None:
+        if not self.size:
+            self._buffer.extend(wav_header())
+        self._buffer.extend(pcm)
+        self.size += len(pcm)
+        if len(self._buffer) >= ARCHIVE_PART_SIZE:
+            content = bytes(self._buffer)
+            self._buffer.clear()
+            await self._upload_part(content)
+
+    async def close(self) -> None:
+        if not self.size:
+            return
+        if self._upload_id is None:
+            # Вся запись уместилась в буфер: заголовок с точной длиной
+            await s3_utils.upload(wav_header(self.size) + self._buffer[44:], key=self.s3_key)
+            return
+        if self._buffer:
+            await self._upload_part(bytes(self._buffer))
+        await s3_utils.complete_multipart_upload(self.s3_key, self._upload_id, self._parts)
+
+    async def abort(self) -> None:
+        if self._upload_id is not None:
+            await s3_utils.abort_multipart_upload(self.s3_key, self._upload_id)
+
+
+class LiveSession:
+    """Живая встреча: архивирует поток, режет его на фразы и распознаёт их на лету.
+
+    Распознанные фразы передаются в `on_segments` по мере готовности, не дожидаясь
+    окончания встречи. Одновременно распознаётся не более `max_concurrency` фраз.
+    Фразы, которые не удалось распознать, повторно отправляются в `asr` по
+    окончании встречи; оставшиеся нераспознанными перечислены в `failed`.
+    """
+
+    def __init__(
+            self,
+            asr: ASREngine,
+            on_segments: SegmentsCallback,
+            max_concurrency: int = settings.live.max_concurrency,
+    ) -> None:
+        self.meeting_id = uuid4()
+        self.asr = asr
+        self.on_segments = on_segments
+        self.vad = EnergyVAD()
+        self.archive = StreamingArchive(f"{self.meeting_id}.wav")
+        self.segments: list[TranscriptSegment] = []
+        self.failed: list[PcmSegment] = []
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def duration_ms(self) -> int:
+        return self.archive.size * 1000 // PCM_BYTES_PER_SECOND
+
+    @property
+    def complete(self) -> bool:
+        """Распознаны все фразы встречи"""
+
+        return not self.failed
+
+    async def _recognize(self, segment: PcmSegment) -> None:
+        try:
+            async with self._semaphore:
+                phrases = await self.asr.recognize(
+                    segment.content, "PCM_S16LE", duration_ms=segment.duration_ms
+                )
+        except Exception:
+            logger.exception(
+                "Live recognition of meeting `%s` chunk %s failed",
+                self.meeting_id, segment.serial_number,
+            )
+            self.failed.append(segment)
+            return
+        segments = [
+            TranscriptSegment(
+                meeting_id=self.meeting_id,
+                chunk=segment.serial_number,
+                start_ms=segment.offset_ms + phrase.start_ms,
+                end_ms=segment.offset_ms + phrase.end_ms,
+                speaker=phrase.speaker,
+                emotion=phrase.emotion,
+                text=phrase.text,
+            )
+            for phrase in phrases
+        ]
+        self.segments.extend(segments)
+        if segments:
+            await self.on_segments(segments)
+
+    def _submit(self, segment: PcmSegment) -> None:
+        task = asyncio.create_task(self._recognize(segment))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def feed(self, pcm: bytes) -> None:
+        """Принимает кадр PCM s16le 16 кГц моно от клиента"""
+
+        await self.archive.write(pcm)
+        for segment in self.vad.feed(pcm):
+            self._submit(segment)
+
+    async def finish(self) -> list[TranscriptSegment]:
+        """Дожидается распознавания последних фраз и закрывает архив записи.
+
+        Нераспознанные фразы отправляются в `asr` ещё раз: маршрутизатор выберет
+        движок, не отказывавший за время встречи. Если распознать их так и не
+        удалось, они остаются в `failed`, а `complete` ложно.
+
+        :returns: Распознанные фразы встречи в порядке времени.
+        """
+
+        if (segment := self.vad.flush()) is not None:
+            self._submit(segment)
+        await asyncio.gather(*self._tasks)
+        failed, self.failed = self.failed, []
+        await asyncio.gather(*map(self._recognize, failed))
+        if self.failed:
+            logger.error(
+                "Live recognition of meeting `%s` failed for chunks %s",
+                self.meeting_id, sorted(segment.serial_number for segment in self.failed),
+            )
+        await self.archive.close()
+        return sorted(self.segments, key=lambda segment: segment.start_ms)
+
+    async def abort(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await self.archive.abort()
+
+
+class LiveMeetingService:
+    """Сохранение живой встречи после её окончания"""
+
+    def __init__(
+            self,
+            meeting_repo: repositories.MeetingRepository,
+            task_repo: repositories.TaskRepository,
+            transcript_repo: repositories.TranscriptRepository,
+            segment_repo: repositories.TranscriptSegmentRepository,
+            search_index: SearchIndex,
+            uow: UnitOfWork,
+            vector_index_factory: Callable[[], VectorIndex] = get_vector_index,
+    ) -> None:
+        self.meeting_repo = meeting_repo
+        self.task_repo = task_repo
+        self.transcript_repo = transcript_repo
+        self.segment_repo = segment_repo
+        self.search_index = search_index
+        # Индекс открывается при сохранении встречи, а не при подключении клиента
+        self.vector_index_factory = vector_index_factory
+        self.uow = uow
+
+    async def save(
+            self, session: LiveSession, segments: list[TranscriptSegment], title: str | None
+    ) -> Task:
+        """Создаёт встречу с готовой расшифровкой и задачу на генерацию протокола.
+
+        Расшифровка уже есть, поэтому обработка задачи сразу переходит к генерации.
+        Если часть фраз распознать не удалось, неполная расшифровка не сохраняется:
+        задача распознаёт архив записи целиком, как для загруженной встречи.
+        """
+
+        meeting = Meeting(
+            id=session.meeting_id,
+            original_filename=f"live-{session.meeting_id}.wav",
+            title=title,
+            media_type="audio",
+            s3_key=session.archive.s3_key,
+            format="wav",
+            size_mb=max(round(session.archive.size / (1024 * 1024), 2), 0.01),
+            duration=max(session.duration_ms / 1000, 0.001),
+        )
+        transcript = Transcript(
+            meeting_id=meeting.id,
+            full_text=segments_to_markdown(segments),
+            words_count=count_words(segments),
+        )
+        task = Task(meeting_id=meeting.id)
+        if not session.complete:
+            async with self.uow:
+                await self.meeting_repo.create(meeting)
+                await self.task_repo.create(task)
+            return task
+        async with self.uow:
+            await self.meeting_repo.create(meeting)
+            await self.transcript_repo.create(transcript)
+            await self.segment_repo.bulk_create(segments)
+            await self.search_index.index_segments(segments)
+            await self.task_repo.create(task)
+        try:
+            await self.vector_index_factory().add_transcript(meeting.id, segments)
+        except Exception:
+            logger.exception("Vector indexing of meeting `%s` transcript failed", meeting.id)
+        return task
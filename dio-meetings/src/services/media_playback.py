@@ -0,0 +1,86 @@
+from typing import Literal
+
+import logging
+import mimetypes
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from .. import s3_utils
+from ..schemas import MediaLink, MeetingMedia
+from ..settings import settings
+
+Rendition = Literal["original", "audio"]
+
+# Максимальное число ссылок в кеше процесса
+MAX_CACHED_LINKS = 4096
+
+logger = logging.getLogger(__name__)
+
+
+def guess_content_type(file_format: str) -> str:
+    content_type, _ = mimetypes.guess_type(f"media.{file_format}")
+    return content_type or "application/octet-stream"
+
+
+class PlaybackLinks:
+    """Кеш коротко живущих presigned ссылок на записи встреч.
+
+    Ссылка переиспользуется, пока у неё остаётся не меньше половины времени жизни,
+    поэтому повторные запросы плеера не подписываются заново, а клиент всегда
+    получает ссылку, действующую ещё минимум `ttl / 2` секунд. Сами байты записи
+    клиент получает напрямую из хранилища, минуя процессы API.
+    """
+
+    def __init__(self, ttl: int, max_size: int = MAX_CACHED_LINKS) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: OrderedDict[tuple[str, Rendition], MediaLink] = OrderedDict()
+
+    def _get_cached(self, cache_key: tuple[str, Rendition]) -> MediaLink | None:
+        link = self._cache.get(cache_key)
+        if link is None:
+            return None
+        if link.expires_at.timestamp() - time.time() < self.ttl / 2:
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return link
+
+    async def get(self, media: MeetingMedia, rendition: Rendition = "original") -> MediaLink:
+        """Возвращает ссылку на воспроизведение записи.
+
+        :param media: Данные о записи встречи.
+        :param rendition: `original` — исходный файл, `audio` — облегчённая аудио-версия.
+        """
+
+        if rendition == "audio":
+            if media.proxy_s3_key is None:
+                raise ValueError("Audio proxy is not available for this meeting")
+            key, content_type = media.proxy_s3_key, "audio/mpeg"
+        else:
+            key, content_type = media.s3_key, guess_content_type(media.format)
+        cache_key = (key, rendition)
+        if (link := self._get_cached(cache_key)) is not None:
+            return link
+        expires_at = int(time.time()) + self.ttl
+        url = await s3_utils.create_presigned_url(
+            key, expires_in=self.ttl, content_type=content_type
+        )
+        link = MediaLink(
+            url=url,
+            expires_at=datetime.fromtimestamp(expires_at, tz=UTC),
+            content_type=content_type,
+            rendition=rendition,
+        )
+        self._cache[cache_key] = link
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        logger.info("Issued playback link for `%s`, expires at %s", key, link.expires_at)
+        return link
+
+
+@lru_cache(maxsize=1)
+def get_playback_links() -> PlaybackLinks:
+    return PlaybackLinks(ttl=settings.media.playback_url_ttl)
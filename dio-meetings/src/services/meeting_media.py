@@ -1,7 +1,7 @@
 from typing import Literal
 
 import logging
-from collections.abc import AsyncIterable
+from collections.abc import AsyncIterable, Callable
 from pathlib import Path
 from uuid import UUID, uuid4
 
@@ -10,16 +10,26 @@ import anyio
 from fastapi import UploadFile
 
 from .. import s3_utils
-from ..database.repositories import MeetingRepository
+from ..database.repositories import (
+    MeetingRepository,
+    MinutesRepository,
+    TranscriptRepository,
+    TranscriptSegmentRepository,
+)
+from ..database.unit_of_work import UnitOfWork
 from ..schemas import Meeting
-from ..settings import TEMP_DIR
-from ..utils.media import get_media_duration
+from ..settings import TEMP_DIR, settings
+from ..utils.media import create_audio_proxy, get_media_duration
+from .minutes_export import MinutesExporter
+from .search import SearchIndex
+from .vector_index import VectorIndex, get_vector_index
 
 MEDIA_DIR = TEMP_DIR / "media"
 MEDIA_DIR.mkdir(exist_ok=True, parents=True)
 AUDIO_FORMATS = {"mp3", "wav", "m4a", "flac", "aac", "ogg", "oga"}
 VIDEO_FORMATS = {"mp4", "webm"}
 CHUNK_SIZE = 8 * 1024 * 1024  # Размер чанка для загрузки файла в память
+PROBE_URL_TTL = 15 * 60  # Время жизни ссылки, по которой ffprobe читает объект
 
 logger = logging.getLogger(__name__)
 
@@ -40,14 +50,30 @@ def define_media_type(filename: str) -> Literal["audio", "video"]:
 
 
 class MeetingMediaService:
-    def __init__(self, repository: MeetingRepository) -> None:
+    def __init__(
+            self,
+            repository: MeetingRepository,
+            transcript_repo: TranscriptRepository,
+            segment_repo: TranscriptSegmentRepository,
+            minutes_repo: MinutesRepository,
+            search_index: SearchIndex,
+            exporter: MinutesExporter,
+            vector_index_factory: Callable[[], VectorIndex] = get_vector_index,
+    ) -> None:
         self.repository = repository
+        self.transcript_repo = transcript_repo
+        self.segment_repo = segment_repo
+        self.minutes_repo = minutes_repo
+        self.search_index = search_index
+        # Индекс открывается только при удалении встречи, а не для каждого запроса
+        self.vector_index_factory = vector_index_factory
+        self.exporter = exporter
 
     async def upload_and_create(self, file: UploadFile) -> Meeting:
         try:
             logger.info(
                 "Start uploading and creating file `%s` with size %s mb ...",
-                file.filename, round(file.size / 1024 * 1024, 2)
+                file.filename, round(file.size / (1024 * 1024), 2)
             )
             suffix = Path(file.filename).suffix
             async with aiofiles.tempfile.NamedTemporaryFile(
@@ -57,7 +83,7 @@ class MeetingMediaService:
                     await tmp_file.write(chunk)
                 await tmp_file.flush()
                 tmp_file_path = anyio.Path(tmp_file.name)
-                logger.info("File persisted for ")
+                logger.info("File `%s` persisted to `%s`", file.filename, tmp_file.name)
             file_stat = await tmp_file_path.stat()
             s3_key = f"{uuid4()}{suffix}"
             duration_seconds = get_media_duration(tmp_file_path)
@@ -66,17 +92,95 @@ class MeetingMediaService:
                 media_type=define_media_type(file.filename),
                 s3_key=s3_key,
                 format=suffix[1:],
-                size_mb=round(file_stat.st_size / 1024 * 1024, 2),
+                size_mb=round(file_stat.st_size / (1024 * 1024), 2),
                 duration=duration_seconds,
             )
             chunks = generate_chunks(tmp_file_path)
             await s3_utils.upload_multipart(chunks, key=s3_key)
+            if settings.media.audio_proxy:
+                meeting.proxy_s3_key = await self._upload_audio_proxy(tmp_file_path, s3_key)
             await self.repository.create(meeting)
             return meeting
         finally:
             await tmp_file_path.unlink(missing_ok=True)
 
+    async def create_from_storage(self, s3_key: str, filename: str, size: int) -> Meeting:
+        """Создаёт встречу по записи, уже загруженной в хранилище.
+
+        Длительность определяется ffprobe по временной ссылке на объект, поэтому
+        запись не скачивается в API целиком.
+
+        :param s3_key: Ключ объекта в хранилище.
+        :param filename: Исходное имя файла.
+        :param size: Размер файла в байтах.
+        """
+
+        source = await self._storage_source(s3_key)
+        duration_seconds = await anyio.to_thread.run_sync(get_media_duration, source)
+        suffix = Path(filename).suffix
+        meeting = Meeting(
+            original_filename=filename,
+            media_type=define_media_type(filename),
+            s3_key=s3_key,
+            format=suffix[1:],
+            size_mb=round(size / (1024 * 1024), 2),
+            duration=duration_seconds,
+        )
+        if settings.media.audio_proxy:
+            meeting.proxy_s3_key = await self._upload_audio_proxy(source, s3_key)
+        await self.repository.create(meeting)
+        return meeting
+
+    @staticmethod
+    async def _storage_source(s3_key: str) -> str:
+        """Путь или ссылка на объект хранилища, пригодные для чтения ffmpeg"""
+
+        if s3_utils.is_local():
+            return str(s3_utils.local_path(s3_key))
+        return await s3_utils.create_presigned_url(s3_key, expires_in=PROBE_URL_TTL)
+
+    @staticmethod
+    async def _upload_audio_proxy(source: str | anyio.Path, s3_key: str) -> str | None:
+        """Создаёт и загружает облегчённую аудио-версию записи для воспроизведения.
+
+        Ошибка создания аудио-версии не прерывает загрузку встречи.
+        """
+
+        proxy_path = MEDIA_DIR / f"{uuid4().hex}.proxy.mp3"
+        proxy_key = f"{Path(s3_key).stem}.proxy.mp3"
+        try:
+            await anyio.to_thread.run_sync(
+                create_audio_proxy, str(source), proxy_path, settings.media.audio_proxy_bitrate
+            )
+            await s3_utils.upload_multipart(generate_chunks(proxy_path), key=proxy_key)
+        except Exception:
+            logger.exception("Failed to create audio proxy for `%s`", s3_key)
+            return None
+        else:
+            return proxy_key
+        finally:
+            await anyio.Path(proxy_path).unlink(missing_ok=True)
+
     async def delete(self, meeting_id: UUID) -> None:
+        """Удаляет встречу вместе с расшифровкой, протоколом, индексами и выгрузками"""
+
         meeting = await self.repository.read(meeting_id)
-        await self.repository.delete(meeting_id)
+        if meeting is None:
+            return
+        minutes = await self.minutes_repo.get_by_meeting(meeting_id)
+        # Связанные записи удаляются явно: внешних ключей и каскадов в схеме нет
+        async with UnitOfWork(self.repository.session):
+            await self.search_index.delete_meeting(meeting_id)
+            await self.segment_repo.delete_by_meeting(meeting_id)
+            await self.transcript_repo.delete_by_meeting(meeting_id)
+            await self.minutes_repo.delete_by_meeting(meeting_id)
+            await self.repository.delete(meeting_id)
+        try:
+            await self.vector_index_factory().delete_meeting(meeting_id)
+        except Exception:
+            logger.exception("Vector index cleanup of meeting `%s` failed", meeting_id)
+        if minutes is not None:
+            await self.exporter.delete(minutes)
         await s3_utils.delete(key=meeting.s3_key)
+        if meeting.proxy_s3_key is not None:
+            await s3_utils.delete(key=meeting.proxy_s3_key)
@@ -0,0 +1,149 @@
+from typing import Literal
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import anyio
+import anyio.to_process
+
+from .. import s3_utils
+from ..schemas import Minutes
+from ..settings import TEMP_DIR
+from ..utils.docs import md_text_to_docx, md_text_to_pdf
+
+ExportFormat = Literal["pdf", "docx", "md"]
+
+EXPORTS_DIR = TEMP_DIR / "exports"
+EXPORTS_DIR.mkdir(exist_ok=True, parents=True)
+EXPORT_FORMATS: tuple[ExportFormat, ...] = ("pdf", "docx", "md")
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "md": "text/markdown; charset=utf-8",
+}
+EXPORT_FILENAME = "Протокол_совещания"
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(md_text: str) -> str:
+    """Хеш содержимого протокола, определяющий версию его выгрузок"""
+
+    return hashlib.sha256(md_text.encode("utf-8")).hexdigest()[:32]
+
+
+def render(md_text: str, extension: ExportFormat) -> bytes:
+    """Формирует файл протокола. Выполняется в отдельном процессе"""
+
+    md_text = md_text.replace("```", "").replace("markdown", "")
+    match extension:
+        case "pdf":
+            return md_text_to_pdf(md_text)
+        case "docx":
+            return md_text_to_docx(md_text)
+        case "md":
+            return md_text.encode("utf-8")
+    raise ValueError(f"Unsupported export format: {extension}")
+
+
+@dataclass(frozen=True, slots=True)
+class ExportedFile:
+    """Готовая выгрузка протокола на диске"""
+
+    path: Path
+    etag: str
+    media_type: str
+    filename: str
+
+
+def make_etag(hash_: str, extension: ExportFormat) -> str:
+    return f'"{hash_}-{extension}"'
+
+
+class MinutesExporter:
+    """Выгрузки протокола в PDF/DOCX/MD с двухуровневым кешем: диск и S3.
+
+    Ключ кеша — идентификатор протокола и хеш его содержимого, поэтому повторные
+    скачивания отдаются с диска без рендеринга, а изменённый протокол получает
+    новую версию файлов. Рендеринг выполняется в пуле процессов и не блокирует
+    event loop.
+    """
+
+    def __init__(self, exports_dir: Path = EXPORTS_DIR) -> None:
+        self.exports_dir = exports_dir
+
+    def _local_path(self, minutes_id: UUID, hash_: str, extension: ExportFormat) -> Path:
+        return self.exports_dir / f"{minutes_id}-{hash_}.{extension}"
+
+    @staticmethod
+    def _s3_key(minutes_id: UUID, hash_: str, extension: ExportFormat) -> str:
+        return f"exports/{minutes_id}/{hash_}.{extension}"
+
+    @staticmethod
+    async def _write(path: Path, content: bytes) -> None:
+        # Запись через временный файл, чтобы параллельный запрос не прочитал его частично
+        tmp_path = anyio.Path(path.with_name(f".{path.name}.{uuid4().hex}"))
+        await tmp_path.write_bytes(content)
+        await tmp_path.rename(path)
+
+    async def export(
+            self,
+            minutes_id: UUID,
+            hash_: str,
+            extension: ExportFormat,
+            load_md_text: Callable[[], Awaitable[str]],
+    ) -> ExportedFile:
+        """Возвращает выгрузку из кеша, при промахе формирует её.
+
+        :param minutes_id: Идентификатор протокола.
+        :param hash_: Хеш содержимого протокола.
+        :param extension: Формат выгрузки.
+        :param load_md_text: Загрузка текста протокола, вызывается только при промахе.
+        """
+
+        path = self._local_path(minutes_id, hash_, extension)
+        exported = ExportedFile(
+            path=path,
+            etag=make_etag(hash_, extension),
+            media_type=MEDIA_TYPES[extension],
+            filename=f"{EXPORT_FILENAME}.{extension}",
+        )
+        if await anyio.Path(path).exists():
+            return exported
+        s3_key = self._s3_key(minutes_id, hash_, extension)
+        content = await s3_utils.download_if_exists(s3_key)
+        if content is None:
+            md_text = await load_md_text()
+            content = await anyio.to_process.run_sync(render, md_text, extension)
+            await s3_utils.upload(content, key=s3_key)
+            logger.info("Rendered minutes `%s` export to %s", minutes_id, extension.upper())
+        await self._write(path, content)
+        return exported
+
+    async def delete(self, minutes: Minutes) -> None:
+        """Удаляет выгрузки протокола во всех форматах с диска и из S3"""
+
+        hash_ = minutes.content_hash or content_hash(minutes.md_text)
+        for extension in EXPORT_FORMATS:
+            await anyio.Path(self._local_path(minutes.id, hash_, extension)).unlink(
+                missing_ok=True
+            )
+            await s3_utils.delete(self._s3_key(minutes.id, hash_, extension))
+
+    async def precompute(self, minutes: Minutes) -> None:
+        """Заранее формирует выгрузки во всех форматах"""
+
+        hash_ = minutes.content_hash or content_hash(minutes.md_text)
+
+        async def load_md_text() -> str:  # noqa: RUF029
+            return minutes.md_text
+
+        await asyncio.gather(*(
+            self.export(minutes.id, hash_, extension, load_md_text)
+            for extension in EXPORT_FORMATS
+        ))
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from collections.abc import Callable, Sequence
+
+from ..ai_agent import generate_minutes, merge_minutes, summarize_chunk
+from ..schemas import TranscriptSegment
+from ..utils.transcripts import segments_to_markdown
+
+logger = logging.getLogger(__name__)
+
+# Вызывается с порядковым номером фрагмента записи и его распознанными фразами
+ChunkCallback = Callable[[int, Sequence[TranscriptSegment]], None]
+
+
+class RollingSummary:
+    """Конспектирование фрагментов расшифровки параллельно с распознаванием.
+
+    Каждый распознанный фрагмент сразу отправляется в LLM на конспект, пока
+    распознаются следующие. После распознавания всей записи протокол собирается
+    одним коротким запросом из готовых конспектов, поэтому генерация добавляет ко
+    времени обработки только этот запрос и конспект последнего фрагмента.
+
+    Пример:
+        summary = RollingSummary(max_concurrency=2)
+        try:
+            transcript = await processor.transcribe_stream(task_id, meeting, summary.add)
+            md_text = await summary.merge(transcript.full_text)
+        finally:
+            summary.cancel()
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: dict[int, asyncio.Task[str]] = {}
+
+    async def _summarize(self, transcript: str, part_number: int) -> str:
+        async with self._semaphore:
+            return await summarize_chunk(transcript, part_number)
+
+    def add(self, serial_number: int, segments: Sequence[TranscriptSegment]) -> None:
+        """Запускает конспект фрагмента, фрагменты без речи пропускаются"""
+
+        if not segments:
+            return
+        self._tasks[serial_number] = asyncio.create_task(
+            self._summarize(segments_to_markdown(segments), serial_number + 1)
+        )
+
+    async def merge(self, full_text: str) -> str:
+        """Собирает протокол из конспектов фрагментов.
+
+        Если речь была только в одном фрагменте или конспект какого-то фрагмента
+        не удался, протокол генерируется по полной расшифровке, как без конспектов.
+
+        :param full_text: Полная расшифровка встречи.
+        :returns: Протокол в Markdown формате.
+        """
+
+        tasks = [task for _, task in sorted(self._tasks.items())]
+        if len(tasks) <= 1:
+            self.cancel()
+            return await generate_minutes(full_text)
+        try:
+            summaries = await asyncio.gather(*tasks)
+        except Exception:
+            logger.exception("Chunk summarization failed, generating minutes from full text")
+            self.cancel()
+            return await generate_minutes(full_text)
+        return await merge_minutes(summaries)
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
@@ -0,0 +1,357 @@
+from typing import Self
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field, replace
+from functools import lru_cache
+from uuid import UUID, uuid4
+
+from redis.asyncio import Redis
+
+from ..metrics import SCHEDULER_WAIT_SECONDS
+from ..redis_utils import get_redis
+from ..schemas import Task
+from ..settings import settings
+
+QUEUE_KEY = "scheduler:queue"
+RUNNING_KEY = "scheduler:running"
+# Доля для задач без пользователя или команды
+DEFAULT_TENANT = "default"
+# Попытки забрать задачу, пока её перехватывают другие воркеры
+MAX_CLAIM_ATTEMPTS = 10
+
+# Переносит задачу из очереди в обработку, если её ещё не забрал другой воркер
+CLAIM_SCRIPT = """
+if redis.call("HDEL", KEYS[1], ARGV[1]) == 1 then
+    redis.call("HSET", KEYS[2], ARGV[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+# Обновляет запись задачи в обработке, только если она ещё принадлежит воркеру
+UPDATE_RUNNING_SCRIPT = """
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+if not current or cjson.decode(current)["claim"] ~= ARGV[2] then
+    return 0
+end
+if ARGV[3] == "" then
+    redis.call("HDEL", KEYS[1], ARGV[1])
+else
+    redis.call("HSET", KEYS[1], ARGV[1], ARGV[3])
+end
+return 1
+"""
+# Возвращает просроченную задачу в очередь, если её запись не менялась
+REQUEUE_SCRIPT = """
+if redis.call("HGET", KEYS[1], ARGV[1]) == ARGV[2] then
+    redis.call("HDEL", KEYS[1], ARGV[1])
+    redis.call("HSET", KEYS[2], ARGV[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class QueuedTask:
+    """Задача в очереди планировщика.
+
+    Attributes:
+        task_id: Идентификатор задачи.
+        tenant: Пользователь или команда, между которыми делится обработка.
+        priority: Класс приоритета задачи.
+        duration: Длительность записи в секундах, оценка объёма работы.
+        enqueued_at: Время постановки в очередь, unix timestamp.
+        started_at: Время начала обработки, unix timestamp.
+        heartbeat_at: Последнее продление обработки воркером, unix timestamp.
+        claim: Токен воркера, забравшего задачу.
+        attempts: Сколько раз задача возвращалась в очередь после потери воркера.
+    """
+
+    task_id: UUID
+    tenant: str
+    priority: str
+    duration: float
+    enqueued_at: float
+    started_at: float | None = None
+    heartbeat_at: float | None = None
+    claim: str | None = None
+    attempts: int = 0
+
+    def dumps(self) -> str:
+        return json.dumps({**asdict(self), "task_id": str(self.task_id)})
+
+    @classmethod
+    def loads(cls, data: str) -> Self:
+        fields = json.loads(data)
+        return cls(**{**fields, "task_id": UUID(fields["task_id"])})
+
+
+@dataclass(frozen=True, slots=True)
+class SchedulingPolicy:
+    """Порядок выдачи задач воркерам.
+
+    Задачи сравниваются по оценке в минутах записи, первой выдаётся задача с
+    наименьшей оценкой, при равенстве — поставленная раньше:
+
+    - класс приоритета сдвигает оценку на `priority_offsets` минут;
+    - короткие задачи идут первыми: длительность записи с весом `sjf_weight`;
+    - справедливая доля: минуты записей пользователя, уже находящиеся в обработке,
+      с весом `fair_share_weight`, поэтому пачка длинных записей одного пользователя
+      не занимает все воркеры;
+    - старение: каждая минута ожидания уменьшает оценку на `aging_rate`, поэтому
+      длинные задачи и задачи низкого приоритета не ждут бесконечно.
+    """
+
+    priority_offsets: Mapping[str, float] = field(
+        default_factory=lambda: {"high": -60.0, "normal": 0.0, "low": 60.0}
+    )
+    sjf_weight: float = 1.0
+    fair_share_weight: float = 0.5
+    aging_rate: float = 1.0
+
+    def score(self, task: QueuedTask, now: float, tenant_minutes: float = 0.0) -> float:
+        """Оценка задачи в минутах: чем меньше, тем раньше задача будет выдана.
+
+        :param task: Задача в очереди.
+        :param now: Текущее время, unix timestamp.
+        :param tenant_minutes: Минуты записей пользователя задачи в обработке.
+        """
+
+        return (
+            self.priority_offsets.get(task.priority, 0.0)
+            + self.sjf_weight * task.duration / 60
+            + self.fair_share_weight * tenant_minutes
+            - self.aging_rate * (now - task.enqueued_at) / 60
+        )
+
+    def pick(
+            self, queue: Iterable[QueuedTask], running: Iterable[QueuedTask], now: float
+    ) -> QueuedTask | None:
+        """Выбирает следующую задачу.
+
+        :param queue: Ожидающие задачи.
+        :param running: Задачи в обработке у всех воркеров.
+        :param now: Текущее время, unix timestamp.
+        :returns: Задача для выдачи или None, если очередь пуста.
+        """
+
+        tenant_minutes: defaultdict[str, float] = defaultdict(float)
+        for task in running:
+            tenant_minutes[task.tenant] += task.duration / 60
+        return min(
+            queue,
+            key=lambda task: (
+                self.score(task, now, tenant_minutes[task.tenant]), task.enqueued_at
+            ),
+            default=None,
+        )
+
+
+class TaskScheduler:
+    """Очередь задач на генерацию протоколов перед воркерами.
+
+    Состояние хранится в Redis и общее для всех процессов:
+
+    - `scheduler:queue` — хеш `id задачи -> QueuedTask` ожидающих задач;
+    - `scheduler:running` — хеш `id задачи -> QueuedTask` задач в обработке.
+
+    Сообщение в канале задач служит сигналом, что в очереди появилась работа:
+    получивший его воркер забирает не задачу из сообщения, а лучшую по политике.
+    Воркер продлевает запись задачи в обработке каждые `heartbeat_interval` секунд
+    (см. `running`). Задача без продления дольше `heartbeat_timeout` секунд считается
+    потерянной упавшим воркером: она не учитывается в долях пользователей и
+    возвращается в очередь (см. `requeue_expired`).
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            policy: SchedulingPolicy,
+            heartbeat_interval: float = 30,
+            heartbeat_timeout: float = 120,
+    ) -> None:
+        self.redis = redis
+        self.policy = policy
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+
+    async def submit(self, task: Task, duration: float) -> QueuedTask:
+        """Ставит задачу в очередь.
+
+        :param task: Созданная задача.
+        :param duration: Длительность записи встречи в секундах.
+        """
+
+        queued = QueuedTask(
+            task_id=task.id,
+            tenant=task.tenant or DEFAULT_TENANT,
+            priority=task.priority,
+            duration=duration,
+            enqueued_at=time.time(),
+        )
+        await self.redis.hset(QUEUE_KEY, str(task.id), queued.dumps())
+        return queued
+
+    async def is_scheduled(self, task_id: UUID) -> bool:
+        """Задача ожидает в очереди или обрабатывается воркером"""
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hexists(QUEUE_KEY, str(task_id))
+            pipe.hexists(RUNNING_KEY, str(task_id))
+            queued, running = await pipe.execute()
+        return bool(queued or running)
+
+    async def cancel(self, task_id: UUID) -> None:
+        """Убирает задачу из очереди: воркеры её больше не получат"""
+
+        await self.redis.hdel(QUEUE_KEY, str(task_id))
+
+    def _expired(self, task: QueuedTask, now: float) -> bool:
+        alive_at = task.heartbeat_at or task.started_at or now
+        return now - alive_at > self.heartbeat_timeout
+
+    async def _running(self, now: float) -> list[QueuedTask]:
+        running = [QueuedTask.loads(data) for data in await self.redis.hvals(RUNNING_KEY)]
+        return [task for task in running if not self._expired(task, now)]
+
+    async def snapshot(self) -> tuple[list[QueuedTask], list[QueuedTask]]:
+        """Ожидающие задачи и задачи в обработке"""
+
+        now = time.time()
+        queue = [QueuedTask.loads(data) for data in await self.redis.hvals(QUEUE_KEY)]
+        return queue, await self._running(now)
+
+    async def claim(self) -> QueuedTask | None:
+        """Забирает следующую по политике задачу.
+
+        :returns: Задача для обработки или None, если очередь пуста.
+        """
+
+        for _ in range(MAX_CLAIM_ATTEMPTS):
+            now = time.time()
+            queue = [QueuedTask.loads(data) for data in await self.redis.hvals(QUEUE_KEY)]
+            task = self.policy.pick(queue, await self._running(now), now)
+            if task is None:
+                return None
+            # Перенос из очереди удаётся только одному воркеру, остальные выбирают заново
+            task = replace(task, started_at=now, heartbeat_at=now, claim=uuid4().hex)
+            if await self.redis.eval(
+                    CLAIM_SCRIPT, 2, QUEUE_KEY, RUNNING_KEY, str(task.task_id), task.dumps()
+            ):
+                SCHEDULER_WAIT_SECONDS.labels(task.priority).observe(now - task.enqueued_at)
+                logger.info(
+                    "Task `%s` of `%s` scheduled after %.1f s in queue of %s",
+                    task.task_id, task.tenant, now - task.enqueued_at, len(queue),
+                )
+                return task
+        return None
+
+    async def _update_running(self, task: QueuedTask, data: str) -> bool:
+        return bool(await self.redis.eval(
+            UPDATE_RUNNING_SCRIPT, 1, RUNNING_KEY, str(task.task_id), task.claim or "", data
+        ))
+
+    async def release(self, task: QueuedTask) -> None:
+        """Отмечает завершение обработки задачи.
+
+        Задачу, которую после потери продлений уже вернули в очередь и выдали другому
+        воркеру, снимает только новый владелец.
+        """
+
+        await self._update_running(task, "")
+
+    async def _heartbeat(self, task: QueuedTask) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            renewed = replace(task, heartbeat_at=time.time())
+            if not await self._update_running(task, renewed.dumps()):
+                logger.warning("Task `%s` was requeued while still running", task.task_id)
+                return
+
+    @asynccontextmanager
+    async def running(self, task: QueuedTask) -> AsyncIterator[None]:
+        """Обработка забранной задачи: продлевает её запись и снимает по завершении"""
+
+        heartbeat = asyncio.create_task(self._heartbeat(task))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await heartbeat
+            await self.release(task)
+
+    async def requeue_expired(self) -> list[QueuedTask]:
+        """Возвращает в очередь задачи, воркеры которых перестали продлевать обработку.
+
+        Время постановки в очередь сохраняется, поэтому за счёт старения задача
+        выдаётся одной из первых.
+
+        :returns: Возвращённые задачи.
+        """
+
+        now = time.time()
+        requeued = []
+        for data in await self.redis.hvals(RUNNING_KEY):
+            task = QueuedTask.loads(data)
+            if not self._expired(task, now):
+                continue
+            task = replace(
+                task, started_at=None, heartbeat_at=None, claim=None, attempts=task.attempts + 1
+            )
+            # Запись могли продлить или вернуть в очередь другим процессом
+            if await self.redis.eval(
+                    REQUEUE_SCRIPT, 2, RUNNING_KEY, QUEUE_KEY,
+                    str(task.task_id), data, task.dumps(),
+            ):
+                requeued.append(task)
+        if requeued:
+            logger.warning(
+                "Requeued %s tasks of lost workers: %s",
+                len(requeued), [str(task.task_id) for task in requeued],
+            )
+        return requeued
+
+
+async def run_requeue(
+        scheduler: TaskScheduler, notify: Callable[[UUID], Awaitable[None]], interval: float
+) -> None:
+    """Фоновый возврат в очередь задач упавших воркеров.
+
+    :param scheduler: Планировщик задач.
+    :param notify: Сигнал воркерам, что в очереди появилась задача.
+    :param interval: Период проверки в секундах.
+    """
+
+    while True:
+        try:
+            for task in await scheduler.requeue_expired():
+                await notify(task.task_id)
+        except Exception:
+            logger.exception("Requeue of expired tasks failed")
+        await asyncio.sleep(interval)
+
+
+@lru_cache(maxsize=1)
+def get_task_scheduler() -> TaskScheduler:
+    policy = SchedulingPolicy(
+        priority_offsets=settings.scheduler.priority_offsets,
+        sjf_weight=settings.scheduler.sjf_weight,
+        fair_share_weight=settings.scheduler.fair_share_weight,
+        aging_rate=settings.scheduler.aging_rate,
+    )
+    return TaskScheduler(
+        get_redis(),
+        policy,
+        heartbeat_interval=settings.scheduler.heartbeat_interval,
+        heartbeat_timeout=settings.scheduler.heartbeat_timeout,
+    )
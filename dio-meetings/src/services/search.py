@@ -0,0 +1,269 @@
+import html
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from ..schemas import Minutes, SearchHit, TranscriptSegment
+
+# Более короткие слова (предлоги, союзы) в запрос не попадают
+MIN_TOKEN_LENGTH = 3
+# Слова короче порога ищутся целиком, у длинных отбрасывается окончание
+MIN_STEM_LENGTH = 6
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Границы совпадений во фрагменте: символы из области частного использования Unicode,
+# которые заменяются тегами `<b>` уже после экранирования текста
+MATCH_START, MATCH_END = "\ue000", "\ue001"
+
+
+def _to_fts5_query(query: str) -> str:
+    """Переводит пользовательский запрос в FTS5 запрос с префиксным поиском.
+
+    У слов длиннее `MIN_STEM_LENGTH` отбрасываются два последних символа, что грубо
+    заменяет стемминг для русских окончаний: `решения` -> `решен*`.
+    """
+
+    terms = []
+    for token in TOKEN_PATTERN.findall(query.lower()):
+        if len(token) < MIN_TOKEN_LENGTH:
+            continue
+        stem = token[:-2] if len(token) >= MIN_STEM_LENGTH else token
+        terms.append(f'"{stem}"*')
+    return " ".join(terms)
+
+
+def _to_html_snippet(snippet: str) -> str:
+    """Экранирует текст фрагмента и выделяет совпадения тегами `<b>`"""
+
+    escaped = html.escape(snippet)
+    return escaped.replace(MATCH_START, "<b>").replace(MATCH_END, "</b>")
+
+
+class SearchIndex(ABC):
+    """Полнотекстовый индекс фраз расшифровок и протоколов.
+
+    Реализации для диалектов базы данных определяют хранение (`_insert`), удаление
+    и поиск документов.
+    """
+
+    DDL: Sequence[str] = ()
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    @classmethod
+    async def create_schema(cls, connection: AsyncConnection) -> None:
+        """Создаёт таблицы индекса в обход миграций, например во временной базе.
+
+        В рабочей базе их создаёт миграция Alembic с тем же DDL.
+        """
+
+        for statement in cls.DDL:
+            await connection.execute(text(statement))
+
+    @abstractmethod
+    async def _insert(self, documents: list[dict]) -> None:
+        """Добавляет документы в таблицу индекса"""
+
+    async def index_segments(self, segments: Sequence[TranscriptSegment]) -> None:
+        """Добавляет фразы расшифровки в индекс"""
+
+        await self._insert([
+            {
+                "meeting_id": str(segment.meeting_id),
+                "kind": "segment",
+                "start_ms": segment.start_ms,
+                "content": segment.text,
+            }
+            for segment in segments
+            if segment.text
+        ])
+
+    async def index_minutes(self, minutes: Minutes) -> None:
+        """Добавляет протокол в индекс"""
+
+        await self._insert([{
+            "meeting_id": str(minutes.meeting_id),
+            "kind": "minutes",
+            "start_ms": None,
+            "content": minutes.md_text,
+        }])
+
+    @abstractmethod
+    async def delete_meeting(self, meeting_id: UUID, kind: str | None = None) -> None:
+        """Удаляет из индекса документы встречи.
+
+        :param meeting_id: Идентификатор встречи.
+        :param kind: Вид документов (`segment`, `minutes`), None — все документы.
+        """
+
+    @abstractmethod
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> list[SearchHit]:
+        """Поиск документов, отсортированных по релевантности"""
+
+
+class SqliteSearchIndex(SearchIndex):
+    """Встроенный инвертированный индекс на базе SQLite FTS5 с ранжированием BM25.
+
+    Документы хранятся в обычной таблице `search_documents` с индексом по встрече,
+    а `search_index` индексирует их текст как внешнее содержимое (`content=`).
+    Триггеры поддерживают индекс при вставке и удалении документов, поэтому
+    документы встречи удаляются по индексу, а не просмотром всего FTS5 индекса.
+    """
+
+    DDL = (
+        """
+        CREATE TABLE IF NOT EXISTS search_documents (
+            id INTEGER PRIMARY KEY,
+            meeting_id VARCHAR(36) NOT NULL,
+            kind VARCHAR(16) NOT NULL,
+            start_ms INTEGER,
+            content TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_search_documents_meeting
+        ON search_documents (meeting_id, kind)
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            content,
+            content = 'search_documents',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS search_documents_insert
+        AFTER INSERT ON search_documents BEGIN
+            INSERT INTO search_index (rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS search_documents_delete
+        AFTER DELETE ON search_documents BEGIN
+            INSERT INTO search_index (search_index, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        END
+        """,
+    )
+
+    async def _insert(self, documents: list[dict]) -> None:
+        if not documents:
+            return
+        stmt = text(
+            "INSERT INTO search_documents (content, meeting_id, kind, start_ms) "
+            "VALUES (:content, :meeting_id, :kind, :start_ms)"
+        )
+        await self.session.execute(stmt, documents)
+
+    async def delete_meeting(self, meeting_id: UUID, kind: str | None = None) -> None:
+        stmt = text(
+            "DELETE FROM search_documents WHERE meeting_id = :meeting_id "
+            "AND (:kind IS NULL OR kind = :kind)"
+        )
+        await self.session.execute(stmt, {"meeting_id": str(meeting_id), "kind": kind})
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> list[SearchHit]:
+        match = _to_fts5_query(query)
+        if not match:
+            return []
+        stmt = text(
+            "SELECT document.meeting_id, document.kind, document.start_ms, "
+            "snippet(search_index, 0, :start, :end, '…', 16) AS snippet, "
+            "-bm25(search_index) AS score "
+            "FROM search_index JOIN search_documents AS document "
+            "ON document.id = search_index.rowid "
+            "WHERE search_index MATCH :match "
+            "ORDER BY bm25(search_index) LIMIT :limit OFFSET :offset"
+        )
+        result = await self.session.execute(stmt, {
+            "match": match,
+            "start": MATCH_START,
+            "end": MATCH_END,
+            "limit": limit,
+            "offset": offset,
+        })
+        return [
+            SearchHit.model_validate({**row, "snippet": _to_html_snippet(row["snippet"])})
+            for row in result.mappings()
+        ]
+
+
+class PostgresSearchIndex(SearchIndex):
+    """Индекс на базе tsvector с русской конфигурацией и GIN индексом"""
+
+    DDL = (
+        """
+        CREATE TABLE IF NOT EXISTS search_documents (
+            id BIGSERIAL PRIMARY KEY,
+            meeting_id UUID NOT NULL,
+            kind VARCHAR(16) NOT NULL,
+            start_ms INTEGER,
+            content TEXT NOT NULL,
+            tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('russian', content)) STORED
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING GIN (tsv)",
+        "CREATE INDEX IF NOT EXISTS ix_search_documents_meeting ON search_documents (meeting_id)",
+    )
+
+    async def _insert(self, documents: list[dict]) -> None:
+        if not documents:
+            return
+        stmt = text(
+            "INSERT INTO search_documents (meeting_id, kind, start_ms, content) "
+            "VALUES (CAST(:meeting_id AS UUID), :kind, :start_ms, :content)"
+        )
+        await self.session.execute(stmt, documents)
+
+    async def delete_meeting(self, meeting_id: UUID, kind: str | None = None) -> None:
+        stmt = text(
+            "DELETE FROM search_documents WHERE meeting_id = CAST(:meeting_id AS UUID) "
+            "AND (CAST(:kind AS VARCHAR) IS NULL OR kind = :kind)"
+        )
+        await self.session.execute(stmt, {"meeting_id": str(meeting_id), "kind": kind})
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> list[SearchHit]:
+        stmt = text(
+            "SELECT meeting_id, kind, start_ms, "
+            "ts_headline('russian', content, query, :options) AS snippet, "
+            "ts_rank_cd(tsv, query) AS score "
+            "FROM search_documents, websearch_to_tsquery('russian', :query) AS query "
+            "WHERE tsv @@ query ORDER BY score DESC LIMIT :limit OFFSET :offset"
+        )
+        result = await self.session.execute(stmt, {
+            "query": query,
+            "options": (
+                f'StartSel="{MATCH_START}", StopSel="{MATCH_END}", '
+                "MaxFragments=1, MaxWords=16, MinWords=5"
+            ),
+            "limit": limit,
+            "offset": offset,
+        })
+        return [
+            SearchHit.model_validate({**row, "snippet": _to_html_snippet(row["snippet"])})
+            for row in result.mappings()
+        ]
+
+
+SEARCH_INDEXES: dict[str, type[SearchIndex]] = {
+    "sqlite": SqliteSearchIndex,
+    "postgresql": PostgresSearchIndex,
+}
+
+
+def get_search_index_class(dialect_name: str) -> type[SearchIndex]:
+    try:
+        return SEARCH_INDEXES[dialect_name]
+    except KeyError as e:
+        raise ValueError(f"Full-text search is not supported for `{dialect_name}`") from e
+
+
+def create_search_index(session: AsyncSession) -> SearchIndex:
+    """Индекс, соответствующий диалекту подключённой базы данных"""
+
+    return get_search_index_class(session.bind.dialect.name)(session)
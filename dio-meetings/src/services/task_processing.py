@@ -1,21 +1,41 @@
+import asyncio
 import logging
+import time
+from collections.abc import AsyncIterable, Callable, Sequence
+from contextlib import aclosing
 from pathlib import Path
 from uuid import UUID
 
 import aiofiles
 import anyio
+from opentelemetry import trace
 
 from .. import s3_utils
 from ..ai_agent import generate_minutes
 from ..database import repositories
-from ..integrations import salute_speech
-from ..schemas import Minutes, Transcript
-from ..settings import TEMP_DIR
-from ..utils.media import convert_video_to_audio, split_audio_into_chunks
+from ..database.unit_of_work import UnitOfWork
+from ..metrics import TASK_STAGE_SECONDS, TASKS_IN_FLIGHT, TASKS_PROCESSED
+from ..schemas import Meeting, Minutes, Transcript, TranscriptSegment
+from ..settings import settings
+from ..tracing import traced
+from ..utils.media import (
+    PcmSegment,
+    convert_video_to_audio,
+    split_audio_into_chunks,
+    stream_pcm_segments,
+)
+from ..utils.transcripts import count_words, segments_to_markdown
+from .asr import ASREngine, RecognizedPhrase
+from .minutes_export import MinutesExporter, content_hash
+from .rolling_summary import ChunkCallback, RollingSummary
+from .search import SearchIndex
+from .task_submission import TERMINAL_STATUSES
+from .vector_index import VectorIndex, get_vector_index
+from .workspace import BYTES_IN_MB, DiskQuota, TaskWorkspace
 
-TASKS_DIR = TEMP_DIR / "tasks"
-TASKS_DIR.mkdir(exist_ok=True, parents=True)
 CHUNK_SIZE = 8 * 1024 * 1024
+# Форматы, которые ffmpeg не всегда может прочитать из непрерывного потока
+SEEKABLE_FORMATS = {"mp4", "m4a", "mov"}
 
 logger = logging.getLogger(__name__)
 
@@ -26,59 +46,279 @@ class TaskProcessor:
             meeting_repo: repositories.MeetingRepository,
             task_repo: repositories.TaskRepository,
             transcript_repo: repositories.TranscriptRepository,
+            segment_repo: repositories.TranscriptSegmentRepository,
             minutes_repo: repositories.MinutesRepository,
+            search_index: SearchIndex,
+            exporter: MinutesExporter,
+            disk_quota: DiskQuota,
+            asr: ASREngine,
+            uow: UnitOfWork,
+            vector_index_factory: Callable[[], VectorIndex] = get_vector_index,
     ) -> None:
         self.meeting_repo = meeting_repo
         self.task_repo = task_repo
         self.transcript_repo = transcript_repo
+        self.segment_repo = segment_repo
         self.minutes_repo = minutes_repo
+        self.search_index = search_index
+        # Индекс открывается при первой записи, а не при создании обработчика
+        self.vector_index_factory = vector_index_factory
+        self.exporter = exporter
+        self.disk_quota = disk_quota
+        self.asr = asr
+        self.uow = uow
 
-    async def prepare(self, meeting_id: UUID) -> Path:
-        meeting = await self.meeting_repo.read(meeting_id)
-        path = f"{TASKS_DIR}/{meeting.id}_{meeting.media_type}.{meeting.format}"
-        file_path = anyio.Path(path)
-        async with aiofiles.open(file_path, mode="wb") as file:
-            async for chunk in s3_utils.download_multipart(
-                    key=meeting.s3_key, chunk_size=CHUNK_SIZE
-            ):
-                await file.write(chunk)
-            await file.flush()
+    @staticmethod
+    @traced("task.prepare")
+    async def prepare(meeting: Meeting, workspace: TaskWorkspace) -> Path:
+        file_path = anyio.Path(workspace.path / f"{meeting.media_type}.{meeting.format}")
+        with TASK_STAGE_SECONDS.labels("prepare").time():
+            async with aiofiles.open(file_path, mode="wb") as file:
+                async for chunk in s3_utils.download_multipart(
+                        key=meeting.s3_key, chunk_size=CHUNK_SIZE
+                ):
+                    await file.write(chunk)
+                await file.flush()
         if meeting.media_type == "video":
-            content = await convert_video_to_audio(file_path, output_format="mp3")
-            path = f"{TASKS_DIR}/{meeting.id}_audio.mp3"
-            file_path = anyio.Path(path)
+            with TASK_STAGE_SECONDS.labels("convert").time():
+                content = await convert_video_to_audio(
+                    file_path, output_format="mp3", temp_dir=str(workspace.path)
+                )
+            # Исходное видео больше не нужно, место освобождается до нарезки
+            await file_path.unlink()
+            file_path = anyio.Path(workspace.path / "audio.mp3")
             await file_path.write_bytes(content)
-        return file_path
+        return Path(file_path)
 
-    async def transcribe(self, task_id: UUID, audio_file_path: Path) -> Transcript:
-        chunks_dir = TASKS_DIR / "chunks"
-        chunks_dir.mkdir(exist_ok=True)
+    @staticmethod
+    def _to_segments(
+            meeting_id: UUID,
+            chunk: int,
+            offset_ms: int,
+            results: Sequence[RecognizedPhrase],
+    ) -> list[TranscriptSegment]:
+        return [
+            TranscriptSegment(
+                meeting_id=meeting_id,
+                chunk=chunk,
+                start_ms=offset_ms + result.start_ms,
+                end_ms=offset_ms + result.end_ms,
+                speaker=result.speaker,
+                emotion=result.emotion,
+                text=result.text,
+            )
+            for result in results
+        ]
+
+    @traced("task.transcribe")
+    async def transcribe(
+            self,
+            task_id: UUID,
+            audio_file_path: Path,
+            chunks_dir: Path,
+            on_chunk: ChunkCallback | None = None,
+    ) -> Transcript:
         task = await self.task_repo.update(task_id, status="transcribing")
-        texts = []
+        segments: list[TranscriptSegment] = []
+        offset_ms = 0
+        # Фрагменты нарезаются лениво: время нарезки — время ожидания следующего фрагмента
+        split_started = time.perf_counter()
         for chunk in split_audio_into_chunks(
                 audio_file_path, output_format="mp3", output_dir=chunks_dir
         ):
-            content = await anyio.Path(chunk.file_path).read_bytes()
-            text = await salute_speech.recognize_async(content, audio_encoding="MP3")
-            texts.append(text)
+            TASK_STAGE_SECONDS.labels("split").observe(time.perf_counter() - split_started)
+            chunk_path = anyio.Path(chunk.file_path)
+            content = await chunk_path.read_bytes()
+            await chunk_path.unlink()
+            with TASK_STAGE_SECONDS.labels("transcribe_chunk").time():
+                results = await self.asr.recognize(
+                    content, "MP3", duration_ms=round(chunk.duration * 1000)
+                )
+            chunk_segments = self._to_segments(
+                task.meeting_id, chunk.serial_number, offset_ms, results
+            )
+            if on_chunk is not None:
+                on_chunk(chunk.serial_number, chunk_segments)
+            segments.extend(chunk_segments)
+            offset_ms += round(chunk.duration * 1000)
+            split_started = time.perf_counter()
         await anyio.Path(audio_file_path).unlink(missing_ok=True)
-        full_text = "\n".join(texts)
-        words_count = len(full_text.split(" "))
+        return await self._save_transcript(task_id, task.meeting_id, segments)
+
+    @staticmethod
+    async def _stream_source(meeting: Meeting) -> str | AsyncIterable[bytes]:
+        """Вход ffmpeg для потоковой обработки записи.
+
+        Контейнеры MP4/MOV могут хранить индекс в конце файла и требуют перемотки,
+        поэтому читаются ffmpeg по временной ссылке с Range запросами. Остальные
+        форматы подаются в stdin по мере скачивания.
+        """
+
+        if s3_utils.is_local():
+            return str(s3_utils.local_path(meeting.s3_key))
+        if meeting.format.lower() in SEEKABLE_FORMATS:
+            return await s3_utils.create_presigned_url(meeting.s3_key, expires_in=6 * 60 * 60)
+        return s3_utils.download_multipart(key=meeting.s3_key, chunk_size=CHUNK_SIZE)
+
+    @traced("task.transcribe_stream")
+    async def transcribe_stream(
+            self, task_id: UUID, meeting: Meeting, on_chunk: ChunkCallback | None = None
+    ) -> Transcript:
+        """Расшифровка без промежуточных файлов.
+
+        Запись декодируется ffmpeg в PCM прямо из хранилища, фрагменты отправляются
+        на распознавание по мере готовности, до `max_concurrency` одновременно.
+        """
+
+        await self.task_repo.update(task_id, status="transcribing")
+        semaphore = asyncio.Semaphore(settings.pipeline.max_concurrency)
+
+        async def recognize(segment: PcmSegment) -> list[TranscriptSegment]:
+            try:
+                with TASK_STAGE_SECONDS.labels("transcribe_chunk").time():
+                    results = await self.asr.recognize(
+                        segment.content, "PCM_S16LE", duration_ms=segment.duration_ms
+                    )
+            finally:
+                semaphore.release()
+            chunk_segments = self._to_segments(
+                meeting.id, segment.serial_number, segment.offset_ms, results
+            )
+            if on_chunk is not None:
+                on_chunk(segment.serial_number, chunk_segments)
+            return chunk_segments
+
+        source = await self._stream_source(meeting)
+        async with (
+            asyncio.TaskGroup() as task_group,
+            # При ошибке распознавания ffmpeg останавливается до выхода из группы задач
+            aclosing(stream_pcm_segments(source, settings.pipeline.segment_seconds)) as pcm,
+        ):
+            tasks = []
+            async for segment in pcm:
+                # Ограничивает число фрагментов, ожидающих распознавания в памяти
+                await semaphore.acquire()
+                tasks.append(task_group.create_task(recognize(segment)))
+        segments = [segment for task in tasks for segment in task.result()]
+        return await self._save_transcript(task_id, meeting.id, segments)
+
+    async def _save_transcript(
+            self, task_id: UUID, meeting_id: UUID, segments: list[TranscriptSegment]
+    ) -> Transcript:
         transcript = Transcript(
-            meeting_id=task.meeting_id, full_text=full_text, words_count=words_count
+            meeting_id=meeting_id,
+            full_text=segments_to_markdown(segments),
+            words_count=count_words(segments),
         )
-        await self.transcript_repo.create(transcript)
+        # Расшифровка, её фразы и переход к генерации фиксируются одной транзакцией
+        async with self.uow:
+            await self.transcript_repo.create(transcript)
+            await self.segment_repo.bulk_create(segments)
+            await self.search_index.index_segments(segments)
+            await self.task_repo.update(task_id, status="generating")
+        try:
+            await self.vector_index_factory().add_transcript(meeting_id, segments)
+        except Exception:
+            logger.exception("Vector indexing of meeting `%s` transcript failed", meeting_id)
         return transcript
 
-    async def generate(self, task_id: UUID, full_text: str) -> None:
-        task = await self.task_repo.update(task_id, status="generating")
-        md_text = await generate_minutes(full_text)
-        minutes = Minutes(meeting_id=task.meeting_id, title="Untitled", md_text=md_text)
-        await self.minutes_repo.create(minutes)
-        await self.task_repo.update(task_id, status="complete")
+    @traced("task.generate")
+    async def generate(
+            self,
+            meeting_id: UUID,
+            task_id: UUID,
+            full_text: str,
+            summary: RollingSummary | None = None,
+    ) -> None:
+        with TASK_STAGE_SECONDS.labels("generate").time():
+            if summary is not None:
+                md_text = await summary.merge(full_text)
+            else:
+                md_text = await generate_minutes(full_text)
+        minutes = Minutes(
+            meeting_id=meeting_id,
+            title="Untitled",
+            md_text=md_text,
+            content_hash=content_hash(md_text),
+        )
+        # Повторная генерация заменяет прежний протокол встречи и его документы в индексе
+        async with self.uow:
+            await self.minutes_repo.delete_by_meeting(meeting_id)
+            await self.search_index.delete_meeting(meeting_id, kind="minutes")
+            await self.minutes_repo.create(minutes)
+            await self.search_index.index_minutes(minutes)
+            await self.task_repo.update(task_id, status="complete")
+        try:
+            await self.vector_index_factory().add_minutes(meeting_id, md_text)
+        except Exception:
+            logger.exception("Vector indexing of meeting `%s` minutes failed", meeting_id)
+        try:
+            await self.exporter.precompute(minutes)
+        except Exception:
+            logger.exception("Precomputing exports of meeting `%s` minutes failed", meeting_id)
+
+    @traced("task.transcribe_files")
+    async def transcribe_files(
+            self, task_id: UUID, meeting: Meeting, on_chunk: ChunkCallback | None = None
+    ) -> Transcript:
+        """Расшифровка через файлы в рабочей директории задачи"""
+
+        required = round(meeting.size_mb * BYTES_IN_MB * settings.workspace.size_factor)
+        async with (
+            self.disk_quota.reserve(required),
+            TaskWorkspace(task_id) as workspace,
+        ):
+            if meeting.media_type == "video":
+                await self.task_repo.update(task_id, status="converting")
+            audio_file_path = await self.prepare(meeting, workspace)
+            return await self.transcribe(
+                task_id, audio_file_path, workspace.chunks_dir, on_chunk
+            )
 
+    @traced("task.process")
     async def process(self, task_id: UUID) -> None:
-        task = await self.task_repo.update(task_id, status="processing")
-        audio_file_path = await self.prepare(task.meeting_id)
-        transcript = await self.transcribe(task_id, audio_file_path)
-        await self.generate(task_id, transcript.full_text)
+        trace.get_current_span().set_attribute("task.id", str(task_id))
+        task = await self.task_repo.read(task_id)
+        if task is None or task.status in TERMINAL_STATUSES:
+            # Задачу отметили брошенной, пока она ждала в очереди
+            logger.warning("Task `%s` is already finished, skipping", task_id)
+            return
+        meeting = await self.meeting_repo.read(task.meeting_id)
+        if meeting is None:
+            # Встречу удалили, пока задача ждала в очереди
+            logger.warning("Meeting of task `%s` was deleted, skipping", task_id)
+            await self.task_repo.update(
+                task_id, status="failed", error_message="MEETING_NOT_FOUND"
+            )
+            return
+        await self.task_repo.update(task_id, status="processing")
+        TASKS_IN_FLIGHT.inc()
+        summary = None
+        status = "failed"
+        try:
+            # Живые встречи распознаются по ходу записи и приходят с готовой расшифровкой
+            transcript = await self.transcript_repo.get_by_meeting(meeting.id)
+            if transcript is not None:
+                await self.task_repo.update(task_id, status="generating")
+            else:
+                if settings.pipeline.rolling_summary:
+                    summary = RollingSummary(settings.pipeline.summary_concurrency)
+                on_chunk = summary.add if summary is not None else None
+                with TASK_STAGE_SECONDS.labels("transcribe").time():
+                    if settings.pipeline.streaming:
+                        transcript = await self.transcribe_stream(task_id, meeting, on_chunk)
+                    else:
+                        transcript = await self.transcribe_files(task_id, meeting, on_chunk)
+            await self.generate(task.meeting_id, task_id, transcript.full_text, summary)
+            status = "complete"
+        except Exception as e:
+            logger.exception("Processing of task `%s` failed", task_id)
+            await self.task_repo.session.rollback()
+            await self.task_repo.update(
+                task_id, status="failed", error_message=str(e) or type(e).__name__
+            )
+        finally:
+            if summary is not None:
+                summary.cancel()
+            TASKS_IN_FLIGHT.dec()
+            TASKS_PROCESSED.labels(status).inc()
@@ -0,0 +1,167 @@
+from typing import Literal
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from ..database.repositories import TaskRepository
+from ..redis_utils import redis_lock
+from ..schemas import Meeting, Task
+from ..settings import TIMEZONE, settings
+from ..utils.commons import current_datetime
+from .admission import AdmissionController
+from .scheduler import TaskScheduler
+
+IDEMPOTENCY_TTL = 24 * 60 * 60  # Время жизни ключа идемпотентности в секундах
+CREATION_LOCK_TTL = 30
+CREATION_LOCK_TIMEOUT = 10
+TERMINAL_STATUSES = frozenset({"complete", "failed"})
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Ключ идемпотентности уже использован для другой встречи"""
+
+
+@dataclass(frozen=True, slots=True)
+class Submission:
+    """Результат постановки задачи.
+
+    Attributes:
+        task: Новая задача или уже существующая задача встречи.
+        created: Задача создана этим запросом и её нужно передать воркерам.
+        estimated_start: Оценка начала обработки новой задачи.
+    """
+
+    task: Task
+    created: bool
+    estimated_start: datetime | None = None
+
+
+class TaskSubmissionService:
+    """Постановка задач с защитой от повторов.
+
+    На одну встречу одновременно приходится одна задача: повторный запрос, пока
+    задача в работе, получает её же, а по готовой встрече сразу возвращается
+    завершённая задача. Новая задача создаётся, только если прошлая завершилась
+    ошибкой, брошена (см. `_is_abandoned`) или явно запрошена повторная генерация.
+    Брошенная задача помечается завершённой с ошибкой. Проверка и создание задачи
+    выполняются под блокировкой встречи в Redis, общей для всех процессов API.
+
+    Ключ идемпотентности (заголовок `Idempotency-Key`) запоминается на сутки:
+    `idempotency:tasks:{key}` -> `{meeting_id}:{task_id}`.
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            task_repo: TaskRepository,
+            scheduler: TaskScheduler,
+            admission: AdmissionController,
+    ) -> None:
+        self.redis = redis
+        self.task_repo = task_repo
+        self.scheduler = scheduler
+        self.admission = admission
+
+    @staticmethod
+    def _idempotency_key(key: str) -> str:
+        return f"idempotency:tasks:{key}"
+
+    async def _is_abandoned(self, task: Task) -> bool:
+        """Незавершённая задача, которой нет ни в очереди планировщика, ни в обработке.
+
+        Так выглядит задача, которую не удалось поставить в очередь. Ожидание в очереди
+        и долгая обработка нормальны, поэтому время изменения задачи учитывается только
+        как запас на постановку в очередь после записи задачи в базу.
+        """
+
+        if task.status in TERMINAL_STATUSES or await self.scheduler.is_scheduled(task.id):
+            return False
+        updated_at = task.updated_at
+        if updated_at.tzinfo is None:
+            # SQLite хранит время без часового пояса, задачи пишут его в поясе приложения
+            updated_at = TIMEZONE.localize(updated_at)
+        grace = timedelta(seconds=settings.scheduler.submission_grace)
+        return current_datetime() - updated_at > grace
+
+    async def _fail(self, task_id: UUID, error_message: str) -> Task | None:
+        # Задача убирается из очереди, иначе воркер забрал бы её после отметки об ошибке
+        await self.scheduler.cancel(task_id)
+        return await self.task_repo.update(task_id, status="failed", error_message=error_message)
+
+    async def _replay(self, idempotency_key: str, meeting_id: UUID) -> Task | None:
+        stored = await self.redis.get(self._idempotency_key(idempotency_key))
+        if stored is None:
+            return None
+        stored_meeting_id, task_id = stored.split(":")
+        if UUID(stored_meeting_id) != meeting_id:
+            raise IdempotencyKeyReusedError(
+                f"Idempotency key is already used for meeting `{stored_meeting_id}`"
+            )
+        return await self.task_repo.read(UUID(task_id))
+
+    async def submit(
+            self,
+            meeting: Meeting,
+            priority: Literal["high", "normal", "low"] = "normal",
+            tenant: str | None = None,
+            idempotency_key: str | None = None,
+            regenerate: bool = False,
+    ) -> Submission:
+        """Создаёт задачу на генерацию протокола или возвращает существующую.
+
+        :param meeting: Встреча.
+        :param priority: Класс приоритета новой задачи.
+        :param tenant: Пользователь или команда новой задачи.
+        :param idempotency_key: Ключ идемпотентности запроса клиента.
+        :param regenerate: Создать задачу, даже если протокол уже готов.
+        :raises IdempotencyKeyReusedError: Ключ использован для другой встречи.
+        :raises AdmissionError: Очередь переполнена.
+        :raises LockTimeoutError: Задача для встречи создаётся слишком долго.
+        """
+
+        if idempotency_key is not None:
+            task = await self._replay(idempotency_key, meeting.id)
+            if task is not None:
+                return Submission(task, created=False)
+        async with redis_lock(
+            self.redis,
+            f"lock:tasks:meeting:{meeting.id}",
+            ttl=CREATION_LOCK_TTL,
+            timeout=CREATION_LOCK_TIMEOUT,
+        ):
+            latest = await self.task_repo.get_latest_by_meeting(meeting.id)
+            if latest is not None and await self._is_abandoned(latest):
+                logger.warning(
+                    "Task `%s` of meeting `%s` is not scheduled in `%s`, marking it failed",
+                    latest.id, meeting.id, latest.status,
+                )
+                latest = await self._fail(latest.id, "TASK_STALE")
+            if latest is not None and latest.status != "failed" and not (
+                regenerate and latest.status == "complete"
+            ):
+                logger.info("Meeting `%s` already has task `%s`", meeting.id, latest.id)
+                submission = Submission(latest, created=False)
+            else:
+                estimated_start = await self.admission.admit_task(tenant, meeting.duration)
+                task = Task(meeting_id=meeting.id, priority=priority, tenant=tenant)
+                await self.task_repo.create(task)
+                try:
+                    await self.scheduler.submit(task, meeting.duration)
+                except Exception:
+                    # Иначе задача навсегда осталась бы `pending` и к ней присоединялись бы
+                    await self._fail(task.id, "TASK_SUBMISSION_FAILED")
+                    raise
+                submission = Submission(task, created=True, estimated_start=estimated_start)
+            if idempotency_key is not None:
+                await self.redis.set(
+                    self._idempotency_key(idempotency_key),
+                    f"{meeting.id}:{submission.task.id}",
+                    ex=IDEMPOTENCY_TTL,
+                )
+        return submission
@@ -0,0 +1,292 @@
+import logging
+import math
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from redis.asyncio import Redis
+
+from .. import s3_utils
+from ..schemas import Meeting, PresignedPart, UploadSession
+from .admission import AdmissionController
+from .meeting_media import MeetingMediaService, define_media_type
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # Минимальный размер части S3 (кроме последней)
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+# Часть загрузки через API целиком держится в памяти процесса
+MAX_PART_SIZE = 64 * 1024 * 1024
+S3_MAX_PART_SIZE = 5 * 1024 * 1024 * 1024  # Максимальный размер части S3
+MAX_PARTS = 10_000  # Максимальное число частей составного объекта S3
+UPLOAD_TTL = 24 * 60 * 60  # Время жизни незавершённой загрузки в секундах
+COMPLETE_LOCK_TTL = 10 * 60
+PART_URL_TTL = 60 * 60  # Время жизни ссылки на загрузку части
+
+logger = logging.getLogger(__name__)
+
+
+class UploadStateError(Exception):
+    """Операция недопустима в текущем состоянии загрузки"""
+
+
+def choose_part_size(size: int, part_size: int | None = None) -> int:
+    """Размер части с учётом ограничений S3 на размер и число частей.
+
+    Желаемый размер ограничивается `MAX_PART_SIZE`, больше него часть бывает
+    только у файлов, которые иначе не уложились бы в `MAX_PARTS` частей.
+
+    :raises ValueError: Файл не укладывается в `MAX_PARTS` частей по 5 ГиБ.
+    """
+
+    part_size = min(part_size or DEFAULT_PART_SIZE, MAX_PART_SIZE)
+    part_size = max(part_size, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+    if part_size > S3_MAX_PART_SIZE:
+        raise ValueError(f"File of {size} bytes is too large for a multipart upload")
+    return part_size
+
+
+def expected_part_size(upload: UploadSession, part_number: int) -> int:
+    if part_number < upload.parts_count:
+        return upload.part_size
+    return upload.size - upload.part_size * (upload.parts_count - 1)
+
+
+class ResumableUploadService:
+    """Возобновляемая загрузка записей частями.
+
+    Каждая часть клиента соответствует части составного объекта S3, поэтому
+    части можно загружать параллельно и повторять после обрыва соединения.
+    Состояние загрузки и ETag загруженных частей хранятся в Redis:
+
+    - `upload:{id}` — хеш с параметрами загрузки;
+    - `upload:{id}:parts` — хеш `номер части -> ETag`.
+
+    В режиме `direct` клиент загружает части по presigned ссылкам прямо в
+    хранилище, а API работает только с метаданными: список принятых частей
+    запрашивается у хранилища через `list_parts`.
+
+    Размер файла проверяется при начале загрузки теми же пределами, что и загрузка
+    одним запросом (см. `AdmissionController`).
+    """
+
+    def __init__(
+            self,
+            redis: Redis,
+            media_service: MeetingMediaService,
+            admission: AdmissionController,
+            ttl: int = UPLOAD_TTL,
+    ) -> None:
+        self.redis = redis
+        self.media_service = media_service
+        self.admission = admission
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(upload_id: UUID) -> str:
+        return f"upload:{upload_id}"
+
+    @staticmethod
+    def _parts_key(upload_id: UUID) -> str:
+        return f"upload:{upload_id}:parts"
+
+    async def init(
+            self,
+            filename: str,
+            size: int,
+            part_size: int | None = None,
+            *,
+            direct: bool = False,
+    ) -> UploadSession:
+        """Начинает загрузку и составной объект в хранилище.
+
+        :param filename: Исходное имя файла.
+        :param size: Размер файла в байтах.
+        :param part_size: Желаемый размер части в байтах.
+        :param direct: Части загружаются клиентом напрямую в хранилище.
+        :raises UploadTooLargeError: Файл больше допустимого размера загрузки.
+        :raises AdmissionError: Не хватает места на диске.
+        """
+
+        define_media_type(filename)
+        self.admission.check_upload(size)
+        part_size = choose_part_size(size, part_size)
+        s3_key = f"{uuid4()}{Path(filename).suffix}"
+        s3_upload_id = await s3_utils.create_multipart_upload(s3_key)
+        upload = UploadSession(
+            filename=filename,
+            size=size,
+            part_size=part_size,
+            parts_count=math.ceil(size / part_size),
+            direct=direct,
+            expires_at=datetime.now(UTC) + timedelta(seconds=self.ttl),
+            s3_key=s3_key,
+            s3_upload_id=s3_upload_id,
+        )
+        key = self._key(upload.id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "filename": filename,
+                "size": size,
+                "part_size": part_size,
+                "s3_key": s3_key,
+                "s3_upload_id": s3_upload_id,
+                "direct": int(direct),
+                "expires_at": upload.expires_at.isoformat(),
+            })
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        logger.info(
+            "Initiate upload `%s` of `%s`, %s parts of %s bytes",
+            upload.id, filename, upload.parts_count, part_size
+        )
+        return upload
+
+    async def get(self, upload_id: UUID) -> UploadSession | None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._key(upload_id))
+            pipe.hkeys(self._parts_key(upload_id))
+            state, part_numbers = await pipe.execute()
+        if not state:
+            return None
+        size, part_size = int(state["size"]), int(state["part_size"])
+        return UploadSession(
+            id=upload_id,
+            filename=state["filename"],
+            size=size,
+            part_size=part_size,
+            parts_count=math.ceil(size / part_size),
+            direct=bool(int(state.get("direct", 0))),
+            uploaded_parts=sorted(int(part_number) for part_number in part_numbers),
+            expires_at=datetime.fromisoformat(state["expires_at"]),
+            s3_key=state["s3_key"],
+            s3_upload_id=state["s3_upload_id"],
+        )
+
+    async def upload_part(self, upload: UploadSession, part_number: int, content: bytes) -> None:
+        """Загружает часть в хранилище. Повторная загрузка части перезаписывает её.
+
+        :param upload: Состояние загрузки.
+        :param part_number: Номер части, начиная с 1.
+        :param content: Содержимое части.
+        """
+
+        self._check_part_number(upload, part_number)
+        if len(content) != expected_part_size(upload, part_number):
+            raise UploadStateError(
+                f"Part {part_number} must be {expected_part_size(upload, part_number)} bytes"
+            )
+        etag = await s3_utils.upload_part(
+            upload.s3_key, upload.s3_upload_id, part_number, content
+        )
+        parts_key = self._parts_key(upload.id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(parts_key, str(part_number), etag)
+            pipe.expire(parts_key, self.ttl)
+            await pipe.execute()
+        logger.info("Upload `%s`: received part %s", upload.id, part_number)
+
+    @staticmethod
+    def _check_part_number(upload: UploadSession, part_number: int) -> None:
+        if not 1 <= part_number <= upload.parts_count:
+            raise UploadStateError(f"Part number must be in range 1..{upload.parts_count}")
+
+    async def presign_parts(
+            self, upload: UploadSession, part_numbers: list[int]
+    ) -> list[PresignedPart]:
+        """Выдаёт ссылки для загрузки частей напрямую в хранилище.
+
+        :param upload: Состояние загрузки.
+        :param part_numbers: Номера частей, начиная с 1.
+        """
+
+        for part_number in part_numbers:
+            self._check_part_number(upload, part_number)
+        expires_at = datetime.now(UTC) + timedelta(seconds=PART_URL_TTL)
+        urls = await s3_utils.create_presigned_upload_part_urls(
+            upload.s3_key, upload.s3_upload_id, part_numbers, expires_in=PART_URL_TTL
+        )
+        return [
+            PresignedPart(
+                part_number=part_number,
+                size=expected_part_size(upload, part_number),
+                url=url,
+                expires_at=expires_at,
+            )
+            for part_number, url in urls.items()
+        ]
+
+    @staticmethod
+    async def _stored_parts(upload: UploadSession) -> list[dict]:
+        """Части, принятые хранилищем, с проверкой их размеров"""
+
+        parts = await s3_utils.list_parts(upload.s3_key, upload.s3_upload_id)
+        for part in parts:
+            if part["Size"] != expected_part_size(upload, part["PartNumber"]):
+                raise UploadStateError(
+                    f"Part {part["PartNumber"]} has size {part["Size"]}, "
+                    f"expected {expected_part_size(upload, part["PartNumber"])} bytes"
+                )
+        return parts
+
+    @staticmethod
+    async def refresh(upload: UploadSession) -> UploadSession:
+        """Актуализирует список загруженных частей для прямой загрузки"""
+
+        if not upload.direct:
+            return upload
+        parts = await s3_utils.list_parts(upload.s3_key, upload.s3_upload_id)
+        return upload.model_copy(
+            update={"uploaded_parts": [part["PartNumber"] for part in parts]}
+        )
+
+    async def _acquire_completion(self, upload_id: UUID) -> None:
+        acquired = await self.redis.set(
+            f"{self._key(upload_id)}:completing", "1", nx=True, ex=COMPLETE_LOCK_TTL
+        )
+        if not acquired:
+            raise UploadStateError("Upload is already being completed")
+
+    async def _forget(self, upload_id: UUID) -> None:
+        key = self._key(upload_id)
+        await self.redis.delete(key, self._parts_key(upload_id), f"{key}:completing")
+
+    async def _completed_parts(self, upload: UploadSession) -> list[dict]:
+        if upload.direct:
+            etags = {
+                part["PartNumber"]: part["ETag"] for part in await self._stored_parts(upload)
+            }
+        else:
+            etags = {
+                int(part_number): etag
+                for part_number, etag in (
+                    await self.redis.hgetall(self._parts_key(upload.id))
+                ).items()
+            }
+        missing = set(range(1, upload.parts_count + 1)) - etags.keys()
+        if missing:
+            raise UploadStateError(f"Missing parts: {sorted(missing)[:20]}")
+        return [
+            {"PartNumber": part_number, "ETag": etags[part_number]}
+            for part_number in range(1, upload.parts_count + 1)
+        ]
+
+    async def complete(self, upload: UploadSession) -> Meeting:
+        """Собирает объект из загруженных частей и создаёт встречу"""
+
+        await self._acquire_completion(upload.id)
+        try:
+            parts = await self._completed_parts(upload)
+            await s3_utils.complete_multipart_upload(upload.s3_key, upload.s3_upload_id, parts)
+            meeting = await self.media_service.create_from_storage(
+                upload.s3_key, upload.filename, upload.size
+            )
+        except Exception:
+            await self.redis.delete(f"{self._key(upload.id)}:completing")
+            raise
+        await self._forget(upload.id)
+        logger.info("Upload `%s` completed, meeting `%s` created", upload.id, meeting.id)
+        return meeting
+
+    async def abort(self, upload: UploadSession) -> None:
+        await s3_utils.abort_multipart_upload(upload.s3_key, upload.s3_upload_id)
+        await self._forget(upload.id)
+        logger.info("Upload `%s` aborted", upload.id)
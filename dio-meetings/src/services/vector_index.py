@@ -0,0 +1,242 @@
+from typing import TYPE_CHECKING, Protocol
+
+import hashlib
+import logging
+import math
+import re
+from collections.abc import Sequence
+from functools import lru_cache
+from uuid import UUID
+
+import anyio
+
+from ..schemas import Passage, TranscriptSegment
+from ..settings import CHROMA_PATH, settings
+
+if TYPE_CHECKING:
+    import chromadb
+    from chromadb.api.types import Metadata, PyEmbeddings
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Размер пачки при записи в индекс
+BATCH_SIZE = 256
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder(Protocol):
+    """Модель, переводящая тексты в векторы фиксированной размерности"""
+
+    dimension: int
+
+    def embed(self, texts: Sequence[str]) -> "PyEmbeddings": ...
+
+
+class HashingEmbedder:
+    """Детерминированный эмбеддер на хешировании признаков.
+
+    Слова и символьные триграммы хешируются в `dimension` корзин со знаком,
+    вектор нормируется. Не требует загрузки модели и одинаково работает во всех
+    процессах, поэтому подходит для тестов и как CPU-вариант по умолчанию.
+    """
+
+    def __init__(self, dimension: int = 384) -> None:
+        self.dimension = dimension
+
+    @staticmethod
+    def _features(text: str) -> list[str]:
+        features = []
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            features.append(token)
+            padded = f" {token} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def _embed_one(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimension
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            sign = 1.0 if value & 1 else -1.0
+            vector[(value >> 1) % self.dimension] += sign
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed(self, texts: Sequence[str]) -> "PyEmbeddings":
+        return [self._embed_one(text) for text in texts]
+
+
+class SentenceTransformerEmbedder:
+    """Локальная модель sentence-transformers, выполняемая на CPU"""
+
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import SentenceTransformer  # noqa: PLC0415
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> "PyEmbeddings":
+        vectors = self.model.encode(
+            list(texts), batch_size=BATCH_SIZE, normalize_embeddings=True
+        )
+        return vectors.tolist()
+
+
+def create_embedder() -> Embedder:
+    if settings.vector.embedder == "sentence-transformers":
+        return SentenceTransformerEmbedder(settings.vector.model_name)
+    return HashingEmbedder(settings.vector.dimension)
+
+
+def split_words(text: str, passage_words: int) -> list[str]:
+    """Делит текст на фрагменты по `passage_words` слов"""
+
+    words = text.split()
+    return [
+        " ".join(words[i:i + passage_words]) for i in range(0, len(words), passage_words)
+    ]
+
+
+def group_segments(
+        segments: Sequence[TranscriptSegment], passage_words: int
+) -> list[tuple[int, str]]:
+    """Объединяет соседние фразы расшифровки во фрагменты не короче `passage_words` слов.
+
+    :returns: Пары (начало фрагмента в мс, текст).
+    """
+
+    passages: list[tuple[int, str]] = []
+    texts: list[str] = []
+    words = 0
+    start_ms = 0
+    for segment in segments:
+        if not texts:
+            start_ms = segment.start_ms
+        texts.append(segment.text)
+        words += len(segment.text.split())
+        if words >= passage_words:
+            passages.append((start_ms, " ".join(texts)))
+            texts, words = [], 0
+    if texts:
+        passages.append((start_ms, " ".join(texts)))
+    return passages
+
+
+class VectorIndex:
+    """ANN индекс фрагментов расшифровок и протоколов, хранящийся в `CHROMA_PATH`.
+
+    Идентификаторы фрагментов детерминированы (`<meeting>:<kind>:<n>`). Повторная
+    индексация встречи (например, после повторной генерации протокола) сначала
+    удаляет её фрагменты того же вида: новый текст может делиться на меньшее число
+    фрагментов, и лишние старые иначе остались бы в индексе.
+
+    Локальное хранилище Chroma рассчитано на один процесс: `CHROMA_PATH` не должен
+    быть общим для нескольких процессов или реплик сервиса, иначе параллельная
+    запись повредит индекс.
+    """
+
+    def __init__(self, collection: "chromadb.Collection", embedder: Embedder) -> None:
+        self.collection = collection
+        self.embedder = embedder
+
+    def _replace(
+            self,
+            meeting_id: UUID,
+            kind: str,
+            ids: list[str],
+            documents: list[str],
+            metadatas: list["Metadata"],
+    ) -> None:
+        """Заменяет фрагменты встречи вида `kind` новыми"""
+
+        self.collection.delete(
+            where={"$and": [{"meeting_id": str(meeting_id)}, {"kind": kind}]}
+        )
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = slice(start, start + BATCH_SIZE)
+            self.collection.upsert(
+                ids=ids[batch],
+                documents=documents[batch],
+                metadatas=metadatas[batch],
+                embeddings=self.embedder.embed(documents[batch]),
+            )
+
+    async def add_transcript(
+            self, meeting_id: UUID, segments: Sequence[TranscriptSegment]
+    ) -> None:
+        passages = group_segments(segments, settings.vector.passage_words)
+        ids = [f"{meeting_id}:segment:{i}" for i in range(len(passages))]
+        metadatas: list[Metadata] = [
+            {"meeting_id": str(meeting_id), "kind": "segment", "start_ms": start_ms}
+            for start_ms, _ in passages
+        ]
+        documents = [text for _, text in passages]
+        await anyio.to_thread.run_sync(
+            self._replace, meeting_id, "segment", ids, documents, metadatas
+        )
+        logger.info("Indexed %s transcript passages of meeting `%s`", len(ids), meeting_id)
+
+    async def add_minutes(self, meeting_id: UUID, md_text: str) -> None:
+        documents = split_words(md_text, settings.vector.passage_words)
+        ids = [f"{meeting_id}:minutes:{i}" for i in range(len(documents))]
+        metadatas: list[Metadata] = [
+            {"meeting_id": str(meeting_id), "kind": "minutes"} for _ in documents
+        ]
+        await anyio.to_thread.run_sync(
+            self._replace, meeting_id, "minutes", ids, documents, metadatas
+        )
+        logger.info("Indexed %s minutes passages of meeting `%s`", len(ids), meeting_id)
+
+    async def delete_meeting(self, meeting_id: UUID) -> None:
+        await anyio.to_thread.run_sync(
+            lambda: self.collection.delete(where={"meeting_id": str(meeting_id)})
+        )
+
+    def _query(self, query: str, k: int) -> list[Passage]:
+        result = self.collection.query(
+            query_embeddings=self.embedder.embed([query]),
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        documents, metadatas, distances = (
+            result["documents"], result["metadatas"], result["distances"]
+        )
+        # Поля запрошены в `include`, поэтому есть в ответе
+        assert documents is not None
+        assert metadatas is not None
+        assert distances is not None
+        return [
+            Passage.model_validate({
+                "meeting_id": metadata["meeting_id"],
+                "kind": metadata["kind"],
+                "start_ms": metadata.get("start_ms"),
+                "text": document,
+                "score": 1 - distance,
+            })
+            for document, metadata, distance in zip(
+                documents[0], metadatas[0], distances[0], strict=True
+            )
+        ]
+
+    async def query(self, query: str, k: int = 10) -> list[Passage]:
+        """Top-k ближайших по смыслу фрагментов"""
+
+        return await anyio.to_thread.run_sync(self._query, query, k)
+
+
+@lru_cache(maxsize=1)
+def get_vector_index() -> VectorIndex:
+    """Общий для процесса индекс: клиент Chroma держит открытые файлы HNSW.
+
+    Вызывается только там, где фрагменты записываются или ищутся, поэтому процесс,
+    не обращавшийся к индексу, не открывает `CHROMA_PATH`. Писать в индекс должен
+    единственный процесс (см. `VectorIndex`).
+    """
+
+    import chromadb  # noqa: PLC0415
+
+    client = chromadb.PersistentClient(path=str(CHROMA_PATH))
+    collection = client.get_or_create_collection(
+        name=settings.vector.collection, metadata={"hnsw:space": "cosine"}
+    )
+    return VectorIndex(collection, create_embedder())
@@ -0,0 +1,209 @@
+from typing import Self
+
+import asyncio
+import logging
+import shutil
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+from types import TracebackType
+from uuid import UUID
+
+import anyio
+
+from ..schemas import DirectoryUsage, DiskUsage
+from ..settings import TEMP_DIR, settings
+
+TASKS_DIR = TEMP_DIR / "tasks"
+TASKS_DIR.mkdir(exist_ok=True, parents=True)
+BYTES_IN_MB = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class DiskSpaceError(Exception):
+    """Не дождались свободного места на диске для обработки задачи"""
+
+
+def _remove_tree(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def directory_size(path: Path) -> int:
+    """Суммарный размер файлов в директории в байтах"""
+
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def _latest_mtime(path: Path) -> float:
+    """Время последнего изменения файла или самого свежего файла в директории"""
+
+    mtime = path.stat().st_mtime
+    if path.is_dir():
+        mtime = max((file.stat().st_mtime for file in path.rglob("*")), default=mtime)
+    return mtime
+
+
+def directories_usage(directories: Iterable[Path]) -> list[DirectoryUsage]:
+    return [
+        DirectoryUsage(
+            name=directory.name,
+            entries=sum(1 for _ in directory.iterdir()),
+            size_bytes=directory_size(directory),
+        )
+        for directory in directories
+        if directory.exists()
+    ]
+
+
+class TaskWorkspace:
+    """Рабочая директория задачи, удаляемая при выходе из контекста.
+
+    Все промежуточные файлы задачи (исходная запись, аудио, фрагменты) создаются
+    внутри `TASKS_DIR/<task_id>`, поэтому удаляются вместе с директорией, в том
+    числе при ошибке обработки.
+
+    Пример:
+        async with TaskWorkspace(task_id) as workspace:
+            audio_path = await processor.prepare(meeting, workspace)
+    """
+
+    def __init__(self, task_id: UUID, root: Path = TASKS_DIR) -> None:
+        self.path = root / str(task_id)
+        self.chunks_dir = self.path / "chunks"
+
+    async def __aenter__(self) -> Self:
+        await anyio.Path(self.chunks_dir).mkdir(parents=True, exist_ok=True)
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None,
+    ) -> None:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(_remove_tree, self.path)
+        logger.info("Workspace `%s` removed", self.path.name)
+
+
+class DiskQuota:
+    """Допуск задач к обработке с учётом свободного места на диске.
+
+    Задача резервирует оценку нужного ей места и ждёт, пока свободного места за
+    вычетом резервов остальных задач процесса и минимального запаса не станет
+    достаточно. Если места не появилось за `timeout` секунд, поднимается
+    `DiskSpaceError`.
+    """
+
+    def __init__(
+            self, path: Path, min_free: int, timeout: float, poll_interval: float = 5
+    ) -> None:
+        self.path = path
+        self.min_free = min_free
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.reserved = 0
+
+    def usage(self) -> DiskUsage:
+        total, used, free = shutil.disk_usage(self.path)
+        return DiskUsage(
+            total_bytes=total,
+            used_bytes=used,
+            free_bytes=free,
+            reserved_bytes=self.reserved,
+            min_free_bytes=self.min_free,
+        )
+
+    def _fits(self, required: int) -> bool:
+        return self.usage().free_bytes - self.reserved - self.min_free >= required
+
+    @asynccontextmanager
+    async def reserve(self, required: int) -> AsyncIterator[None]:
+        """Ожидает свободное место и резервирует его на время контекста.
+
+        :param required: Оценка места, необходимого задаче, в байтах.
+        """
+
+        deadline = time.monotonic() + self.timeout
+        # Задача, которой не хватит места даже на пустом диске, допускается одна
+        while (self.reserved and not self._fits(required)) or not self._fits(0):
+            if time.monotonic() >= deadline:
+                raise DiskSpaceError(
+                    f"Not enough disk space: {required // BYTES_IN_MB} MB required, "
+                    f"{self.usage().free_bytes // BYTES_IN_MB} MB free"
+                )
+            logger.warning(
+                "Task admission delayed: %s MB required, %s MB free, %s MB reserved",
+                required // BYTES_IN_MB,
+                self.usage().free_bytes // BYTES_IN_MB,
+                self.reserved // BYTES_IN_MB,
+            )
+            await asyncio.sleep(self.poll_interval)
+        self.reserved += required
+        try:
+            yield
+        finally:
+            self.reserved -= required
+
+
+@lru_cache(maxsize=1)
+def get_disk_quota() -> DiskQuota:
+    """Общий для процесса контроллер: резервы учитываются по всем задачам"""
+
+    return DiskQuota(
+        TEMP_DIR,
+        min_free=settings.workspace.min_free_mb * BYTES_IN_MB,
+        timeout=settings.workspace.admission_timeout,
+        poll_interval=settings.workspace.poll_interval,
+    )
+
+
+def _remove_stale(directories: Iterable[Path], stale_after: float) -> tuple[int, int]:
+    removed, freed = 0, 0
+    threshold = time.time() - stale_after
+    for directory in directories:
+        if not directory.exists():
+            continue
+        for entry in directory.iterdir():
+            try:
+                if _latest_mtime(entry) >= threshold:
+                    continue
+                if entry.is_dir():
+                    size = directory_size(entry)
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    size = entry.stat().st_size
+                    entry.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+async def run_janitor(
+        directories: Iterable[Path], interval: float, stale_after: float
+) -> None:
+    """Фоновая очистка временных файлов, не изменявшихся дольше `stale_after` секунд.
+
+    Подбирает остатки задач, завершившихся аварийно (например, при падении процесса),
+    и вытесняет давно не обновлявшиеся файлы кеша.
+    """
+
+    directories = list(directories)
+    while True:
+        try:
+            removed, freed = await anyio.to_thread.run_sync(
+                _remove_stale, directories, stale_after
+            )
+            if removed:
+                logger.info(
+                    "Janitor removed %s stale entries, freed %s MB",
+                    removed, freed // BYTES_IN_MB
+                )
+        except Exception:
+            logger.exception("Janitor run failed")
+        await asyncio.sleep(interval)
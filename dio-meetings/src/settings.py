@@ -50,6 +50,8 @@ class SberDevicesSettings(BaseSettings):
     scope: str = "<SCOPE>"
     client_id: str = "<CLIENT_ID>"
     client_secret: str = "<CLIENT_SECRET>"
+    oauth_url: str = "https://ngw.devices.sberbank.ru:9443/api/v2"
+    speech_url: str = "https://smartspeech.sber.ru/rest/v1/"
 
 
 class PostgresSettings(BaseSettings):
@@ -78,11 +80,189 @@ class RedisSettings(BaseSettings):
         return f"redis://{self.host}:{self.port}/0"
 
 
+class VectorIndexSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="VECTOR_")
+
+    # `hashing` не требует модели; `sentence-transformers` — локальная модель
+    # `model_name` на CPU, нужна зависимость из extra `vector`:
+    # `uv sync --extra vector` или `pip install sentence-transformers`.
+    # `dimension` задаётся только для `hashing`, у модели размерность своя.
+    # После смены эмбеддера индекс нужно пересоздать (другая коллекция или CHROMA_PATH).
+    # CHROMA_PATH открывает только один процесс: несколько реплик сервиса не должны
+    # делить его через общий том
+    embedder: Literal["hashing", "sentence-transformers"] = "hashing"
+    model_name: str = "intfloat/multilingual-e5-small"
+    dimension: int = 384
+    passage_words: int = 120
+    collection: str = "meetings"
+
+
+class StorageSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="STORAGE_")
+
+    backend: Literal["s3", "local"] = "s3"
+    endpoint_url: str = "https://storage.yandexcloud.net/"
+    region: str = "ru-central1"
+    bucket: str = "dev-uploads-data"
+    # Path-style адресация нужна локальным аналогам S3 (MinIO, moto)
+    force_path_style: bool = False
+    local_dir: Path = BASE_DIR / ".storage"
+    local_url_prefix: str = "/api/v2/storage"
+    signing_key: str = "<SIGNING_KEY>"
+
+
+class MediaSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="MEDIA_")
+
+    playback_url_ttl: int = 15 * 60
+    audio_proxy: bool = False
+    audio_proxy_bitrate: str = "48k"
+
+
+class WorkspaceSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="WORKSPACE_")
+
+    min_free_mb: int = 2048
+    # Оценка места на задачу: размер записи, умноженный на коэффициент
+    size_factor: float = 3.0
+    admission_timeout: float = 30 * 60
+    poll_interval: float = 5
+    janitor_interval: float = 10 * 60
+    stale_after: float = 6 * 60 * 60
+
+
+class PipelineSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PIPELINE_")
+
+    # Потоковая обработка записи через ffmpeg без промежуточных файлов
+    streaming: bool = False
+    segment_seconds: int = 10 * 60
+    max_concurrency: int = 2
+    # Конспектирование фрагментов LLM параллельно с распознаванием следующих
+    rolling_summary: bool = False
+    summary_concurrency: int = 2
+
+
+class ASRSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="ASR_")
+
+    engines: list[Literal["salute", "speechkit", "fake"]] = ["salute"]
+    strategy: Literal["load", "cost"] = "load"
+    max_concurrency: int = 4
+    timeout_per_minute: float = 60.0
+    min_timeout: float = 120.0
+    cooldown: float = 60.0
+    salute_cost: float = 1.0
+    speechkit_cost: float = 1.0
+    fake_latency: float = 0.0
+    fake_latency_per_minute: float = 0.5
+
+
+class LiveSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="LIVE_")
+
+    # Порог RMS кадра PCM s16le, выше которого кадр считается речью
+    vad_threshold: int = 500
+    silence_ms: int = 600
+    min_speech_ms: int = 250
+    max_segment_ms: int = 30_000
+    max_concurrency: int = 4
+
+
+class TracingSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="TRACING_")
+
+    enabled: bool = False
+    # `console` пишет спаны в stdout и не требует коллектора
+    exporter: Literal["console", "otlp"] = "console"
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    service_name: str = "dio-meetings"
+    sample_ratio: float = 1.0
+
+
+class ResilienceSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="RESILIENCE_")
+
+    # Квоты запросов в секунду на все процессы по сервисам, без квоты — без ограничения
+    rate_limits: dict[str, float] = {"sberdevices": 2, "salute": 10, "speechkit": 10, "llm": 2}
+    # Размер корзины: сколько запросов можно отправить разом после простоя
+    burst: dict[str, int] = {"sberdevices": 2, "salute": 10, "speechkit": 10, "llm": 4}
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    # Ответ с большим Retry-After не ждём, а сразу отдаём ошибку
+    max_retry_after: float = 120.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+class SchedulerSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="SCHEDULER_")
+
+    # Сдвиг оценки задачи по классу приоритета, в минутах записи
+    priority_offsets: dict[str, float] = {"high": -60.0, "normal": 0.0, "low": 60.0}
+    sjf_weight: float = 1.0
+    fair_share_weight: float = 0.5
+    # На сколько минут оценки задача продвигается за минуту ожидания
+    aging_rate: float = 1.0
+    # Воркер продлевает задачу в обработке каждые `heartbeat_interval` секунд; задача
+    # без продления дольше `heartbeat_timeout` возвращается в очередь
+    heartbeat_interval: float = 30
+    heartbeat_timeout: float = 120
+    # Задача, воркеры которой падали столько раз, завершается ошибкой
+    max_attempts: int = 3
+    # Запас на постановку в очередь только что созданной задачи: задача без записи
+    # в планировщике дольше этого считается брошенной
+    submission_grace: float = 60
+
+
+class AdmissionSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="ADMISSION_")
+
+    # Одновременные загрузки записей через API на процесс
+    max_uploads: int = 4
+    max_upload_mb: int = 8192
+    upload_retry_after: float = 30
+    # Предел очереди в часах записей: на всю систему и на пользователя или команду
+    max_queued_hours: float = 48
+    max_tenant_queued_hours: float = 12
+    # Оценка пропускной способности: число воркеров и время обработки секунды записи
+    workers: int = 2
+    seconds_per_audio_second: float = 0.25
+
+
+class CacheSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="CACHE_")
+
+    enabled: bool = True
+    # Время жизни записей в Redis, секунды
+    ttl: float = 60 * 60
+    # Кэш в памяти процесса: сброс в других процессах виден с задержкой до `local_ttl`
+    local_ttl: float = 5.0
+    local_max_entries: int = 1024
+    local_max_mb: int = 64
+    # Промах загружает из базы один процесс, остальные ждут до `lock_timeout` секунд
+    lock_ttl: float = 10.0
+    lock_timeout: float = 3.0
+
+
 class Settings(BaseSettings):
     yandexcloud: YandexCloudSettings = YandexCloudSettings()
     postgres: PostgresSettings = PostgresSettings()
     redis: RedisSettings = RedisSettings()
     sberdevices: SberDevicesSettings = SberDevicesSettings()
+    vector: VectorIndexSettings = VectorIndexSettings()
+    storage: StorageSettings = StorageSettings()
+    media: MediaSettings = MediaSettings()
+    workspace: WorkspaceSettings = WorkspaceSettings()
+    pipeline: PipelineSettings = PipelineSettings()
+    asr: ASRSettings = ASRSettings()
+    live: LiveSettings = LiveSettings()
+    tracing: TracingSettings = TracingSettings()
+    resilience: ResilienceSettings = ResilienceSettings()
+    scheduler: SchedulerSettings = SchedulerSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    cache: CacheSettings = CacheSettings()
 
 
 settings = Settings()
@@ -0,0 +1,145 @@
+from typing import TYPE_CHECKING, Any
+
+import functools
+import inspect
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import aclosing, contextmanager
+
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+from .settings import settings
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from opentelemetry.sdk.trace import TracerProvider
+
+tracer = trace.get_tracer("dio-meetings")
+
+
+def setup_tracing() -> "TracerProvider | None":
+    """Настраивает экспорт трасс процесса.
+
+    Без коллектора достаточно экспорта `console`: спаны пишутся в stdout.
+    Трассировка выключена, пока не задано `TRACING_ENABLED=true`. SDK и экспортёр
+    (OTLP тянет protobuf и requests) импортируются только при включённой трассировке,
+    без неё спаны `traced` создаёт no-op провайдер из API.
+
+    :returns: Провайдер трасс для сброса буфера при остановке или None.
+    """
+
+    if not settings.tracing.enabled:
+        return None
+    from opentelemetry.sdk.resources import Resource  # noqa: PLC0415
+    from opentelemetry.sdk.trace import TracerProvider  # noqa: PLC0415
+    from opentelemetry.sdk.trace.export import (  # noqa: PLC0415
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased  # noqa: PLC0415
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing.service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing.sample_ratio)),
+    )
+    exporter: SpanExporter
+    if settings.tracing.exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (  # noqa: PLC0415
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.tracing.otlp_endpoint)
+    else:
+        exporter = ConsoleSpanExporter()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def instrument_app(app: "FastAPI") -> None:
+    """Спаны входящих HTTP запросов, если трассировка включена.
+
+    Вызывается при создании приложения: middleware нельзя добавить после запуска.
+    """
+
+    if not settings.tracing.enabled:
+        return
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor  # noqa: PLC0415
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+
+
+@contextmanager
+def _detached_span(name: str, attributes: dict[str, Any]) -> Iterator[None]:
+    """Спан, который не становится текущим: для генераторов, отдающих управление"""
+
+    span = tracer.start_span(name, attributes=attributes)
+    try:
+        yield
+    except GeneratorExit:
+        # Потребитель прекратил итерацию досрочно, это не ошибка
+        raise
+    except BaseException as e:
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, str(e)))
+        raise
+    finally:
+        span.end()
+
+
+def _wrap(func: Callable, name: str, attributes: dict[str, Any]) -> Callable:
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def async_gen_wrapper(*args: Any, **kwargs: Any) -> AsyncIterator:
+            # `aclosing` закрывает внутренний генератор вместе с обёрткой: иначе его
+            # `finally` выполнил бы позже финализатор event loop, вне задачи потребителя
+            with _detached_span(name, attributes):
+                async with aclosing(func(*args, **kwargs)) as gen:
+                    async for item in gen:
+                        yield item
+
+        return async_gen_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gen_wrapper(*args: Any, **kwargs: Any) -> Iterator:
+            with _detached_span(name, attributes):
+                yield from func(*args, **kwargs)
+
+        return gen_wrapper
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.start_as_current_span(name, attributes=attributes):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with tracer.start_as_current_span(name, attributes=attributes):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def traced[**P, R](
+        name: str | None = None, **attributes: Any
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Оборачивает вызов функции в спан.
+
+    Для корутин и обычных функций спан становится текущим, и вложенные вызовы
+    попадают в него дочерними спанами. Для генераторов спан охватывает всю
+    итерацию, но текущим не становится: между шагами выполняется код потребителя.
+
+    :param name: Имя спана, по умолчанию — модуль и имя функции.
+    :param attributes: Постоянные атрибуты спана.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        span_name = name or f"{func.__module__.removeprefix('src.')}.{func.__qualname__}"
+        return _wrap(func, span_name, attributes)
+
+    return decorator
@@ -0,0 +1,70 @@
+import codecs
+import io
+from collections.abc import Iterator
+
+import zstandard
+
+# Тексты короче порога хранятся без сжатия: выигрыш меньше накладных расходов кадра
+MIN_COMPRESS_SIZE = 512
+ZSTD_LEVEL = 9
+# Размер блока при потоковой распаковке
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Однобайтовый префикс, определяющий формат хранения
+RAW_CODEC = b"\x00"
+ZSTD_CODEC = b"\x01"
+
+
+def compress_text(text: str) -> bytes:
+    """Сжимает текст в формат хранения `<кодек><данные>`"""
+
+    data = text.encode("utf-8")
+    if len(data) < MIN_COMPRESS_SIZE:
+        return RAW_CODEC + data
+    return ZSTD_CODEC + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def decompress_text(blob: bytes | str) -> str:
+    """Восстанавливает текст, сохранённый через `compress_text`.
+
+    Строки, записанные до включения сжатия (обычный TEXT), возвращаются как есть.
+    """
+
+    if isinstance(blob, str):
+        return blob
+    blob = bytes(blob)
+    codec, data = blob[:1], blob[1:]
+    if codec == RAW_CODEC:
+        return data.decode("utf-8")
+    if codec == ZSTD_CODEC:
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown text codec: {codec!r}")
+
+
+def iter_decompress_text(
+        blob: bytes | str, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[str]:
+    """Потоково распаковывает текст блоками, не материализуя его целиком"""
+
+    if isinstance(blob, str):
+        for start in range(0, len(blob), chunk_size):
+            yield blob[start:start + chunk_size]
+        return
+    blob = bytes(blob)
+    codec, data = blob[:1], blob[1:]
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    if codec == RAW_CODEC:
+        chunks: Iterator[bytes] = (
+            data[start:start + chunk_size] for start in range(0, len(data), chunk_size)
+        )
+    elif codec == ZSTD_CODEC:
+        chunks = zstandard.ZstdDecompressor().read_to_iter(
+            io.BytesIO(data), read_size=chunk_size, write_size=chunk_size
+        )
+    else:
+        raise ValueError(f"Unknown text codec: {codec!r}")
+    for chunk in chunks:
+        if text := decoder.decode(chunk):
+            yield text
+    if tail := decoder.decode(b"", final=True):
+        yield tail
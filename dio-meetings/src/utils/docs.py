@@ -1,6 +1,9 @@
 import io
+import tempfile
+from pathlib import Path
 
 from markdown_pdf import MarkdownPdf, Section
+from md2docx_python.src.md2docx_python import markdown_to_word
 
 
 def md_text_to_pdf(md_text: str) -> bytes:
@@ -11,3 +14,14 @@ def md_text_to_pdf(md_text: str) -> bytes:
     buffer = io.BytesIO()
     pdf.save_bytes(buffer)
     return buffer.getvalue()
+
+
+def md_text_to_docx(md_text: str) -> bytes:
+    """Формирует DOCX файл по Markdown тексту"""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        md_path = Path(tmp_dir) / "minutes.md"
+        docx_path = Path(tmp_dir) / "minutes.docx"
+        md_path.write_text(md_text, encoding="utf-8")
+        markdown_to_word(md_path, docx_path)
+        return docx_path.read_bytes()
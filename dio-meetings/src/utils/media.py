@@ -1,23 +1,29 @@
+from typing import Final
+
+import asyncio
 import contextlib
 import logging
 import os
-from collections.abc import Iterator
+from collections.abc import AsyncGenerator, AsyncIterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from uuid import uuid4
 
 import aiofiles.tempfile
 import anyio
-import ffmpeg
-from pydub import AudioSegment
-from pydub.utils import make_chunks
 from tinytag import TinyTag
 
+from ..tracing import traced
+
 BYTES_IN_MB = 1_000_000
+# Параметры PCM потока, подаваемого на распознавание: 16 кГц, моно, 16 бит
+PCM_SAMPLE_RATE: Final = 16_000
+PCM_BYTES_PER_SECOND = PCM_SAMPLE_RATE * 2
 
 logger = logging.getLogger(__name__)
 
 
+@traced("media.convert_video_to_audio")
 async def convert_video_to_audio(
         input_path: str | Path,
         output_format: str = "mp3",
@@ -34,6 +40,9 @@ async def convert_video_to_audio(
     :returns: Байты аудио файла.
     """
 
+    # ffmpeg-python импортируется при первой обработке записи, а не при старте API
+    import ffmpeg  # noqa: PLC0415
+
     output_format = output_format.lstrip(".").lower()
     # Определение аудио кодек в зависимости от формата
     if output_format == "mp3":
@@ -114,6 +123,7 @@ class AudioChunk:
     duration: float
 
 
+@traced("media.split_audio_into_chunks")
 def split_audio_into_chunks(
         audio_file_path: str | Path,
         chunk_duration_ms: int = 20 * 60 * 1000,
@@ -129,6 +139,9 @@ def split_audio_into_chunks(
     :returns: Объекты аудио фрагментов.
     """
 
+    from pydub import AudioSegment  # noqa: PLC0415
+    from pydub.utils import make_chunks  # noqa: PLC0415
+
     logger.info("Start split audio into chunks...")
     audio_format = str(audio_file_path).rsplit(".", maxsplit=1)[-1].lower()
     audio = AudioSegment.from_file(audio_file_path, format=audio_format)
@@ -153,9 +166,12 @@ def split_audio_into_chunks(
         )
 
 
+@traced("media.probe_duration")
 def get_media_duration(file_path: str | Path) -> float:
     """Получение длительности медиа контента в секундах"""
 
+    import ffmpeg  # noqa: PLC0415
+
     try:
         logger.info("Start getting media file duration `%s` ...", file_path)
         probe = ffmpeg.probe(file_path)
@@ -169,3 +185,136 @@ def get_media_duration(file_path: str | Path) -> float:
     except ffmpeg.Error as e:
         error_msg = e.stderr.decode("utf-8", errors="replace") if e.stderr else str(e)
         raise RuntimeError(f"FFprobe error: {error_msg}") from e
+
+
+@traced("media.create_audio_proxy")
+def create_audio_proxy(
+        input_path: str | Path, output_path: str | Path, bitrate: str = "48k"
+) -> None:
+    """Создаёт облегчённую аудио-версию записи для воспроизведения в браузере.
+
+    :param input_path: Исходный аудио или видео файл.
+    :param output_path: Выходной MP3 файл.
+    :param bitrate: Битрейт аудио-версии.
+    """
+
+    import ffmpeg  # noqa: PLC0415
+
+    try:
+        (
+            ffmpeg
+            .input(str(input_path))
+            .output(
+                str(output_path),
+                format="mp3",
+                acodec="libmp3lame",
+                audio_bitrate=bitrate,
+                ac=1,
+                vn=None,
+                loglevel="error",
+            )
+            .run(capture_stderr=True, overwrite_output=True)
+        )
+    except ffmpeg.Error as e:
+        error_msg = e.stderr.decode("utf-8", errors="replace") if e.stderr else str(e)
+        raise RuntimeError(f"FFmpeg error during audio proxy creation: {error_msg}") from e
+
+
+@dataclass(frozen=True, slots=True)
+class PcmSegment:
+    """Фрагмент аудио в формате PCM s16le 16 кГц моно, готовый к распознаванию.
+
+    Attributes:
+        serial_number: Порядковый номер в последовательности.
+        offset_ms: Смещение начала фрагмента от начала записи в миллисекундах.
+        content: Сырые PCM сэмплы без заголовка.
+    """
+
+    serial_number: int
+    offset_ms: int
+    content: bytes
+
+    @property
+    def duration_ms(self) -> int:
+        return len(self.content) * 1000 // PCM_BYTES_PER_SECOND
+
+
+async def _feed_stdin(process: asyncio.subprocess.Process, chunks: AsyncIterable[bytes]) -> None:
+    stdin = process.stdin
+    assert stdin is not None
+    try:
+        async for chunk in chunks:
+            stdin.write(chunk)
+            # Ожидание слива буфера даёт обратное давление на скачивание
+            await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        logger.warning("FFmpeg closed stdin before the input ended")
+    finally:
+        stdin.close()
+
+
+@traced("media.stream_pcm_segments")
+async def stream_pcm_segments(
+        source: str | Path | AsyncIterable[bytes],
+        segment_seconds: int = 10 * 60,
+) -> AsyncGenerator[PcmSegment]:
+    """Декодирует запись через ffmpeg в PCM поток и нарезает его на фрагменты в памяти.
+
+    Промежуточные файлы не создаются: вход подаётся в stdin ffmpeg (или читается им
+    по пути/ссылке), выход читается из stdout фрагментами по `segment_seconds`.
+
+    :param source: Путь, URL или асинхронный поток байтов исходной записи.
+    :param segment_seconds: Длительность фрагмента в секундах.
+    :returns: Фрагменты PCM по порядку.
+    """
+
+    from_stdin = not isinstance(source, str | Path)
+    input_args = ("-i", "pipe:0") if from_stdin else ("-nostdin", "-i", str(source))
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", *input_args,
+        "-vn", "-ac", "1", "-ar", str(PCM_SAMPLE_RATE), "-acodec", "pcm_s16le", "-f", "s16le",
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE if from_stdin else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    assert process.stdout is not None
+    assert process.stderr is not None
+    feeder = (
+        asyncio.create_task(_feed_stdin(process, source))
+        if not isinstance(source, str | Path) else None
+    )
+    stderr_reader = asyncio.create_task(process.stderr.read())
+    segment_size = segment_seconds * PCM_BYTES_PER_SECOND
+    serial_number = offset_ms = 0
+    try:
+        while True:
+            try:
+                content = await process.stdout.readexactly(segment_size)
+            except asyncio.IncompleteReadError as e:
+                content = e.partial
+            if not content:
+                break
+            segment = PcmSegment(serial_number, offset_ms, content)
+            logger.info(
+                "Decoded PCM segment %s: %s ms from %s ms",
+                serial_number, segment.duration_ms, offset_ms
+            )
+            yield segment
+            serial_number += 1
+            offset_ms += segment.duration_ms
+            if len(content) < segment_size:
+                break
+        if feeder is not None:
+            await feeder
+        returncode = await process.wait()
+        if returncode != 0:
+            error_text = (await stderr_reader).decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"FFmpeg failed with code {returncode}. Error: {error_text}")
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        for task in (feeder, stderr_reader):
+            if task is not None and not task.done():
+                task.cancel()
@@ -0,0 +1,51 @@
+from collections.abc import Iterable, Iterator
+
+import orjson
+from fastapi import status
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def model_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """Сериализует готовую схему в JSON ответ за один проход pydantic-core.
+
+    FastAPI при наличии `response_model` выгружает возвращённую схему в словарь и
+    валидирует его повторно, что для больших текстов (расшифровки, протоколы) означает
+    лишнее копирование. Возвращённый `Response` отдаётся клиенту как есть.
+    """
+
+    return json_response(model.__pydantic_serializer__.to_json(model), status_code)
+
+
+def json_response(body: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    """Ответ с готовым JSON телом, например сохранённым в кэше чтения"""
+
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+def stream_json_object(
+        model: BaseModel, text_field: str, text_chunks: Iterable[str]
+) -> Iterator[bytes]:
+    """Потоково формирует JSON объект, длинное текстовое поле которого поступает частями.
+
+    :param model: Схема с остальными полями объекта.
+    :param text_field: Имя текстового поля, дописываемого последним.
+    :param text_chunks: Фрагменты текста в порядке следования.
+    """
+
+    head = model.model_dump_json()
+    yield f'{head[:-1]},"{text_field}":"'.encode()
+    for chunk in text_chunks:
+        yield orjson.dumps(chunk)[1:-1]
+    yield b'"}'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверяет заголовок `If-None-Match` на совпадение с ETag (слабое сравнение)"""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
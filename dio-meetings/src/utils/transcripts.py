@@ -0,0 +1,41 @@
+from typing import Protocol
+
+from collections.abc import Iterable
+
+NO_SPEECH_TEXT = "No speech recognized"
+
+
+class Utterance(Protocol):
+    """Распознанная фраза с таймкодами"""
+
+    text: str
+    speaker: int | None
+    emotion: str | None
+    start_ms: int
+
+
+def format_timestamp(milliseconds: int) -> str:
+    """Форматирует смещение от начала записи как `чч:мм:сс`"""
+
+    seconds = milliseconds // 1000
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def segments_to_markdown(segments: Iterable[Utterance]) -> str:
+    """Формирует Markdown расшифровку из распознанных фраз"""
+
+    lines: list[str] = []
+    for i, segment in enumerate(segments):
+        parts = [f"{i}. [{format_timestamp(segment.start_ms)}] {segment.text}"]
+        if segment.speaker is not None:
+            parts.append(f"({segment.speaker})")
+        if segment.emotion is not None:
+            parts.append(f"[{segment.emotion}]")
+        lines.append(" ".join(parts))
+    return "\n".join(lines) if lines else NO_SPEECH_TEXT
+
+
+def count_words(segments: Iterable[Utterance]) -> int:
+    """Количество слов во всех фразах"""
+
+    return sum(len(segment.text.split()) for segment in segments)